@@ -0,0 +1,123 @@
+# artifact_reloader.py
+"""Background reload of the output/ artifacts without restarting the API"""
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def file_signature(paths: List[Path]) -> Tuple:
+    """(mtime_ns, size) per path, None for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class ArtifactReloader:
+    """Loads a new data state off the request path and hands it to `install` in one step.
+
+    `load` must build the complete new state without touching what is being served;
+    `install` swaps it in. A failed load leaves the current state untouched. Reloads
+    never overlap: a trigger arriving while one runs schedules exactly one more.
+    With an interval, watched files are polled and a reload starts once their
+    mtimes have changed and then held still for one more poll (so half-written
+    files from a retraining run are not picked up).
+    """
+
+    def __init__(self, load: Callable[[], Dict], install: Callable[[Dict], None],
+                 watched: List[Path], interval: float = 0.0):
+        self._load = load
+        self._install = install
+        self.watched = watched
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = False
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        # Signature of the files behind the last reload attempt, successful or not
+        self._attempted_signature = file_signature(watched)
+        self.reloads = 0
+        self.failures = 0
+        self.last_reason: Optional[str] = None
+        self.last_started: Optional[str] = None
+        self.last_finished: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def trigger(self, reason: str) -> bool:
+        """Start a background reload; returns False if it was queued behind a running one"""
+        with self._lock:
+            if self._running:
+                self._pending = True
+                return False
+            self._running = True
+        threading.Thread(target=self._run, args=(reason,), name="artifact-reload", daemon=True).start()
+        return True
+
+    def _run(self, reason: str) -> None:
+        while True:
+            self.last_reason = reason
+            self.last_started = datetime.now().isoformat(timespec='seconds')
+            self._attempted_signature = file_signature(self.watched)
+            started = time.perf_counter()
+            try:
+                state = self._load()
+                self._install(state)
+                self.reloads += 1
+                self.last_error = None
+                print(f"✓ Artifacts reloaded ({reason}) in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"⚠ Artifact reload failed ({reason}), keeping current data: {e}")
+            self.last_duration = time.perf_counter() - started
+            self.last_finished = datetime.now().isoformat(timespec='seconds')
+
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                self._pending = False
+                reason = "queued"
+
+    def start_watching(self) -> None:
+        if self.interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="artifact-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        self._watcher = None
+
+    def _watch(self) -> None:
+        previous = file_signature(self.watched)
+        while not self._stop.wait(self.interval):
+            current = file_signature(self.watched)
+            # Reload once the files differ from the last attempt and have stopped changing
+            if current == previous and current != self._attempted_signature:
+                self.trigger("file change")
+            previous = current
+
+    def status(self) -> Dict:
+        return {
+            "running": self._running,
+            "pending": self._pending,
+            "watching": self._watcher is not None,
+            "interval_seconds": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_reason": self.last_reason,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_duration_seconds": self.last_duration,
+            "last_error": self.last_error,
+        }
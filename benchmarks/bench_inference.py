@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-model predict() (predict_matrix) vs the fused inference engine
+
+Needs output/ensemble_model.pkl. Reports latency per batch size and the largest
+relative difference between the two paths.
+
+Usage: python benchmarks/bench_inference.py [--sizes 1 8 64 1024] [--repeat 50]
+"""
+import argparse
+import pickle
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from inference import FusedEnsemble  # noqa: E402
+from prediction_features import build_feature_matrix, predict_matrix  # noqa: E402
+
+CATEGORIES = ['RING', 'GOLD CHAINS', 'BANGLE', 'EARRING', 'NECKLACE', 'BRACELET']
+STORES = ['MAIN_STORE', 'STORE_1', 'STORE_2', 'STORE_3', 'STORE_4', 'STORE_5', 'STORE_6']
+
+
+def random_features(n: int, feature_columns, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    dates = [f"2025-{m:02d}-{d:02d}" for m, d in zip(rng.integers(1, 13, n), rng.integers(1, 29, n))]
+    return build_feature_matrix(
+        list(rng.choice(CATEGORIES, n)), list(rng.uniform(1, 80, n)), dates,
+        list(rng.choice([18.0, 22.0, 24.0], n)), list(rng.choice(STORES, n)), feature_columns,
+    )
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 8, 64, 1024])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    with open(ROOT / 'output' / 'ensemble_model.pkl', 'rb') as f:
+        package = pickle.load(f)
+    started = time.perf_counter()
+    engine = FusedEnsemble(package)
+    print(f"compiled {len(engine.trees)} trees in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    print(f"{'rows':>6} {'models ms':>10} {'fused ms':>10} {'speedup':>8} {'max rel diff':>13}")
+    for n in args.sizes:
+        X = random_features(n, package['feature_columns'])
+        legacy = timed(lambda: predict_matrix(package, X), args.repeat)
+        fused = timed(lambda: engine.predict(X), args.repeat)
+        expected, _ = predict_matrix(package, X)
+        diff = np.max(np.abs(engine.predict(X) - expected) / np.maximum(np.abs(expected), 1.0))
+        print(f"{n:>6} {legacy * 1000:>10.3f} {fused * 1000:>10.3f} {legacy / fused:>7.1f}x {diff:>13.2e}")
+
+
+if __name__ == '__main__':
+    main()
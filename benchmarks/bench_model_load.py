@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: unpickling output/ensemble_model.pkl vs mapping the model artifact
+
+Each load runs in a fresh interpreter; reports wall time and resident memory
+added by the load (mapped artifact pages only count once they are touched, and
+are shared between workers). Exports the artifact first if it is missing.
+
+Usage: python benchmarks/bench_model_load.py [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from model_artifact import artifact_path, is_current  # noqa: E402
+
+MODEL = ROOT / 'output' / 'ensemble_model.pkl'
+ARTIFACT = artifact_path(MODEL, Path(os.environ.get("JEWELAI_CACHE_DIR", ROOT / ".cache" / "columns")))
+
+LOADERS = {
+    'pickle': f"import pickle; model = pickle.load(open(r'{MODEL}', 'rb'))",
+    'artifact': "from model_artifact import load_artifact; from pathlib import Path; "
+                f"model = load_artifact(Path(r'{ARTIFACT}'))",
+}
+
+PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, r'{root}')
+import numpy, sklearn, xgboost, inference  # imported up front so only the load itself is measured
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * 4096
+
+before = rss()
+started = time.perf_counter()
+{load}
+print(json.dumps({{'seconds': time.perf_counter() - started, 'rss_bytes': rss() - before}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not is_current(ARTIFACT, MODEL):
+        subprocess.run([sys.executable, str(ROOT / 'model_artifact.py'), 'build'], check=True)
+
+    print(f"{'format':>9} {'load ms':>10} {'rss MiB':>9}")
+    for name, load in LOADERS.items():
+        code = PROBE.format(root=ROOT, load=load)
+        runs = [json.loads(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                          check=True).stdout.strip().splitlines()[-1])
+                for _ in range(args.repeat)]
+        seconds = min(r['seconds'] for r in runs)
+        rss = min(r['rss_bytes'] for r in runs)
+        print(f"{name:>9} {seconds * 1000:>10.1f} {rss / 2 ** 20:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
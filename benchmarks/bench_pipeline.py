@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: regenerating the output/ data artifacts with pipeline.py
+
+Builds raw datasets at multiples of the real one (every sales file replicated
+with fresh voucher numbers and jittered values; items, accounts and slabs
+unchanged, so every row still joins) plus a replicated
+predicted_potential_sales.csv, then for each scale runs, each in a fresh
+interpreter:
+
+  whole       every file read in one chunk, in the pipeline's own process
+  chunked     --chunk-rows chunks, in the pipeline's own process
+  parallel    --chunk-rows chunks, in --jobs worker processes
+  warm        nothing changed since the last run (all stages skipped)
+
+and reports wall time and peak resident memory (of the largest process, the
+parent or a worker). Outputs of the cold cases must be byte-identical.
+
+Datasets are generated once per scale and seed under .cache/bench/.
+
+Usage: python benchmarks/bench_pipeline.py [--scales 1 10 100] [--jobs N] [--chunk-rows 20000]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_suite import BENCH_DIR, _replicate  # noqa: E402
+from pipeline import RAW_DIR, STAGES, sales_sources, stage_files  # noqa: E402
+
+SOURCE_OUTPUT = ROOT / "output"
+
+PROBE = """
+import json, re, resource, sys, time
+sys.path.insert(0, r'{root}')
+from pathlib import Path
+import pipeline
+started = time.perf_counter()
+status = pipeline.run(raw_dir=Path(r'{raw}'), output_dir=Path(r'{out}'), jobs={jobs}, chunk_rows={chunk_rows},
+                      force={force})
+seconds = time.perf_counter() - started
+# VmHWM starts over at exec (ru_maxrss of this process would include the benchmark's own)
+own = int(re.search(r'VmHWM:\s+(\d+)', open('/proc/self/status').read()).group(1))
+peak = max(own, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+print(json.dumps({{'seconds': seconds, 'rss_kib': peak, 'status': status}}))
+"""
+
+
+def synthesize(scale: int, seed: int) -> Path:
+    """Directory with raw/ sales files and output/predicted_potential_sales.csv at scale x (reused when present)"""
+    target = BENCH_DIR / f"pipeline-{scale}x-seed{seed}"
+    if (target / "done").exists():
+        return target
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=BENCH_DIR))
+    raw = tmp / "raw"
+    raw.mkdir()
+
+    rows = 0
+    for _, path, _ in sales_sources(RAW_DIR):
+        sales = _replicate(pd.read_csv(path), scale, rng, ["voucher_no"], ["value"])
+        sales.to_csv(raw / path.name, index=False)
+        rows += len(sales)
+    for name in ("item_master.csv", "accounts.csv", "weight_slab.csv"):
+        shutil.copy(RAW_DIR / name, raw / name)
+
+    potential = pd.read_csv(SOURCE_OUTPUT / "predicted_potential_sales.csv")
+    potential = _replicate(potential, scale, rng, ["label_no", "huid", "item_name"], ["predicted_potential_sales"])
+    potential.to_csv(tmp / "predicted_potential_sales.csv", index=False)
+
+    (tmp / "done").write_text(json.dumps({"scale": scale, "seed": seed, "sales_rows": rows}))
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp, target)
+    print(f"  generated {scale}x data ({rows} sales rows) in {time.perf_counter() - started:.1f}s")
+    return target
+
+
+def _run(data: Path, out: Path, jobs: int, chunk_rows: int, force: bool) -> dict:
+    code = PROBE.format(root=ROOT, raw=data / "raw", out=out, jobs=jobs, chunk_rows=chunk_rows, force=force)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _outputs(data: Path, out: Path) -> dict:
+    files = {}
+    for stage in STAGES:
+        for path in stage_files(stage, data / "raw", out)[1]:
+            files[path.name] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-rows', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'case':>9} {'seconds':>9} {'peak MiB':>9}  status")
+    for scale in args.scales:
+        data = synthesize(scale, args.seed)
+        cases = {
+            "whole": (1, 1 << 40, True),
+            "chunked": (1, args.chunk_rows, True),
+            "parallel": (args.jobs, args.chunk_rows, True),
+            "warm": (args.jobs, args.chunk_rows, False),
+        }
+        reference = None
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            shutil.copy(data / "predicted_potential_sales.csv", out / "predicted_potential_sales.csv")
+            for case, (jobs, chunk_rows, force) in cases.items():
+                result = _run(data, out, jobs, chunk_rows, force)
+                status = ", ".join(f"{stage} {s}" for stage, s in result["status"].items())
+                print(f"{scale:>5}x {case:>9} {result['seconds']:>9.2f} {result['rss_kib'] / 1024:>9.1f}  {status}")
+                outputs = _outputs(data, out)
+                if reference is None:
+                    reference = outputs
+                elif outputs != reference:
+                    differing = sorted(name for name in outputs if outputs[name] != reference.get(name))
+                    sys.exit(f"❌ {case} outputs differ from whole-file outputs: {', '.join(differing)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: data load, dashboard endpoints, item listings and predictions
+
+Builds synthetic datasets at multiples of the real data (sales rows, inventory
+catalogue and prediction rows replicated with fresh label numbers and jittered
+values; dates and stores unchanged, so each day just gets busier), then for
+each scale starts the API in a fresh interpreter pointed at that data and
+times, in-process through the ASGI app:
+
+  load        load_artifacts + install, cold (empty column cache) and warm
+  dashboard   every date-filtered endpoint over several ranges, computed
+              (response cache bypassed) and cached
+  items       /api/inventory/items filtered, sorted and deep-paged
+  predict     /api/predict/sales and the batch endpoint at 100 / 1000 items
+
+Results go to a JSON file (min / median / p95 / mean ms per case) together
+with the commit, Python and library versions; --compare reports cases whose
+median got slower than a previous run by more than --tolerance and exits 1.
+
+Datasets are generated once per scale and seed under .cache/bench/.
+
+Usage: python benchmarks/bench_suite.py [--scales 1 10 100] [--repeat 20]
+                                        [--out bench_results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE_SALES = ROOT / "Data" / "jewellery_multi_store_dataset" / "multi_store_denorm_sales.csv"
+SOURCE_OUTPUT = ROOT / "output"
+BENCH_DIR = ROOT / ".cache" / "bench"
+SOURCE_CACHE = Path(os.environ.get("JEWELAI_CACHE_DIR", ROOT / ".cache" / "columns"))
+
+sys.path.insert(0, str(ROOT))
+from model_artifact import artifact_path, is_current  # noqa: E402
+
+DASHBOARD_PATHS = {"kpis": "/api/kpis/summary", "categories": "/api/inventory/categories", "trends": "/api/market/trends"}
+DATE_RANGES = {
+    "all": {},
+    "month": {"start_date": "2025-10-01", "end_date": "2025-10-31"},
+    "from_sep": {"start_date": "2025-09-01"},
+    "week": {"start_date": "2025-09-05", "end_date": "2025-09-11"},
+}
+ITEM_QUERIES = {
+    "first_page": {},
+    "category_by_risk": {"category": "RING", "sort": "risk", "order": "desc", "risk_min": 20},
+    "sorted_deep_page": {"sort": "predicted_sales", "limit": 1000, "offset": 2000},
+    "projected": {"fields": "label_no,inventory_risk_score", "limit": 1000},
+}
+PREDICT_BODY = {"category": "RING", "net_weight": 8.5, "voucher_date": "2025-10-02", "purity": 22, "store_id": "STORE_2"}
+
+
+def _replicate(df: pd.DataFrame, scale: int, rng: np.random.Generator, label_columns, value_columns) -> pd.DataFrame:
+    """scale copies of df; copies after the first get new labels and values within +-20%"""
+    copies = [df]
+    for k in range(1, scale):
+        copy = df.copy()
+        for column in label_columns:
+            if column in copy.columns:
+                copy[column] = copy[column].where(copy[column].isna(), copy[column].astype(str) + f"-S{k}")
+        for column in value_columns:
+            if column in copy.columns:
+                copy[column] = (copy[column] * rng.uniform(0.8, 1.2, len(copy))).round(2)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def synthesize(scale: int, seed: int) -> Path:
+    """Directory with sales CSV and output/ artifacts at scale x the real data (reused when present)"""
+    target = BENCH_DIR / f"{scale}x-seed{seed}"
+    if (target / "done").exists():
+        return target
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=BENCH_DIR))
+    output = tmp / "output"
+    output.mkdir()
+
+    sales = pd.read_csv(SOURCE_SALES)
+    sales = _replicate(sales, scale, rng, ["label_no", "voucher_no", "item_label_no"], ["value"])
+    sales.sort_values("voucher_date", kind="mergesort").to_csv(tmp / "multi_store_denorm_sales.csv", index=False)
+
+    turnover = pd.read_csv(SOURCE_OUTPUT / "inventory_turnover_predictions.csv")
+    turnover = _replicate(turnover, scale, rng, ["label_no", "huid", "item_name"], ["predicted_potential_sales"])
+    turnover.to_csv(output / "inventory_turnover_predictions.csv", index=False)
+
+    predictions = pd.read_csv(SOURCE_OUTPUT / "ensemble_predictions.csv")
+    _replicate(predictions, scale, rng, [], []).to_csv(output / "ensemble_predictions.csv", index=False)
+
+    shutil.copy(SOURCE_OUTPUT / "ensemble_metrics.json", output / "ensemble_metrics.json")
+    # The model does not depend on the data volume; share it rather than copy it
+    if (SOURCE_OUTPUT / "ensemble_model.pkl").exists():
+        (output / "ensemble_model.pkl").symlink_to((SOURCE_OUTPUT / "ensemble_model.pkl").resolve())
+
+    (tmp / "done").write_text(json.dumps({"scale": scale, "seed": seed, "sales_rows": len(sales)}))
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp, target)
+    print(f"  generated {scale}x data ({len(sales)} sales rows) in {time.perf_counter() - started:.1f}s")
+    return target
+
+
+def _summary(samples) -> dict:
+    ms = np.asarray(samples) * 1000
+    return {
+        "min_ms": round(float(ms.min()), 3),
+        "median_ms": round(float(np.median(ms)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "n": len(ms),
+    }
+
+
+def run_worker(repeat: int) -> dict:
+    """Runs inside the benchmark subprocess, with the JEWELAI_* paths already pointing at one dataset"""
+    import warnings
+    warnings.filterwarnings("ignore")
+    from contextlib import redirect_stdout
+    from io import StringIO
+
+    with redirect_stdout(StringIO()):
+        import main
+        from fastapi.testclient import TestClient
+
+        results = {"sales_rows": 0, "load": {}, "cases": {}}
+        for label in ("cold", "warm"):
+            started = time.perf_counter()
+            main.install_artifacts(main.load_artifacts())
+            results["load"][f"{label}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        results["sales_rows"] = len(main.sales_df) if main.sales_df is not None else 0
+        results["inventory_items"] = len(main.turnover_df)
+
+        client = TestClient(main.app)
+        client.__enter__()
+
+    def measure(name, method, path, bust=False, **kwargs):
+        params = dict(kwargs.pop("params", {}))
+        samples = []
+        for i in range(repeat + 1):
+            if bust:
+                params["_bench"] = f"{name}-{i}"
+            started = time.perf_counter()
+            response = client.request(method, path, params=params, **kwargs)
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                results["cases"][name] = {"error": f"HTTP {response.status_code}: {response.text[:200]}"}
+                return
+            if i:  # the first call warms up
+                samples.append(elapsed)
+        results["cases"][name] = _summary(samples)
+
+    for short, path in DASHBOARD_PATHS.items():
+        for range_name, params in DATE_RANGES.items():
+            measure(f"{short}[{range_name}]", "GET", path, bust=True, params=params)
+            measure(f"{short}[{range_name}]:cached", "GET", path, params=params)
+    for name, params in ITEM_QUERIES.items():
+        measure(f"items[{name}]", "GET", "/api/inventory/items", params=params)
+    measure("predict", "POST", "/api/predict/sales", json=PREDICT_BODY)
+    for size in (100, 1000):
+        items = [dict(PREDICT_BODY, net_weight=1 + (i % 80), purity=(18, 22, 24)[i % 3]) for i in range(size)]
+        measure(f"predict_batch[{size}]", "POST", "/api/predict/sales/batch", json={"items": items})
+
+    with redirect_stdout(StringIO()):
+        client.__exit__(None, None, None)
+    return results
+
+
+def run_scale(data_dir: Path, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="jewelai-bench-cache-") as cache_dir:
+        # Seed the fresh cache with the exported model artifact (small), so every run times the same model load
+        model = data_dir / "output" / "ensemble_model.pkl"
+        exported = artifact_path(SOURCE_OUTPUT / "ensemble_model.pkl", SOURCE_CACHE)
+        if model.exists() and is_current(exported, model):
+            shutil.copytree(exported, artifact_path(model, Path(cache_dir)))
+        env = dict(
+            os.environ,
+            JEWELAI_DATA_DIR=str(data_dir / "output"),
+            JEWELAI_SALES_PATH=str(data_dir / "multi_store_denorm_sales.csv"),
+            JEWELAI_CACHE_DIR=cache_dir,
+            JEWELAI_MODEL_LOAD="eager",
+            JEWELAI_RELOAD_INTERVAL="0",
+            JEWELAI_INGEST_INTERVAL="0",
+        )
+        completed = subprocess.run(
+            [sys.executable, __file__, "--worker", "--repeat", str(repeat)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    versions = {}
+    for module in ("numpy", "pandas", "sklearn", "xgboost", "fastapi"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> int:
+    """Print median changes against a baseline run; returns the number of regressions"""
+    regressions = 0
+    print(f"\n{'case':<40} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    for scale, result in current["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if base is None:
+            continue
+        pairs = [(f"load.{k}", {"median_ms": v}, {"median_ms": base["load"].get(k)}) for k, v in result["load"].items()]
+        pairs += [(name, case, base["cases"].get(name, {})) for name, case in result["cases"].items()]
+        for name, case, old in pairs:
+            now, before = case.get("median_ms"), old.get("median_ms")
+            if now is None or not before:
+                continue
+            change = now / before - 1
+            # Sub-millisecond differences are timer noise, whatever the ratio
+            slower = change > tolerance and now - before > 0.5
+            regressions += slower
+            flag = "  REGRESSION" if slower else ""
+            print(f"{scale + ' ' + name:<40} {before:>10.3f} {now:>10.3f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed median slowdown (0.2 = 20%%)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.repeat)))
+        return
+
+    results = {"environment": environment(), "repeat": args.repeat, "seed": args.seed, "scales": {}}
+    for scale in args.scales:
+        print(f"{scale}x:")
+        data_dir = synthesize(scale, args.seed)
+        result = run_scale(data_dir, args.repeat)
+        results["scales"][f"{scale}x"] = result
+        print(f"  {result['sales_rows']} sales rows, load cold {result['load']['cold_ms']} ms, "
+              f"warm {result['load']['warm_ms']} ms")
+        for name, case in result["cases"].items():
+            detail = case["error"] if "error" in case else f"median {case['median_ms']:.3f} ms  p95 {case['p95_ms']:.3f} ms"
+            print(f"    {name:<34} {detail}")
+
+    args.out.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {args.out}")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{regressions} case(s) slower than {args.compare} by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
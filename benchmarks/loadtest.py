@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent dashboard, prediction and /health traffic against the API
+
+Runs against a live server (--url) or in-process through the ASGI app (default).
+Dashboard requests use random date ranges; --bust adds a unique parameter so
+every dashboard request misses the response cache and hits the compute pool.
+Reports p50/p95/p99 latency and status counts per traffic class, so /health
+latency under load shows whether the event loop stays responsive.
+
+Usage: python benchmarks/loadtest.py [--url http://localhost:8000] [--duration 10]
+                                     [--dashboard 32] [--predict 8] [--health 2] [--bust]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DASHBOARD_PATHS = ["/api/kpis/summary", "/api/inventory/categories", "/api/market/trends"]
+PREDICT_CATEGORIES = ["RING", "GOLD CHAINS", "BANGLE", "EARRINGS", "PENDANT"]
+FIRST_DAY = date(2025, 8, 1)
+SPAN_DAYS = 120
+
+
+def random_range(rng: random.Random) -> dict:
+    start = FIRST_DAY + timedelta(days=rng.randrange(SPAN_DAYS))
+    end = start + timedelta(days=rng.randrange(1, 60))
+    return {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+
+async def dashboard_user(client, rng, deadline, results, bust):
+    n = 0
+    while time.perf_counter() < deadline:
+        params = random_range(rng)
+        if bust:
+            n += 1
+            params["_bust"] = f"{id(rng)}-{n}"
+        await timed(client, "dashboard", "GET", rng.choice(DASHBOARD_PATHS), results, params=params)
+
+
+async def predict_user(client, rng, deadline, results):
+    while time.perf_counter() < deadline:
+        body = {
+            "category": rng.choice(PREDICT_CATEGORIES),
+            "net_weight": round(rng.uniform(1, 80), 2),
+            "voucher_date": (FIRST_DAY + timedelta(days=rng.randrange(SPAN_DAYS))).isoformat(),
+            "purity": rng.choice([18, 22, 24]),
+        }
+        await timed(client, "predict", "POST", "/api/predict/sales", results, json=body)
+
+
+async def health_probe(client, deadline, results):
+    while time.perf_counter() < deadline:
+        await timed(client, "health", "GET", "/health", results)
+        await asyncio.sleep(0.05)
+
+
+async def timed(client, kind, method, path, results, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    results[kind].append((time.perf_counter() - started, status))
+    # In-process requests that never block (e.g. 503s) would otherwise starve the other clients
+    await asyncio.sleep(0)
+
+
+def report(results, duration):
+    print(f"{'class':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    for kind, samples in sorted(results.items()):
+        latencies = np.array([s[0] for s in samples]) * 1000
+        statuses = Counter(s[1] for s in samples)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+        print(f"{kind:<10} {len(samples):>9} {len(samples) / duration:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}  "
+              + ", ".join(f"{k}: {v}" for k, v in sorted(statuses.items(), key=str)))
+
+
+async def run(args):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        import main
+        await main.load_data()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=60)
+
+    results = defaultdict(list)
+    rng = random.Random(args.seed)
+    deadline = time.perf_counter() + args.duration
+    async with client:
+        tasks = [dashboard_user(client, random.Random(rng.random()), deadline, results, args.bust)
+                 for _ in range(args.dashboard)]
+        tasks += [predict_user(client, random.Random(rng.random()), deadline, results) for _ in range(args.predict)]
+        tasks += [health_probe(client, deadline, results) for _ in range(args.health)]
+        await asyncio.gather(*tasks)
+    report(results, args.duration)
+
+    if not args.url:
+        import main
+        print(f"compute pool: {main.compute_pool.stats()}")
+        await main.stop_reloader()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running API (default: in-process)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--dashboard", type=int, default=32, help="Concurrent dashboard clients")
+    parser.add_argument("--predict", type=int, default=8, help="Concurrent prediction clients")
+    parser.add_argument("--health", type=int, default=2, help="Concurrent /health probes")
+    parser.add_argument("--bust", action="store_true", help="Bypass the response cache for dashboard requests")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# column_cache.py
+"""Typed columnar cache for the CSV inputs loaded at API startup
+
+Each cached CSV becomes a directory (named after the CSV's stem and a hash of
+its resolved path, so same-named files in different directories never share
+one) holding one .npy file per column plus a meta.json with the column kinds and the fingerprint of the source file. String
+columns are dictionary-encoded (integer codes + unique values) and come back as
+pandas categoricals, dates are stored as datetime64[ns], and nothing has to be
+re-parsed while the source CSV is unchanged.
+
+With mmap=True the column files are memory-mapped read-only instead of read
+into private memory, so every worker process attached to the same cache shares
+one copy of the numeric, date and category-code columns through the page cache.
+The first process to find a stale cache rebuilds it under a file lock while the
+others wait and then attach to the result.
+
+Usage: python column_cache.py build    # (re)build caches for the API inputs
+"""
+import hashlib
+import json
+import mmap
+import os
+from contextlib import contextmanager
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process builds only
+    fcntl = None
+
+# Bump when the on-disk layout changes so older caches are rebuilt
+CACHE_FORMAT_VERSION = 3
+
+# String columns with more distinct values than this share of rows stay object dtype
+CATEGORICAL_MAX_RATIO = 0.5
+
+
+def fingerprint(
+    path: Path,
+    parse_dates: Iterable[str] = (),
+    schema: Optional[Dict[str, str]] = None,
+    sort_by: Optional[str] = None,
+) -> Dict:
+    """Identity of a source file and the options it was parsed with"""
+    stat = path.stat()
+    return {
+        'format': CACHE_FORMAT_VERSION,
+        'source': str(path.resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'parse_dates': sorted(parse_dates),
+        'schema': schema,
+        'sort_by': sort_by,
+    }
+
+
+def _codes_dtype(n_categories: int):
+    """Smallest code dtype pandas uses for this many categories, so codes can be shared as-is"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+@contextmanager
+def _build_lock(cache_dir: Path):
+    """Exclusive cross-process lock held while a cache is (re)built"""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open(cache_dir / ".build.lock", 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_csv_projected(csv_path: Path, schema: Dict[str, str]) -> pd.DataFrame:
+    """Read only the schema's columns (those present in the file) with their declared dtypes"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    usecols = [c for c in header if c in schema]
+    dtype = {c: schema[c] for c in usecols if not schema[c].startswith('datetime')}
+    df = pd.read_csv(csv_path, usecols=usecols, dtype=dtype)
+    for column in usecols:
+        if schema[column].startswith('datetime'):
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+
+def cache_path(csv_path: Path, cache_dir: Path) -> Path:
+    digest = hashlib.sha256(str(csv_path.resolve()).encode()).hexdigest()[:16]
+    return cache_dir / f"{csv_path.stem}-{digest}.cols"
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    return (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) and \
+        pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty')
+
+
+def write_cache(df: pd.DataFrame, target: Path, meta: Dict) -> None:
+    """Write df as a column directory, replacing target atomically"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            if isinstance(series.dtype, pd.CategoricalDtype) or _is_string_column(series):
+                codes, uniques = pd.factorize(series, sort=True)
+                np.save(tmp / f"{i}.codes.npy", codes.astype(_codes_dtype(len(uniques))))
+                np.save(tmp / f"{i}.values.npy", np.asarray(uniques, dtype=str))
+                low_cardinality = len(uniques) <= CATEGORICAL_MAX_RATIO * max(len(series), 1)
+                kind = 'category' if isinstance(series.dtype, pd.CategoricalDtype) or low_cardinality else 'string'
+            elif isinstance(series.array, pd.arrays.IntegerArray):
+                # Nullable integers: the values and their missing-value mask, both mappable
+                np.save(tmp / f"{i}.npy", series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+                np.save(tmp / f"{i}.mask.npy", series.isna().to_numpy())
+                kind = 'nullable'
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                np.save(tmp / f"{i}.npy", series.to_numpy(dtype='datetime64[ns]'))
+                kind = 'datetime'
+            elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                np.save(tmp / f"{i}.npy", series.to_numpy())
+                kind = 'numeric'
+            else:
+                # Mixed-type object columns keep their Python values
+                np.save(tmp / f"{i}.npy", series.to_numpy(dtype=object), allow_pickle=True)
+                kind = 'object'
+            columns.append({'name': str(name), 'kind': kind})
+
+        meta = dict(meta, rows=len(df), columns=columns)
+        with open(tmp / "meta.json", 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _is_mapped(array) -> bool:
+    """Whether an array's memory comes from a memory-mapped file"""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def mapped_bytes(df: pd.DataFrame) -> int:
+    """Bytes of df's columns that live in shared memory-mapped cache files"""
+    total = 0
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            array = series.array.codes
+        elif isinstance(series.array, pd.arrays.IntegerArray):
+            array = series.array._data  # to_numpy() would copy the values out of the mapping
+        else:
+            array = series.to_numpy()
+        if _is_mapped(array):
+            total += array.nbytes
+    return total
+
+
+def read_meta(target: Path) -> Optional[Dict]:
+    try:
+        with open(target / "meta.json", 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_cache(target: Path, meta: Dict, mmap: bool = False) -> pd.DataFrame:
+    """Rebuild the DataFrame stored in a column directory, without copying the loaded arrays"""
+    mmap_mode = 'r' if mmap else None
+    data = {}
+    for i, column in enumerate(meta['columns']):
+        kind = column['kind']
+        if kind in ('category', 'string'):
+            codes = np.load(target / f"{i}.codes.npy", mmap_mode=mmap_mode)
+            values = np.load(target / f"{i}.values.npy")
+            categorical = pd.Categorical.from_codes(codes, categories=pd.Index(values.astype(object)))
+            data[column['name']] = categorical if kind == 'category' else np.asarray(categorical, dtype=object)
+        elif kind == 'object':
+            data[column['name']] = np.load(target / f"{i}.npy", allow_pickle=True)
+        elif kind == 'nullable':
+            data[column['name']] = pd.arrays.IntegerArray(np.load(target / f"{i}.npy", mmap_mode=mmap_mode),
+                                                          np.load(target / f"{i}.mask.npy", mmap_mode=mmap_mode))
+        else:
+            data[column['name']] = np.load(target / f"{i}.npy", mmap_mode=mmap_mode)
+    # copy=False keeps each column backed by its (possibly memory-mapped) array
+    return pd.DataFrame(data, copy=False)
+
+
+def _parse_csv(csv_path: Path, parse_dates: List[str], schema: Optional[Dict[str, str]], sort_by: Optional[str]) -> pd.DataFrame:
+    df = read_csv_projected(csv_path, schema) if schema else pd.read_csv(csv_path)
+    for column in parse_dates:
+        df[column] = pd.to_datetime(df[column])
+    if sort_by is not None:
+        df = df.sort_values(sort_by, kind='mergesort').reset_index(drop=True)
+    return df
+
+
+def read_csv_cached(
+    csv_path: Path,
+    cache_dir: Path,
+    parse_dates: Iterable[str] = (),
+    schema: Optional[Dict[str, str]] = None,
+    sort_by: Optional[str] = None,
+    mmap: bool = False,
+) -> pd.DataFrame:
+    """Load csv_path through its columnar cache, rebuilding the cache when the CSV changed.
+
+    With a schema ({column: dtype}), only those columns are read and cached.
+    With sort_by, rows are cached in stable order of that column.
+    With mmap, columns are memory-mapped read-only and shared between processes.
+    """
+    parse_dates = list(parse_dates)
+    target = cache_path(csv_path, cache_dir)
+    expected = fingerprint(csv_path, parse_dates, schema, sort_by)
+
+    def cached() -> Optional[pd.DataFrame]:
+        meta = read_meta(target)
+        if meta is None or any(meta.get(k) != v for k, v in expected.items()):
+            return None
+        try:
+            return read_cache(target, meta, mmap)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠ Column cache for {csv_path.name} unreadable, rebuilding: {e}")
+            return None
+
+    df = cached()
+    if df is not None:
+        return df
+
+    try:
+        with _build_lock(cache_dir):
+            # Another process may have rebuilt the cache while we waited for the lock
+            df = cached()
+            if df is not None:
+                return df
+
+            df = _parse_csv(csv_path, parse_dates, schema, sort_by)
+            write_cache(df, target, expected)
+            # Serve the same typed frame a cache hit would produce
+            return read_cache(target, read_meta(target), mmap)
+    except OSError as e:
+        print(f"⚠ Could not write column cache for {csv_path.name}: {e}")
+        return df if df is not None else _parse_csv(csv_path, parse_dates, schema, sort_by)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] != 'build':
+        print(__doc__)
+        sys.exit(1)
+
+    import main
+    for source, dates, schema, sort_by in main.CACHED_SOURCES:
+        read_csv_cached(source, main.CACHE_DIR, dates, schema, sort_by)
+        print(f"✓ {source.name} -> {cache_path(source, main.CACHE_DIR)}")
@@ -0,0 +1,154 @@
+# compute_pool.py
+"""Bounded executor for blocking pandas/model work, with per-endpoint admission control"""
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from instrumentation import phase, run_traced
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse "name=concurrency:queue,..." into {name: (concurrency, queue)}"""
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        name, _, value = part.partition('=')
+        concurrency, _, queue = value.partition(':')
+        limits[name.strip()] = (int(concurrency), int(queue or 0))
+    return limits
+
+
+class EndpointLimiter:
+    """At most `concurrency` running and `queue` waiting calls for one endpoint"""
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: Optional[float]):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._loop = None
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.shed = 0
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue": self.queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "shed": self.shed,
+        }
+
+
+class ComputePool:
+    """Runs blocking work on a dedicated thread pool so the event loop stays responsive.
+
+    Every call names an endpoint. Each endpoint may run `concurrency` calls at once
+    and queue `queue` more; beyond that, or after waiting `queue_timeout` seconds,
+    the call is shed with a 503 and a Retry-After hint instead of piling up.
+    Threads rather than processes: the handlers read the loaded frames and model in
+    place, and the heavy numpy/pandas/sklearn kernels release the GIL.
+    The executor is started by the first call and dropped by shutdown(), so the
+    pool serves again after a restart of the app in the same process.
+    """
+
+    def __init__(self, max_workers: int, limits: Dict[str, Tuple[int, int]],
+                 default_limit: Tuple[int, int], queue_timeout: Optional[float] = None):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.default_limit = default_limit
+        self.queue_timeout = queue_timeout
+        self._limits = limits
+        self._limiters: Dict[str, EndpointLimiter] = {}
+
+    @classmethod
+    def from_env(cls) -> 'ComputePool':
+        max_workers = int(os.environ.get("JEWELAI_COMPUTE_THREADS", str(min(8, (os.cpu_count() or 1) + 2))))
+        limits = {
+            # Dashboard aggregations are cheap per call but arrive in bursts
+            "kpis": (4, 64),
+            "categories": (4, 64),
+            "trends": (4, 64),
+            "inventory_items": (2, 32),
+            "prediction_comparison": (2, 32),
+            # Export row selection; the streaming itself runs in the server's iterator threads
+            "export": (2, 8),
+            "ingest": (1, 16),
+            # Model inference is the most CPU-hungry; keep threads free for the dashboard
+            "predict": (2, 64),
+            "predict_batch": (1, 4),
+        }
+        limits.update(parse_limits(os.environ.get("JEWELAI_COMPUTE_LIMITS", "")))
+        timeout = os.environ.get("JEWELAI_COMPUTE_QUEUE_TIMEOUT")
+        return cls(max_workers, limits, default_limit=(2, 16), queue_timeout=float(timeout) if timeout else None)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="compute")
+            return self._executor
+
+    def limiter(self, endpoint: str) -> EndpointLimiter:
+        limiter = self._limiters.get(endpoint)
+        if limiter is None:
+            concurrency, queue = self._limits.get(endpoint, self.default_limit)
+            limiter = self._limiters[endpoint] = EndpointLimiter(endpoint, concurrency, queue, self.queue_timeout)
+        loop = asyncio.get_running_loop()
+        if limiter._loop is not loop and limiter.running == 0 and limiter.waiting == 0:
+            # asyncio primitives belong to one event loop (matters for test clients that start new ones)
+            limiter._semaphore = asyncio.Semaphore(limiter.concurrency)
+            limiter._loop = loop
+        return limiter
+
+    async def run(self, endpoint: str, fn: Callable, *args):
+        """Await fn(*args) on the pool, subject to the endpoint's concurrency and queue limits"""
+        limiter = self.limiter(endpoint)
+        if limiter.running >= limiter.concurrency and limiter.waiting >= limiter.queue:
+            limiter.shed += 1
+            raise HTTPException(status_code=503, detail=f"Server busy ({endpoint})", headers={"Retry-After": "1"})
+
+        limiter.waiting += 1
+        try:
+            with phase("queue"):
+                if limiter.queue_timeout is None:
+                    await limiter._semaphore.acquire()
+                else:
+                    await asyncio.wait_for(limiter._semaphore.acquire(), limiter.queue_timeout)
+        except asyncio.TimeoutError:
+            limiter.shed += 1
+            raise HTTPException(status_code=503, detail=f"Server busy ({endpoint})", headers={"Retry-After": "1"})
+        finally:
+            limiter.waiting -= 1
+
+        limiter.running += 1
+        try:
+            # The caller's context travels along, so fn can report phases for its request
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, run_traced, fn, *args)
+        finally:
+            limiter.running -= 1
+            limiter.completed += 1
+            limiter._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_workers": self.max_workers,
+            "endpoints": {name: limiter.stats() for name, limiter in sorted(self._limiters.items())},
+        }
+
+    def shutdown(self) -> None:
+        """Stop the executor's threads once their work is done; the next call starts a new executor"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,83 @@
+# conftest.py
+"""Shared pytest fixtures and data: a small model package shaped like output/ensemble_model.pkl, synthetic sales rows"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction_features import PRODUCT_CATEGORY_ALIASES, STORE_IDS, build_feature_matrix
+
+# The feature columns of output/ensemble_model.pkl, in its order
+FEATURE_COLUMNS = [
+    'year', 'month', 'day', 'day_of_week', 'week_of_year', 'is_weekend', 'is_festival',
+    'net_weight', 'price_per_gram', 'market_share', 'category_avg_market', 'store_avg_sales', 'sales_momentum',
+    *[f'product_category_{name}' for name in PRODUCT_CATEGORY_ALIASES],
+    'weight_category_Light', 'weight_category_Medium', 'weight_category_Heavy', 'weight_category_Very_Heavy',
+    'weight_category_Ultra_Heavy',
+    'price_bracket_Budget', 'price_bracket_Mid', 'price_bracket_Premium', 'price_bracket_Luxury',
+    'price_bracket_Ultra',
+    *[f'store_id_{store}' for store in STORE_IDS],
+]
+
+
+def random_requests(n: int, seed: int = 0):
+    """Request fields (categories, weights, dates, purities, stores) spread over the feature space"""
+    rng = np.random.default_rng(seed)
+    categories = rng.choice(['RING', 'CHAIN', 'GOLD EARRING', 'necklace', 'BRACELET', 'ANKLET'], n).tolist()
+    weights = np.round(rng.gamma(2.0, 6.0, n), 3)
+    dates = (np.datetime64('2025-08-01') + rng.integers(0, 120, n).astype('timedelta64[D]')).astype(str).tolist()
+    purities = rng.choice([22.0, 18.0, 24.0], n)
+    stores = rng.choice(list(STORE_IDS) + ['STORE_9'], n).tolist()
+    return categories, weights, dates, purities, stores
+
+
+def sales_frame(rows: int = 400, seed: int = 0) -> pd.DataFrame:
+    """Voucher rows over 60 days, some without a store or category"""
+    rng = np.random.default_rng(seed)
+    stores = np.array(['MAIN_STORE', 'STORE_1', 'STORE_2', None], dtype=object)
+    categories = np.array(['RING', 'CHAIN', 'BANGLES', None], dtype=object)
+    return pd.DataFrame({
+        'voucher_date': pd.Timestamp('2025-08-01') + pd.to_timedelta(rng.integers(0, 60, rows), unit='D'),
+        'label_no': [f"L{i}" for i in rng.integers(0, 30, rows)],
+        'category': categories[rng.integers(0, len(categories), rows)],
+        'store': stores[rng.integers(0, len(stores), rows)],
+        'purity': rng.choice([18, 22, 24], rows),
+        'value': rng.uniform(1_000, 50_000, rows).round(2),
+    })
+
+
+@pytest.fixture(scope='session')
+def model_package():
+    """Scaler plus the five base model types of the ensemble, fitted on synthetic requests"""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBRegressor
+
+    categories, weights, dates, purities, stores = random_requests(600)
+    X = build_feature_matrix(categories, weights, dates, purities, stores, FEATURE_COLUMNS)
+    rng = np.random.default_rng(1)
+    y = X[:, FEATURE_COLUMNS.index('net_weight')] * X[:, FEATURE_COLUMNS.index('price_per_gram')] \
+        * rng.uniform(0.9, 1.1, len(X)) + 2_000 * X[:, FEATURE_COLUMNS.index('is_weekend')]
+
+    scaler = StandardScaler().fit(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    X_scaled = scaler.transform(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    base_models = {
+        'Linear Regression': LinearRegression(),
+        'Ridge': Ridge(alpha=1.0),
+        'Random Forest': RandomForestRegressor(n_estimators=8, max_depth=6, random_state=0),
+        'Gradient Boosting': GradientBoostingRegressor(n_estimators=12, max_depth=3, random_state=0),
+        'XGBoost': XGBRegressor(n_estimators=12, max_depth=4, learning_rate=0.3, random_state=0),
+    }
+    for model in base_models.values():
+        model.fit(X_scaled, y)
+    # The one-hot groups make the linear fit rank-deficient: take the minimum-norm solution, as
+    # recent scikit-learn does (1.3 returns coefficients around 1e17 that cancel only in its own predict)
+    linear = base_models['Linear Regression']
+    linear.coef_ = np.linalg.lstsq(X_scaled - X_scaled.mean(axis=0), y - y.mean(), rcond=None)[0]
+    linear.intercept_ = float(y.mean() - X_scaled.mean(axis=0) @ linear.coef_)
+    return {
+        'feature_columns': FEATURE_COLUMNS,
+        'scaler': scaler,
+        'base_models': base_models,
+        'weights': np.array([0.1, 0.1, 0.3, 0.25, 0.25]),
+    }
@@ -0,0 +1,116 @@
+# data_export.py
+"""Chunked CSV / NDJSON encoding of frame rows for the streaming export endpoints"""
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+EXPORT_FORMATS: Dict[str, str] = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Rows encoded per chunk; bounds the memory one export holds at a time
+EXPORT_CHUNK_ROWS = 10_000
+
+
+# Row positions into a frame: an array, or a range for a contiguous block
+Positions = Union[np.ndarray, range]
+
+
+def _rows(positions: Optional[Positions], start: int, stop: int):
+    """iloc row indexer for positions[start:stop] (all rows when positions is None)"""
+    if positions is None:
+        return slice(start, stop)
+    rows = positions[start:stop]
+    return slice(rows.start, rows.stop) if isinstance(rows, range) else rows
+
+
+def match_positions(df: pd.DataFrame, filters: Dict[str, Optional[str]],
+                    positions: Optional[Positions] = None) -> Optional[Positions]:
+    """Positions of rows equal to every given filter value, or None when no filter is set.
+
+    Values are compared case-insensitively. Categorical columns compare their
+    categories once instead of every row. With `positions`, only those rows are
+    compared (one column at a time) and the matching subset is returned.
+    """
+    rows = _rows(positions, 0, len(df) if positions is None else len(positions))
+    mask = None
+    for column, value in filters.items():
+        if not value:
+            continue
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories.astype(str).str.upper()
+            wanted = np.flatnonzero(categories == value.upper())
+            matches = np.isin(series.cat.codes.to_numpy()[rows], wanted)
+        else:
+            matches = (series.iloc[rows].astype(str).str.upper() == value.upper()).to_numpy()
+        mask = matches if mask is None else mask & matches
+    if mask is None:
+        return positions
+    matched = np.flatnonzero(mask)
+    if positions is None:
+        return matched
+    return matched + positions.start if isinstance(positions, range) else positions[matched]
+
+
+def _chunks(df: pd.DataFrame, positions: Optional[Positions], columns, chunk_rows: int,
+            extra: Optional[pd.DataFrame], date_column: str) -> Iterator[pd.DataFrame]:
+    # Rows and columns are selected together so only one chunk is ever copied
+    n = len(df) if positions is None else len(positions)
+    merged = 0
+    extra_dates = None
+    if extra is not None:
+        extra_dates = extra[date_column].to_numpy(dtype='datetime64[ns]')
+        extra = extra.reindex(columns=df.columns[columns])
+    for start in range(0, n, chunk_rows):
+        rows = _rows(positions, start, start + chunk_rows)
+        chunk = df.iloc[rows, columns]
+        if extra_dates is not None and merged < len(extra_dates):
+            # Extra rows dated before the chunk's last day; later chunks may still hold rows of that day
+            dates = df[date_column].iloc[rows].to_numpy(dtype='datetime64[ns]')
+            last = start + chunk_rows >= n
+            upto = len(extra_dates) if last else int(np.searchsorted(extra_dates, dates[-1], side='left'))
+            if upto > merged:
+                chunk = _merge_rows(chunk, dates, extra.iloc[merged:upto], extra_dates[merged:upto])
+                merged = upto
+        yield chunk
+    if extra_dates is not None and merged < len(extra_dates):
+        yield extra.iloc[merged:]
+
+
+def _merge_rows(chunk: pd.DataFrame, dates: np.ndarray, extra: pd.DataFrame, extra_dates: np.ndarray) -> pd.DataFrame:
+    """Both (date-ordered) frames in one date order, chunk rows first among equal dates"""
+    chunk = _widen_float32(chunk.astype({c: object for c in chunk.select_dtypes('category')}))
+    combined = pd.concat([chunk, extra], ignore_index=True)
+    return combined.iloc[np.argsort(np.concatenate([dates, extra_dates]), kind='stable')]
+
+
+def _widen_float32(chunk: pd.DataFrame) -> pd.DataFrame:
+    """float32 columns as the float64 of their shortest repr, so JSON shows 8.873 rather than 8.873000145"""
+    narrow = [c for c in chunk.columns if chunk[c].dtype == np.float32]
+    if not narrow:
+        return chunk
+    return chunk.assign(**{c: chunk[c].astype(str).astype(np.float64) for c in narrow})
+
+
+def iter_export(df: pd.DataFrame, fmt: str, positions: Optional[Positions] = None,
+                columns: Optional[List[str]] = None, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                extra: Optional[pd.DataFrame] = None, date_column: str = 'voucher_date') -> Iterator[bytes]:
+    """Encode the selected rows of df chunk by chunk (all rows when positions is None).
+
+    Each chunk is gathered from df only when it is encoded. `extra` rows (with
+    df's columns, e.g. ingested sales) are merged in by date_column, assuming
+    both the selected rows and extra are in date order.
+    """
+    columns = slice(None) if columns is None else [df.columns.get_loc(c) for c in columns]
+    chunks = _chunks(df, positions, columns, chunk_rows, extra, date_column)
+    if fmt == 'csv':
+        yield df.iloc[:0, columns].to_csv(index=False).encode('utf-8')
+        for chunk in chunks:
+            yield chunk.to_csv(index=False, header=False).encode('utf-8')
+    else:
+        for chunk in chunks:
+            if len(chunk):
+                yield _widen_float32(chunk).to_json(orient='records', lines=True, date_format='iso', date_unit='s').encode('utf-8')
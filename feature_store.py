@@ -0,0 +1,245 @@
+# feature_store.py
+"""Market features for sales predictions, precomputed from the sales data
+
+The model was trained on per-store and per-category market features. The
+feature store computes them as of every day of the sales data, so a
+prediction reads them by array index instead of assuming fixed values:
+
+- store_avg_sales: the store's mean voucher value up to and including the day
+- market_share: the store's share (%) of all stores' sales value up to the day
+- sales_momentum: the store's mean voucher value over the trailing `window` days
+- category_avg_market: the product category's mean voucher value, all stores, up to the day
+- price_per_gram: the store's mean gold_rate_used over the trailing `window` days
+
+Dates after the last day get the last day's values (the latest known market);
+dates before the first day, stores the model does not know and categories it
+does not encode fall back to market-wide values or DEFAULT_MARKET_FEATURES.
+Everything derives from daily (store, day) and (category, day) sums, so new
+vouchers are added in O(rows + stores x days), independent of the history's size.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from prediction_features import DEFAULT_MARKET_FEATURES, PRODUCT_CATEGORY_ALIASES, STORE_IDS
+
+MOMENTUM_DAYS = 7
+
+# Product categories (the model's one-hot columns) in table order
+PRODUCT_CATEGORIES = list(PRODUCT_CATEGORY_ALIASES)
+
+# Per-store features, in the order of the store table's last axis
+_STORE_FEATURES = ('store_avg_sales', 'market_share', 'sales_momentum', 'price_per_gram')
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, fallback) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), fallback)
+
+
+def _trailing(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """Sums over the trailing `window` days from cumulative sums along the last axis"""
+    out = cumulative.copy()
+    out[..., window:] -= cumulative[..., :-window]
+    return out
+
+
+def category_mapping(df: pd.DataFrame) -> Dict[str, str]:
+    """Product category of each item category, from the rows that carry both.
+
+    Only the main store's rows have product_category; the others are mapped
+    through it (e.g. PENDANT -> GOLD NECKLACE), then through the request aliases.
+    """
+    mapping = {alias: product for product, aliases in PRODUCT_CATEGORY_ALIASES.items() for alias in aliases}
+    if 'product_category' in df.columns:
+        pairs = df.loc[df['product_category'].notna() & df['category'].notna(), ['category', 'product_category']]
+        pairs = pairs.astype(str)
+        pairs = pairs[pairs['product_category'].isin(PRODUCT_CATEGORIES)]
+        if len(pairs):
+            counts = pairs.groupby(['category', 'product_category']).size()
+            for (category, product), _ in counts.sort_values(ascending=False).items():
+                mapping.setdefault(category.upper(), product)
+    return mapping
+
+
+class MarketFeatureStore:
+    """As-of market features per (store, day) and (product category, day).
+
+    Built from daily sums; immutable once built (with_rows returns a new store),
+    so readers never see a half-applied update.
+    """
+
+    def __init__(self, base_date: np.datetime64, stores: List[str], category_map: Dict[str, str],
+                 daily: Dict[str, np.ndarray], window: int = MOMENTUM_DAYS, version: int = 0):
+        self.base_date = base_date
+        self.stores = stores
+        self.category_map = category_map
+        self.daily = daily
+        self.window = window
+        self.version = version
+        self.n_days = daily['store_sum'].shape[1]
+        # Lookups resolve only the stores the model encodes, so a request's
+        # features depend on the same fields as its feature_key()
+        self._store_index = {name: i for i, name in enumerate(stores) if name in STORE_IDS}
+        self._category_index = {name: i for i, name in enumerate(PRODUCT_CATEGORIES)}
+        self._derive()
+
+    @classmethod
+    def from_sales(cls, df: pd.DataFrame, window: int = MOMENTUM_DAYS) -> 'MarketFeatureStore':
+        """Feature store over voucher rows (a SalesStore frame or typed_rows output)"""
+        dates = df['voucher_date'].dropna()
+        base_date = dates.min().to_datetime64().astype('datetime64[D]') if len(dates) else np.datetime64('1970-01-01')
+        n_days = int((dates.max().to_datetime64().astype('datetime64[D]') - base_date).astype(np.int64)) + 1 \
+            if len(dates) else 0
+        stores = sorted(str(s) for s in pd.unique(df['store'].dropna()))
+        daily = _empty_daily(len(stores), n_days)
+        category_map = category_mapping(df)
+        _add_rows(daily, df, base_date, {name: i for i, name in enumerate(stores)}, category_map)
+        return cls(base_date, stores, category_map, daily, window)
+
+    def with_rows(self, rows: pd.DataFrame) -> 'MarketFeatureStore':
+        """A new store with voucher rows (typed_rows output) added; this one is left untouched"""
+        rows = rows[rows['voucher_date'].notna() & rows['store'].notna()]
+        if not len(rows):
+            return self
+        stores = self.stores + sorted(set(str(s) for s in rows['store'].unique()) - set(self.stores))
+        days = (rows['voucher_date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+                - self.base_date).astype(np.int64)
+        before = max(-int(days.min()), 0)
+        after = max(int(days.max()) + 1 - self.n_days, 0)
+        daily = {
+            name: np.pad(values, ((0, len(stores) - values.shape[0]) if name.startswith('store') else (0, 0),
+                                  (before, after)))
+            for name, values in self.daily.items()
+        }
+        base_date = self.base_date - np.timedelta64(before, 'D')
+        _add_rows(daily, rows, base_date, {name: i for i, name in enumerate(stores)}, self.category_map)
+        return MarketFeatureStore(base_date, stores, self.category_map, daily, self.window, self.version + 1)
+
+    def _derive(self) -> None:
+        """Per-day feature tables; column 0 holds the values for dates before the first day"""
+        daily = self.daily
+        store_sum = np.cumsum(daily['store_sum'], axis=1)
+        store_count = np.cumsum(daily['store_count'], axis=1)
+        rate_sum = np.cumsum(daily['store_rate_sum'], axis=1)
+        rate_count = np.cumsum(daily['store_rate_count'], axis=1)
+        market_sum, market_count = store_sum.sum(axis=0), store_count.sum(axis=0)
+        market_rate_sum, market_rate_count = rate_sum.sum(axis=0), rate_count.sum(axis=0)
+
+        market_avg = _ratio(market_sum, market_count, DEFAULT_MARKET_FEATURES['store_avg_sales'])
+        recent_market = _ratio(_trailing(market_sum, self.window), _trailing(market_count, self.window), market_avg)
+        # The trailing window's rate, else the market-wide mean rate so far; NaN until one is seen
+        market_rate = _ratio(market_rate_sum, market_rate_count, np.nan)
+        market_rate = _ratio(_trailing(market_rate_sum, self.window), _trailing(market_rate_count, self.window),
+                             market_rate)
+
+        store_avg = _ratio(store_sum, store_count, market_avg)
+        stores = np.stack([
+            store_avg,
+            _ratio(100.0 * store_sum, market_sum, DEFAULT_MARKET_FEATURES['market_share']),
+            _ratio(_trailing(store_sum, self.window), _trailing(store_count, self.window), store_avg),
+            _ratio(_trailing(rate_sum, self.window), _trailing(rate_count, self.window), market_rate),
+        ], axis=-1)
+        # The last row answers stores without features of their own
+        market = np.stack([
+            market_avg, np.full(self.n_days, float(DEFAULT_MARKET_FEATURES['market_share'])), recent_market, market_rate,
+        ], axis=-1)
+        defaults = [DEFAULT_MARKET_FEATURES[name] if name in DEFAULT_MARKET_FEATURES else np.nan
+                    for name in _STORE_FEATURES]
+        table = np.concatenate([stores, market[None]], axis=0)
+        self.store_table = np.concatenate([np.broadcast_to(defaults, (len(table), 1, len(defaults))), table], axis=1)
+
+        category_avg = _ratio(np.cumsum(daily['category_sum'], axis=1), np.cumsum(daily['category_count'], axis=1),
+                              market_avg)
+        table = np.concatenate([category_avg, market_avg[None]], axis=0)
+        default = DEFAULT_MARKET_FEATURES['category_avg_market']
+        self.category_table = np.concatenate([np.full((len(table), 1), float(default)), table], axis=1)
+
+    def lookup(self, product_categories: Sequence[Optional[str]], store_ids: Sequence[str],
+               dates: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+        """Market features per request; price_per_gram is NaN where no gold rate is known"""
+        day = (dates.values.astype('datetime64[D]') - self.base_date).astype(np.int64) + 1
+        day = np.clip(day, 0, self.n_days)
+        n_stores = len(self.stores)
+        store = np.fromiter((self._store_index.get(s, n_stores) for s in store_ids), dtype=np.int64, count=len(day))
+        category = np.fromiter((self._category_index.get(c, len(PRODUCT_CATEGORIES)) for c in product_categories),
+                               dtype=np.int64, count=len(day))
+        values = self.store_table[store, day]
+        features = {name: values[:, i] for i, name in enumerate(_STORE_FEATURES)}
+        features['category_avg_market'] = self.category_table[category, day]
+        return features
+
+    def date_bounds(self) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        if not self.n_days:
+            return None
+        return pd.Timestamp(self.base_date), pd.Timestamp(self.base_date + np.timedelta64(self.n_days - 1, 'D'))
+
+    def memory_bytes(self) -> int:
+        arrays = list(self.daily.values()) + [self.store_table, self.category_table]
+        return int(sum(a.nbytes for a in arrays))
+
+    def stats(self) -> Dict:
+        bounds = self.date_bounds()
+        return {
+            'version': self.version,
+            'stores': len(self.stores),
+            'first_date': bounds[0].date().isoformat() if bounds else None,
+            'last_date': bounds[1].date().isoformat() if bounds else None,
+            'momentum_days': self.window,
+        }
+
+
+def _empty_daily(n_stores: int, n_days: int) -> Dict[str, np.ndarray]:
+    return {
+        'store_sum': np.zeros((n_stores, n_days)),
+        'store_count': np.zeros((n_stores, n_days)),
+        'store_rate_sum': np.zeros((n_stores, n_days)),
+        'store_rate_count': np.zeros((n_stores, n_days)),
+        'category_sum': np.zeros((len(PRODUCT_CATEGORIES), n_days)),
+        'category_count': np.zeros((len(PRODUCT_CATEGORIES), n_days)),
+    }
+
+
+def _codes(values: pd.Series, code) -> np.ndarray:
+    """code(value) per row, computed once per distinct value; -1 for missing values"""
+    positions, uniques = pd.factorize(values)
+    table = np.array([code(value) for value in uniques] + [-1], dtype=np.int64)
+    return table[positions]
+
+
+def _add_rows(daily: Dict[str, np.ndarray], df: pd.DataFrame, base_date: np.datetime64,
+              store_index: Dict[str, int], category_map: Dict[str, str]) -> None:
+    """Add voucher rows to the daily sums in place (rows without a store or date are left out)"""
+    n_days = daily['store_sum'].shape[1]
+    store = _codes(df['store'], lambda name: store_index.get(str(name), -1))
+    dates = df['voucher_date'].to_numpy(dtype='datetime64[ns]')
+    keep = (store >= 0) & ~np.isnat(dates)
+    day = (dates[keep].astype('datetime64[D]') - base_date).astype(np.int64)
+    store = store[keep]
+    values = np.nan_to_num(df['value'].to_numpy(dtype=np.float64)[keep])
+    rates = df['gold_rate_used'].to_numpy(dtype=np.float64)[keep] \
+        if 'gold_rate_used' in df.columns else np.full(len(day), np.nan)
+    has_rate = ~np.isnan(rates)
+
+    shape = daily['store_sum'].shape
+    cells = store * n_days + day
+    size = shape[0] * n_days
+    daily['store_sum'] += np.bincount(cells, weights=values, minlength=size).reshape(shape)
+    daily['store_count'] += np.bincount(cells, minlength=size).reshape(shape)
+    daily['store_rate_sum'] += np.bincount(cells[has_rate], weights=rates[has_rate], minlength=size).reshape(shape)
+    daily['store_rate_count'] += np.bincount(cells[has_rate], minlength=size).reshape(shape)
+
+    # The product category the row was recorded with, else the one its item category maps to
+    position = {name: i for i, name in enumerate(PRODUCT_CATEGORIES)}
+    category = _codes(df['category'], lambda name: position.get(category_map.get(str(name).upper()), -1))
+    if 'product_category' in df.columns:
+        recorded = _codes(df['product_category'], lambda name: position.get(str(name), -1))
+        category = np.where(recorded >= 0, recorded, category)
+    category = category[keep]
+    known = category >= 0
+    shape = daily['category_sum'].shape
+    cells = category[known] * n_days + day[known]
+    size = shape[0] * n_days
+    daily['category_sum'] += np.bincount(cells, weights=values[known], minlength=size).reshape(shape)
+    daily['category_count'] += np.bincount(cells, minlength=size).reshape(shape)
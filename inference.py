@@ -0,0 +1,296 @@
+# inference.py
+"""Fused scoring of the five-model ensemble without per-model predict() calls
+
+The scaler is folded into the linear models (Linear Regression, Ridge), whose
+weighted coefficients collapse into one dot product on the raw features. The
+trees of the Random Forest, Gradient Boosting and XGBoost models are flattened
+into one set of node arrays with the ensemble weights folded into the leaf
+values, and every tree is walked for every row at once, one depth level per
+numpy step. The ensemble prediction is the dot product plus the sum of the
+reached leaves plus one constant.
+
+Tree decisions are made exactly as the libraries make them (features compared
+in float32 after scaling), so the same leaves are reached and predictions match
+predict_matrix up to summation rounding (XGBoost itself accumulates in float32).
+Models of any other type are still scored with their own predict().
+
+The flat walk wins on the small batches that dominate latency (a single kiosk
+request costs well under a millisecond instead of five predict() calls); for
+batches above FUSED_MAX_ROWS the tree models' own compiled predict() is faster
+and is used instead, while the linear part stays fused.
+
+An engine can be exported as plain arrays plus a few constants (export_state)
+and rebuilt from them without the model objects (from_state); see
+model_artifact.py. Such an engine walks its trees for every batch size.
+"""
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Largest batch whose trees are walked here rather than by the models' own predict()
+FUSED_MAX_ROWS = 128
+# Rows walked at once when no model objects are available for large batches
+FUSED_CHUNK_ROWS = 1024
+
+# Node arrays of a frozen _Trees, as exported by FusedEnsemble.export_state
+TREE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'default_left', 'roots', 'is_leaf')
+
+
+class _Trees:
+    """Flat node arrays for a collection of trees; leaves point to themselves"""
+
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right = [], [], [], []
+        self.value, self.default_left, self.roots = [], [], []
+        self.size = 0
+        self.max_depth = 0
+
+    def add(self, feature, threshold, left, right, value, default_left, depth: int) -> None:
+        """Append one tree given per-node arrays with local child indices (-1 at leaves)"""
+        nodes = np.arange(len(feature))
+        leaf = left < 0
+        self.feature.append(np.where(leaf, 0, feature).astype(np.int32))
+        self.threshold.append(np.asarray(threshold, dtype=np.float64))
+        self.left.append((np.where(leaf, nodes, left) + self.size).astype(np.int32))
+        self.right.append((np.where(leaf, nodes, right) + self.size).astype(np.int32))
+        self.value.append(np.where(leaf, value, 0.0).astype(np.float64))
+        self.default_left.append(np.asarray(default_left, dtype=bool))
+        self.roots.append(self.size)
+        self.size += len(feature)
+        self.max_depth = max(self.max_depth, depth)
+
+    def freeze(self) -> None:
+        for name in ('feature', 'threshold', 'left', 'right', 'value', 'default_left'):
+            parts = getattr(self, name)
+            setattr(self, name, np.concatenate(parts) if parts else np.empty(0))
+        self.roots = np.asarray(self.roots, dtype=np.int32)
+        self.is_leaf = self.left == np.arange(self.size)
+        self._interleave_children()
+
+    def _interleave_children(self) -> None:
+        # children[2 * node + went_right]: one gather per level instead of two
+        self.children = np.stack([self.left, self.right], axis=1).ravel()
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], max_depth: int) -> '_Trees':
+        trees = cls()
+        for name in TREE_ARRAYS:
+            setattr(trees, name, arrays[name])
+        trees.size = len(trees.feature)
+        trees.max_depth = max_depth
+        trees._interleave_children()
+        return trees
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X32: np.ndarray) -> np.ndarray:
+        """Sum of the reached leaf values per row; X32 holds float32-rounded features"""
+        node = np.repeat(self.roots[None, :], len(X32), axis=0)
+        flat = X32.ravel()
+        row_start = (np.arange(len(X32)) * X32.shape[1])[:, None]
+        has_nan = bool(np.isnan(flat).any())
+        for _ in range(self.max_depth):
+            # Stop as soon as every (row, tree) pair has reached a leaf
+            if self.is_leaf[node].all():
+                break
+            x = flat[row_start + self.feature[node]]
+            go_right = x > self.threshold[node]
+            if has_nan:
+                missing = np.isnan(x)
+                go_right[missing] = ~self.default_left[node[missing]]
+            node = self.children[2 * node + go_right]
+        return self.value[node].sum(axis=1)
+
+
+def _add_sklearn_tree(trees: _Trees, estimator, scale: float) -> None:
+    tree = estimator.tree_
+    missing_left = getattr(tree, 'missing_go_to_left', None)
+    trees.add(
+        tree.feature, tree.threshold, tree.children_left, tree.children_right,
+        tree.value[:, 0, 0] * scale,
+        np.zeros(tree.node_count, dtype=bool) if missing_left is None else missing_left.astype(bool),
+        tree.max_depth,
+    )
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth, level = 0, np.array([0])
+    while True:
+        level = np.concatenate([left[level], right[level]])
+        level = level[level >= 0]
+        if not len(level):
+            return depth
+        depth += 1
+
+
+def _add_xgboost(trees: _Trees, model, scale: float) -> float:
+    """Add an XGBRegressor's trees; returns its base score"""
+    # The JSON model (not the text dump) keeps every condition and leaf at full float32 precision
+    learner = json.loads(model.get_booster().save_raw(raw_format='json'))['learner']
+    booster = learner['gradient_booster']
+    if booster['name'] != 'gbtree':
+        raise ValueError("only gbtree boosters can be fused")
+    if learner['objective']['name'] != 'reg:squarederror':
+        raise ValueError(f"objective {learner['objective']['name']} cannot be fused")
+    # A scalar string in xgboost 2.x, a one-element "[...]" vector in later versions
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]').split(',')[0])
+
+    tree_list = booster['model']['trees']
+    try:
+        # predict() stops at the best iteration when the model was early-stopped
+        per_round = int(booster['model']['gbtree_model_param']['num_parallel_tree'])
+        tree_list = tree_list[:(model.best_iteration + 1) * per_round]
+    except AttributeError:
+        pass
+
+    for tree in tree_list:
+        if any(tree['split_type']):
+            raise ValueError("categorical splits cannot be fused")
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        right = np.asarray(tree['right_children'], dtype=np.int64)
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        leaf = left < 0
+        # XGBoost goes left when x < condition in float32; as a <= test that is the next float32 down
+        threshold = np.nextafter(conditions, np.float32(-np.inf)).astype(np.float64)
+        # Leaves store their value in split_conditions
+        value = np.where(leaf, conditions.astype(np.float64) * scale, 0.0)
+        trees.add(
+            np.asarray(tree['split_indices']), threshold, left, right, value,
+            np.asarray(tree['default_left'], dtype=bool), _tree_depth(left, right),
+        )
+    return base_score
+
+
+class FusedEnsemble:
+    """Ensemble prediction from a model package in one linear term and one tree pass.
+
+    `models` restricts scoring to a subset of the base models, with their weights
+    rescaled to the same total (an approximation, for latency-critical callers).
+    """
+
+    def __init__(self, model_package: Dict, models: Optional[Sequence[str]] = None):
+        self.package = model_package
+        base_models = model_package['base_models']
+        weights = dict(zip(base_models, np.asarray(model_package['weights'], dtype=np.float64)))
+        names = list(base_models) if models is None else [m for m in base_models if m in set(models)]
+        if not names:
+            raise ValueError(f"no base models selected from {list(base_models)}")
+        if models is not None:
+            selected = sum(weights[m] for m in names)
+            weights = {m: weights[m] * sum(weights.values()) / selected for m in names}
+        self.models = names
+
+        scaler = model_package['scaler']
+        n_features = len(model_package['feature_columns'])
+        self.feature_columns = model_package['feature_columns']
+        self.mean = np.asarray(scaler.mean_ if getattr(scaler, 'with_mean', True) else np.zeros(n_features))
+        self.scale = np.asarray(scaler.scale_ if getattr(scaler, 'with_std', True) else np.ones(n_features))
+
+        coef = np.zeros(n_features)
+        self.bias = 0.0
+        self._tree_base = 0.0  # Part of bias from the tree models' base scores
+        self.trees = _Trees()
+        self.other: List = []  # (weight, model) scored with predict()
+        self.tree_models: List = []  # (weight, model) whose trees are fused, for large batches
+        for name in names:
+            model, weight = base_models[name], weights[name]
+            kind = type(model).__name__
+            if kind in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+                self.tree_models.append((weight, model))
+                for estimator in model.estimators_:
+                    _add_sklearn_tree(self.trees, estimator, weight / len(model.estimators_))
+            elif kind == 'GradientBoostingRegressor':
+                self.tree_models.append((weight, model))
+                if model.loss not in ('squared_error', 'ls'):
+                    raise ValueError(f"GradientBoostingRegressor loss {model.loss} cannot be fused")
+                init = 0.0 if model.init_ == 'zero' else float(model.init_.predict(np.zeros((1, n_features)))[0])
+                self._tree_base += weight * init
+                for estimator in model.estimators_[:, 0]:
+                    _add_sklearn_tree(self.trees, estimator, weight * model.learning_rate)
+            elif kind == 'XGBRegressor':
+                self.tree_models.append((weight, model))
+                self._tree_base += weight * _add_xgboost(self.trees, model, weight)
+            elif hasattr(model, 'coef_') and np.ndim(model.coef_) == 1:
+                coef += weight * np.asarray(model.coef_, dtype=np.float64)
+                self.bias += weight * float(model.intercept_)
+            else:
+                self.other.append((weight, model))
+        self.trees.freeze()
+
+        # coef . (x - mean) / scale  ==  (coef / scale) . x - (coef / scale) . mean
+        self.coef = coef / self.scale
+        self.linear_bias = self.bias - float(self.coef @ self.mean)
+        # The tree models' base scores join the constant only when their trees are walked here
+        self.bias = self.linear_bias + self._tree_base
+
+    def export_state(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """Arrays and JSON-serializable constants from which from_state() rebuilds this engine"""
+        if self.other:
+            raise ValueError(f"models scored with predict() cannot be exported: {[type(m).__name__ for _, m in self.other]}")
+        arrays = {'coef': self.coef, 'mean': self.mean, 'scale': self.scale}
+        arrays.update({f'trees.{name}': getattr(self.trees, name) for name in TREE_ARRAYS})
+        constants = {
+            'models': self.models,
+            'linear_bias': self.linear_bias,
+            'tree_base': self._tree_base,
+            'max_depth': self.trees.max_depth,
+        }
+        return arrays, constants
+
+    @classmethod
+    def from_state(cls, model_package: Dict, arrays: Dict[str, np.ndarray], constants: Dict) -> 'FusedEnsemble':
+        """Engine over exported (possibly memory-mapped) arrays, without the model objects"""
+        engine = cls.__new__(cls)
+        engine.package = model_package
+        engine.models = list(constants['models'])
+        engine.feature_columns = model_package['feature_columns']
+        engine.coef, engine.mean, engine.scale = arrays['coef'], arrays['mean'], arrays['scale']
+        engine.linear_bias = constants['linear_bias']
+        engine._tree_base = constants['tree_base']
+        engine.bias = engine.linear_bias + engine._tree_base
+        engine.trees = _Trees.from_arrays({name: arrays[f'trees.{name}'] for name in TREE_ARRAYS}, constants['max_depth'])
+        engine.other, engine.tree_models = [], []
+        return engine
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Ensemble prediction per row of the raw (unscaled) feature matrix"""
+        X = np.asarray(X, dtype=np.float64)
+        # Row by row rather than through BLAS, so a row scores the same alone as in any batch
+        out = np.einsum('ij,j->i', X, self.coef)
+        if not len(self.trees) and not self.other:
+            return out + self.bias
+        # Same scaling as the fitted scaler
+        X_scaled = (X - self.mean) / self.scale
+        if len(X) <= FUSED_MAX_ROWS or not self.tree_models:
+            # Float32 rounding as the tree libraries apply it before comparing
+            X32 = X_scaled.astype(np.float32).astype(np.float64)
+            leaves = np.empty(len(X))
+            for start in range(0, len(X), FUSED_CHUNK_ROWS):
+                leaves[start:start + FUSED_CHUNK_ROWS] = self.trees.predict(X32[start:start + FUSED_CHUNK_ROWS])
+            out += leaves + self.bias
+        else:
+            out += self.linear_bias
+            for weight, model in self.tree_models:
+                out += weight * np.asarray(model.predict(X_scaled), dtype=np.float64)
+        for weight, model in self.other:
+            out += weight * np.asarray(model.predict(X_scaled), dtype=np.float64)
+        return out
+
+    def split_values(self, column: str) -> Optional[np.ndarray]:
+        """Raw values of one feature at which some tree's decision changes, ascending.
+
+        Between them the prediction is linear in that feature. None when a model
+        scored with its own predict() could change anywhere.
+        """
+        if self.other:
+            return None
+        i = self.feature_columns.index(column)
+        splits = (self.trees.feature == i) & ~self.trees.is_leaf
+        return np.unique(self.trees.threshold[splits] * self.scale[i] + self.mean[i])
+
+    def memory_bytes(self) -> int:
+        arrays = [self.coef, self.mean, self.scale, self.trees.children]
+        arrays += [getattr(self.trees, name) for name in TREE_ARRAYS]
+        return int(sum(a.nbytes for a in arrays))
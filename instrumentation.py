@@ -0,0 +1,300 @@
+# instrumentation.py
+"""Per-endpoint latency, phase and volume metrics, rendered in Prometheus text format
+
+RequestMetricsMiddleware times every request under its route template (e.g.
+/api/inventory/items, never the raw URL), counts the response bytes it sends,
+and collects what the handler reported through the current request record:
+
+    with phase("groupby"):      # time a step; phases may repeat and nest
+        ...
+    add_rows(len(frame))        # data rows the response was computed from
+
+The record lives in a contextvar, so the helpers work from the compute pool's
+threads too (ComputePool.run copies the context into the worker). Outside a
+request they do nothing, unless recording() binds a record (startup uses it
+to time each step of the data load).
+
+SlowRequestProfiler is an opt-in sampling profiler: while enabled, a thread
+samples the stacks of the compute threads working for each request, and the
+collapsed stacks of requests slower than the threshold are kept for
+inspection (flamegraph.pl / speedscope read the "a;b;c count" lines).
+"""
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestRecord:
+    """What one request's handler reported, from whichever thread it ran on"""
+
+    __slots__ = ('phases', 'rows', 'samples')
+
+    def __init__(self, sampled: bool = False):
+        self.phases: List[Tuple[str, float]] = []  # list.append is atomic across threads
+        self.rows: List[int] = []
+        self.samples: Optional[Counter] = Counter() if sampled else None
+
+    def phase_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = defaultdict(float)
+        for name, duration in self.phases:
+            totals[name] += duration
+        return totals
+
+
+_current: ContextVar[Optional[RequestRecord]] = ContextVar('jewelai_request', default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as one phase of the current request"""
+    record = _current.get()
+    if record is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.phases.append((name, time.perf_counter() - started))
+
+
+@contextmanager
+def recording(record: RequestRecord):
+    """Collect the phases and rows of work outside a request (e.g. a data load) into record"""
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+
+def add_rows(n: int) -> None:
+    """Count data rows read to answer the current request"""
+    record = _current.get()
+    if record is not None:
+        record.rows.append(int(n))
+
+
+class _Histogram:
+    """Cumulative-bucket histogram per label tuple"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts: Dict[Tuple, List[int]] = {}
+        self.sums: Dict[Tuple, float] = defaultdict(float)
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        self.sums[labels] += value
+
+    def render(self, name: str, label_names: Tuple[str, ...]) -> List[str]:
+        lines = []
+        for labels, counts in sorted(self.counts.items()):
+            base = _labels(zip(label_names, labels))
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{name}_bucket{{{base},le="{bound:g}"}} {count}')
+            lines.append(f'{name}_bucket{{{base},le="+Inf"}} {counts[-1]}')
+            lines.append(f'{name}_sum{{{base}}} {self.sums[labels]:.9g}')
+            lines.append(f'{name}_count{{{base}}} {counts[-1]}')
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs: Iterable[Tuple[str, object]]) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+# (name, type, help, [(labels, value)]) families supplied by the app at render time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, object], float]]]
+
+
+class RequestMetrics:
+    """Counters and histograms for every request the middleware has seen"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.phases = _Histogram(LATENCY_BUCKETS)
+        self.requests: Dict[Tuple, int] = defaultdict(int)
+        self.rows: Dict[Tuple, int] = defaultdict(int)
+        self.response_bytes: Dict[Tuple, int] = defaultdict(int)
+
+    def observe(self, route: str, method: str, status: int, seconds: float, sent: int, record: RequestRecord) -> None:
+        phase_totals = record.phase_totals()
+        with self._lock:
+            self.requests[(route, method, str(status))] += 1
+            self.latency.observe((route, method), seconds)
+            for name, duration in phase_totals.items():
+                self.phases.observe((route, name), duration)
+            self.rows[(route,)] += sum(record.rows)
+            self.response_bytes[(route,)] += sent
+
+    def render(self, families: Iterable[Family] = ()) -> str:
+        """Prometheus text exposition of the request metrics plus the given families"""
+        with self._lock:
+            lines = [
+                '# HELP jewelai_requests_total Requests served, by route, method and status.',
+                '# TYPE jewelai_requests_total counter',
+            ]
+            lines += [f'jewelai_requests_total{{{_labels(zip(("route", "method", "status"), key))}}} {n}'
+                      for key, n in sorted(self.requests.items())]
+            lines += [
+                '# HELP jewelai_request_duration_seconds Time from request to the last response byte.',
+                '# TYPE jewelai_request_duration_seconds histogram',
+            ]
+            lines += self.latency.render('jewelai_request_duration_seconds', ('route', 'method'))
+            lines += [
+                '# HELP jewelai_request_phase_seconds Time per request spent in each phase '
+                '(queue, filter, groupby, serialize, features, inference, grid).',
+                '# TYPE jewelai_request_phase_seconds histogram',
+            ]
+            lines += self.phases.render('jewelai_request_phase_seconds', ('route', 'phase'))
+            for name, kind, help_text, values in (
+                ('jewelai_rows_scanned_total', 'counter', 'Data rows responses were computed from.', self.rows),
+                ('jewelai_response_bytes_total', 'counter', 'Response body bytes sent.', self.response_bytes),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                lines += [f'{name}{{{_labels(zip(("route",), key))}}} {n}' for key, n in sorted(values.items())]
+
+        for name, kind, help_text, samples in families:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for labels, value in samples:
+                label_text = f'{{{_labels(labels.items())}}}' if labels else ''
+                lines.append(f'{name}{label_text} {float(value):.9g}')
+        return '\n'.join(lines) + '\n'
+
+
+class SlowRequestProfiler:
+    """Samples the compute threads working for each request; keeps profiles of slow requests"""
+
+    def __init__(self, threshold: float, interval: float = 0.005, keep: int = 20, max_depth: int = 64):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_depth = max_depth
+        self.profiles: deque = deque(maxlen=keep)
+        self._threads: Dict[int, RequestRecord] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+
+    @contextmanager
+    def bind(self, record: RequestRecord):
+        """Attribute samples of the calling thread to record while the block runs"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = record
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.pop(ident, None)
+
+    def _collapse(self, frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                bound = list(self._threads.items())
+            if not bound:
+                continue
+            frames = sys._current_frames()
+            for ident, record in bound:
+                frame = frames.get(ident)
+                if frame is not None:
+                    record.samples[self._collapse(frame)] += 1
+
+    def finish(self, route: str, method: str, query: str, seconds: float, record: RequestRecord) -> None:
+        if seconds < self.threshold:
+            return
+        print(f"⚠ Slow request {method} {route} took {seconds * 1000:.0f} ms")
+        self.profiles.append({
+            "route": route,
+            "method": method,
+            "query": query,
+            "seconds": round(seconds, 6),
+            "finished_at": time.time(),
+            "interval_seconds": self.interval,
+            "phases": {name: round(total, 6) for name, total in record.phase_totals().items()},
+            "samples": sum(record.samples.values()),
+            "stacks": [f"{stack} {count}" for stack, count in record.samples.most_common()],
+        })
+
+
+_profiler: Optional[SlowRequestProfiler] = None
+
+
+def run_traced(fn: Callable, *args):
+    """Run fn(*args) on this thread on behalf of the current request (for the profiler)"""
+    record = _current.get()
+    if _profiler is None or record is None or record.samples is None:
+        return fn(*args)
+    with _profiler.bind(record):
+        return fn(*args)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware feeding RequestMetrics (and the profiler, when one is given)"""
+
+    def __init__(self, app, metrics: RequestMetrics, profiler: Optional[SlowRequestProfiler] = None):
+        global _profiler
+        self.app = app
+        self.metrics = metrics
+        self.profiler = _profiler = profiler
+        if profiler is not None:
+            profiler.start()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        record = RequestRecord(sampled=self.profiler is not None)
+        token = _current.set(record)
+        started = time.perf_counter()
+        status, sent = 500, 0
+
+        async def send_instrumented(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            _current.reset(token)
+            seconds = time.perf_counter() - started
+            # The matched route's template keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.metrics.observe(route, scope["method"], status, seconds, sent, record)
+            if self.profiler is not None:
+                self.profiler.finish(route, scope["method"], scope.get("query_string", b"").decode("latin-1"),
+                                     seconds, record)
@@ -0,0 +1,118 @@
+# inventory_index.py
+"""Precomputed sort orders over the inventory catalogue for paginated item listings"""
+import base64
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Sort keys accepted by /api/inventory/items and the turnover columns they order by
+SORT_COLUMNS: Dict[str, str] = {
+    'risk': 'inventory_risk_score',
+    'days_to_sell': 'days_to_sell',
+    'predicted_sales': 'predicted_potential_sales',
+}
+
+# Columns an item listing may return, in their default order
+ITEM_FIELDS: List[str] = [
+    'label_no', 'category', 'predicted_potential_sales',
+    'days_to_sell', 'inventory_risk_score', 'turnover_category',
+]
+
+RISK_COLUMN = 'inventory_risk_score'
+
+
+class InventoryIndex:
+    """Row orders of the catalogue, overall and per category, for every sort key.
+
+    Orders are built once per load. Within an order sorted by risk, a risk range
+    is a contiguous block found by binary search, so a page sorted by risk costs
+    O(log n + page size). Other orders only scan for the risk filter when it
+    actually excludes rows of the category; the page itself is always taken by
+    position, so only the rows returned are ever converted to records.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.risk = df[RISK_COLUMN].to_numpy(dtype=np.float64)
+        n = len(df)
+
+        # Positions of each category's rows, in catalogue order; None is the whole catalogue
+        categories = df['category'].astype(str).to_numpy()
+        codes, names = pd.factorize(categories)
+        by_code = np.argsort(codes, kind='stable').astype(np.int32)
+        bounds = np.searchsorted(codes[by_code], np.arange(len(names) + 1))
+        self.groups: Dict[Optional[str], np.ndarray] = {None: np.arange(n, dtype=np.int32)}
+        for i, name in enumerate(names):
+            self.groups[name] = by_code[bounds[i]:bounds[i + 1]]
+
+        # Ascending order of each sort key within each group; None keeps catalogue order
+        self.orders: Dict[Optional[str], Dict[Optional[str], np.ndarray]] = {None: self.groups}
+        for key, column in SORT_COLUMNS.items():
+            values = df[column].to_numpy(dtype=np.float64)
+            self.orders[key] = {
+                group: positions[np.argsort(values[positions], kind='stable')]
+                for group, positions in self.groups.items()
+            }
+        # Risk values in ascending risk order, for binary-searching a risk range
+        self.sorted_risk = {group: self.risk[order] for group, order in self.orders['risk'].items()}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the sort orders (the catalogue frame itself is not counted)"""
+        arrays = [self.risk, *self.sorted_risk.values()]
+        for orders in self.orders.values():
+            arrays.extend(orders.values())
+        return int(sum(a.nbytes for a in arrays))
+
+    def select(self, category: Optional[str], risk_min: float, risk_max: float,
+               sort: Optional[str] = None, descending: bool = False) -> np.ndarray:
+        """Positions of the matching rows, in the requested order"""
+        group = category.upper() if category else None
+        if group not in self.groups:
+            return np.empty(0, dtype=np.int32)
+
+        if sort == 'risk':
+            risk = self.sorted_risk[group]
+            lo = np.searchsorted(risk, risk_min, side='left')
+            hi = np.searchsorted(risk, risk_max, side='right')
+            selection = self.orders['risk'][group][lo:hi]
+        else:
+            selection = self.orders[sort][group]
+            risk = self.sorted_risk[group]
+            # Skip the scan when the range keeps every row (NaN risk never matches)
+            keeps_all = len(risk) == 0 or (risk_min <= risk[0] and risk[-1] <= risk_max)
+            if not keeps_all:
+                values = self.risk[selection]
+                selection = selection[(values >= risk_min) & (values <= risk_max)]
+        return selection[::-1] if descending else selection
+
+    def rows(self, positions: np.ndarray, fields: List[str]) -> pd.DataFrame:
+        """Rows at positions, holding only the given fields"""
+        return self.df.iloc[positions, [self.df.columns.get_loc(f) for f in fields]]
+
+
+def query_signature(*parts) -> str:
+    """Short digest of the query a cursor belongs to"""
+    return hashlib.blake2b(json.dumps(parts, default=str).encode(), digest_size=8).hexdigest()
+
+
+def encode_cursor(offset: int, signature: str) -> str:
+    payload = json.dumps({'o': offset, 's': signature}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, signature: str) -> int:
+    """Offset stored in a cursor; ValueError if it is malformed or from another query or data version"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        offset, cursor_signature = int(payload['o']), payload['s']
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if cursor_signature != signature:
+        raise ValueError("Cursor does not match this query or the data has been reloaded")
+    return offset
@@ -1,13 +1,49 @@
 # api/main.py
-from fastapi import FastAPI, HTTPException, Query
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import numpy as np
 import pandas as pd
 import pickle
+import hmac
+import asyncio
 import json
+import os
+import sys
+import threading
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+from artifact_reloader import ArtifactReloader
+from column_cache import read_csv_cached, mapped_bytes
+from compute_pool import ComputePool
+from data_export import EXPORT_FORMATS, iter_export, match_positions
+from inference import FusedEnsemble
+from json_encoding import RESPONSE_FORMATS, column_values, dumps, frame_payload
+from instrumentation import (
+    RequestMetrics, RequestMetricsMiddleware, RequestRecord, SlowRequestProfiler, add_rows, phase, recording
+)
+from model_artifact import (ModelLoader, artifact_path, export_artifact, is_current, load_artifact,
+                            mapped_bytes as model_mapped_bytes)
+from inventory_index import InventoryIndex, ITEM_FIELDS, SORT_COLUMNS, query_signature, encode_cursor, decode_cursor
+from sales_store import SalesStore, SALES_SCHEMA
+from sales_rollup import SalesRollup
+from sales_series import RESAMPLE_FREQS, SERIES_GROUPS, lttb, resample, series_payload
+from sales_ingest import SalesDelta, StoreFileTailer, typed_rows
+from feature_store import MarketFeatureStore
+from prediction_features import build_feature_matrix, invalid_dates, predict_matrix
+from prediction_grid import PredictionGrid
+from prediction_service import PredictionService
+from response_cache import ResponseCache, etag_matches
+from risk_metrics import risk_score, velocity_trend, risk_counts, prediction_comparison
+
+# Seconds spent importing the libraries and modules above
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 app = FastAPI(title="JewelAI API", version="1.0.0")
 
@@ -20,78 +56,541 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Data paths
+# Per-route latency, phase and volume metrics, served at /metrics
+request_metrics = RequestMetrics()
+# Opt-in: sample stacks of compute work and keep profiles of requests slower than this
+PROFILE_SLOW_MS = os.environ.get("JEWELAI_PROFILE_SLOW_MS")
+slow_profiler = SlowRequestProfiler(
+    float(PROFILE_SLOW_MS) / 1000, interval=float(os.environ.get("JEWELAI_PROFILE_INTERVAL_MS", "5")) / 1000
+) if PROFILE_SLOW_MS else None
+app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics, profiler=slow_profiler)
+
+# Data paths (overridable, e.g. to point the benchmarks at synthetic data)
 BASE_DIR = Path(__file__).parent
-DATA_DIR = BASE_DIR / "output"
+DATA_DIR = Path(os.environ.get("JEWELAI_DATA_DIR", BASE_DIR / "output"))
+SALES_PATH = Path(os.environ.get(
+    "JEWELAI_SALES_PATH", BASE_DIR / "Data" / "jewellery_multi_store_dataset" / "multi_store_denorm_sales.csv"
+))
+CACHE_DIR = Path(os.environ.get("JEWELAI_CACHE_DIR", BASE_DIR / ".cache" / "columns"))
+MODEL_PATH = DATA_DIR / "ensemble_model.pkl"
+# Memory-mappable export of the fused engine (see model_artifact.py), a cache file refreshed from MODEL_PATH
+MODEL_ARTIFACT_DIR = artifact_path(MODEL_PATH, CACHE_DIR)
+
+# "private": each worker reads the data into its own memory (default)
+# "mmap": workers memory-map the column cache read-only and share one copy of the data
+DATA_PLANE = os.environ.get("JEWELAI_DATA_PLANE", "private").lower()
+if DATA_PLANE not in ("private", "mmap"):
+    raise ValueError(f"JEWELAI_DATA_PLANE must be 'private' or 'mmap', got {DATA_PLANE!r}")
+
+# "fused": score predictions with the compiled FusedEnsemble (default)
+# "models": call each base model's predict(), as the model package does
+INFERENCE = os.environ.get("JEWELAI_INFERENCE", "fused").lower()
+if INFERENCE not in ("fused", "models"):
+    raise ValueError(f"JEWELAI_INFERENCE must be 'fused' or 'models', got {INFERENCE!r}")
+# Optional comma-separated base model subset for the fused engine (weights are rescaled)
+INFERENCE_MODELS = [m.strip() for m in os.environ.get("JEWELAI_INFERENCE_MODELS", "").split(",") if m.strip()] or None
+
+# Endpoints (and so data and libraries) this worker serves, to scale dashboard and prediction workers separately:
+# "all": every endpoint (default)
+# "analytics": dashboard, inventory, analytics and export endpoints; the model is never loaded (nor sklearn/xgboost)
+# "predict": prediction endpoints; loads the model and the market features, not the dashboard data
+ROLE = os.environ.get("JEWELAI_ROLE", "all").lower()
+if ROLE not in ("all", "analytics", "predict"):
+    raise ValueError(f"JEWELAI_ROLE must be 'all', 'analytics' or 'predict', got {ROLE!r}")
+SERVES_ANALYTICS = ROLE in ("all", "analytics")
+SERVES_PREDICTIONS = ROLE in ("all", "predict")
+
+# "background": the API starts serving data while the model loads on a thread (default)
+# "lazy": the model loads when the first prediction needs it
+# "eager": startup waits for the model
+MODEL_LOAD = os.environ.get("JEWELAI_MODEL_LOAD", "background").lower()
+if MODEL_LOAD not in ("background", "lazy", "eager"):
+    raise ValueError(f"JEWELAI_MODEL_LOAD must be 'background', 'lazy' or 'eager', got {MODEL_LOAD!r}")
+
+# Optional interpolated prediction table, built with the model (off unless JEWELAI_PREDICTION_GRID=1)
+PREDICTION_GRID = os.environ.get("JEWELAI_PREDICTION_GRID", "0") == "1"
+PREDICTION_GRID_OPTIONS = {
+    "days": int(os.environ.get("JEWELAI_PREDICTION_GRID_DAYS", "7")),
+    "max_weight": float(os.environ.get("JEWELAI_PREDICTION_GRID_MAX_WEIGHT", "100")),
+    "step": float(os.environ.get("JEWELAI_PREDICTION_GRID_STEP", "0.5")),
+    "max_error": float(os.environ.get("JEWELAI_PREDICTION_GRID_MAX_ERROR", "0.005")),
+}
+
+# Response cache for the date-filtered GET endpoints
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("JEWELAI_RESPONSE_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("JEWELAI_RESPONSE_CACHE_BYTES", str(16 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get("JEWELAI_RESPONSE_CACHE_TTL", "300")),
+)
+
+# Blocking pandas/model work runs here, off the event loop, with per-endpoint limits
+compute_pool = ComputePool.from_env()
+
+# CSV inputs served from the columnar cache: (path, date columns, column schema, sort column)
+CACHED_SOURCES = [
+    (DATA_DIR / "inventory_turnover_predictions.csv", [], None, None),
+    (DATA_DIR / "ensemble_predictions.csv", [], None, None),
+    (SALES_PATH, [], SALES_SCHEMA, 'voucher_date'),
+]
 
 # Global variables for loaded data
 turnover_df = None
+inventory_index = None  # Per-category sort orders over turnover_df for item pagination
 ensemble_df = None
-sales_df = None  # Full sales data with dates
+sales_df = None  # Full sales data with dates, sorted by voucher_date
+sales_store = None  # Day-offset index over sales_df for date range lookups
+sales_rollup = None  # Daily (category, store, label) aggregates for date-filtered endpoints
+market_features = None  # MarketFeatureStore over the sales data (plus ingested rows) for predictions
 metrics = None
 ensemble_model_package = None
+inference_engine = None  # FusedEnsemble compiled from ensemble_model_package
+model_source = None  # "artifact" or "pickle"
+model_loader = None  # ModelLoader while the model loads after startup
+prediction_grid = None  # PredictionGrid over ensemble_model_package, when enabled
+data_version = 0  # Bumped on every successful load; part of every response cache key
+memory_footprint = {}  # Computed once per load so /health never touches the frames
+load_timings = {}  # Seconds per phase of the most recent load
 
-# Load data on startup
-@app.on_event("startup")
-async def load_data():
-    global turnover_df, ensemble_df, sales_df, metrics, ensemble_model_package
-    try:
-        print("Loading data files...")
-        turnover_df = pd.read_csv(DATA_DIR / "inventory_turnover_predictions.csv")
-        ensemble_df = pd.read_csv(DATA_DIR / "ensemble_predictions.csv")
+# Endpoints whose dated responses are computed from the sales data
+DATE_FILTERED_PATHS = {"/api/kpis/summary", "/api/inventory/categories", "/api/market/trends", "/api/analytics/data"}
+SALES_SERIES_PATHS = {"/api/analytics/data"}  # Answered from the sales data even without a date range
+
+# Per-store voucher files tailed for new rows, and the delta size that triggers a compaction
+STORE_SALES_FILES = sorted(SALES_PATH.parent.glob("store_*_denorm.csv"))
+INGEST_COMPACT_ROWS = int(os.environ.get("JEWELAI_INGEST_COMPACT_ROWS", "50000"))
+
+# Files whose changes are picked up by the artifact reloader (those this worker's role loads; not the
+# model artifact, which loads re-export themselves whenever MODEL_PATH changes)
+WATCHED_ARTIFACTS = [SALES_PATH]
+if SERVES_ANALYTICS:
+    WATCHED_ARTIFACTS += [
+        DATA_DIR / "inventory_turnover_predictions.csv",
+        DATA_DIR / "ensemble_predictions.csv",
+        DATA_DIR / "ensemble_metrics.json",
+    ]
+if SERVES_PREDICTIONS:
+    WATCHED_ARTIFACTS += [MODEL_PATH]
+
+def load_artifacts(require_model: bool = False) -> Dict[str, Any]:
+    """Load the data artifacts this worker's role serves into a new state dict without touching the served globals"""
+    state = {
+        "turnover_df": None, "inventory_index": None, "ensemble_df": None, "metrics": None,
+        "sales_df": None, "sales_store": None, "sales_rollup": None, "market_features": None,
+        "ensemble_model_package": None, "inference_engine": None, "prediction_grid": None, "model_source": None,
+        "model_loader": None,
+    }
+    mmap = DATA_PLANE == "mmap"
+    started = time.perf_counter()
+    with recording(RequestRecord()) as record:
+        if SERVES_ANALYTICS:
+            with phase("turnover"):
+                state["turnover_df"] = read_csv_cached(DATA_DIR / "inventory_turnover_predictions.csv", CACHE_DIR,
+                                                       mmap=mmap)
+            with phase("inventory_index"):
+                state["inventory_index"] = InventoryIndex(state["turnover_df"])
+            with phase("ensemble_predictions"):
+                state["ensemble_df"] = read_csv_cached(DATA_DIR / "ensemble_predictions.csv", CACHE_DIR, mmap=mmap)
         
-        # Load full sales data with dates for filtering
-        sales_path = BASE_DIR / "Data" / "jewellery_multi_store_dataset" / "multi_store_denorm_sales.csv"
-        if sales_path.exists():
-            sales_df = pd.read_csv(sales_path)
-            sales_df['voucher_date'] = pd.to_datetime(sales_df['voucher_date'])
-            print(f"✓ Sales data loaded: {len(sales_df)} records")
+        # Load full sales data with dates for filtering (and the market features predictions use)
+        if SALES_PATH.exists():
+            with phase("sales"):
+                # Only the columns the endpoints use, with compact dtypes, cached in date order
+                raw_sales = read_csv_cached(SALES_PATH, CACHE_DIR, schema=SALES_SCHEMA, sort_by='voucher_date',
+                                            mmap=mmap)
+                store = SalesStore(raw_sales)
+            if SERVES_ANALYTICS:
+                state["sales_store"] = store
+                state["sales_df"] = store.df
+                with phase("sales_rollup"):
+                    state["sales_rollup"] = SalesRollup(store)
+            if SERVES_PREDICTIONS:
+                # Prediction-only workers keep these per-day tables, not the sales rows
+                with phase("market_features"):
+                    state["market_features"] = MarketFeatureStore.from_sales(store.df)
+            print(f"✓ Sales data loaded: {len(store)} records")
         else:
             print("⚠ Sales data not found, date filtering will be limited")
         
-        with open(DATA_DIR / "ensemble_metrics.json", 'r') as f:
-            metrics = json.load(f)
+        if SERVES_ANALYTICS:
+            with phase("metrics"):
+                with open(DATA_DIR / "ensemble_metrics.json", 'r') as f:
+                    state["metrics"] = json.load(f)
         
-        # Load ensemble model for predictions
-        try:
-            with open(DATA_DIR / "ensemble_model.pkl", 'rb') as f:
-                ensemble_model_package = pickle.load(f)
+        # Load ensemble model for predictions; a reload keeps serving the current model until
+        # the new one is in, so it always loads here (on the reloader's thread)
+        if SERVES_PREDICTIONS and (require_model or MODEL_LOAD == "eager"):
+            with phase("model"):
+                state.update(load_model(require_model=require_model, market=state["market_features"]))
+        elif SERVES_PREDICTIONS:
+            state["model_loader"] = ModelLoader(lambda report: load_model(report, market=state["market_features"]),
+                                                _install_model)
+    
+    state["load_timings"] = dict(record.phase_totals(), total=time.perf_counter() - started)
+    return state
+
+def load_model(report=lambda phase, progress: None, require_model: bool = False,
+               market: Optional[MarketFeatureStore] = None) -> Dict[str, Any]:
+    """Model package, inference engine and prediction grid, from the artifact when it is current"""
+    state = {"ensemble_model_package": None, "inference_engine": None, "prediction_grid": None, "model_source": None}
+    # The artifact holds the full fused engine only; per-model scoring and model subsets need the pickle
+    artifact_usable = INFERENCE == "fused" and INFERENCE_MODELS is None
+    try:
+        if artifact_usable and is_current(MODEL_ARTIFACT_DIR, MODEL_PATH):
+            try:
+                engine = load_artifact(MODEL_ARTIFACT_DIR, mmap=True,
+                                       progress=lambda f: report("mapping model arrays", 0.5 * f))
+                state.update(ensemble_model_package=engine.package, inference_engine=engine, model_source="artifact")
+                print(f"✓ Ensemble model mapped from {MODEL_ARTIFACT_DIR.name}/ ({len(engine.trees)} trees)")
+            except Exception as e:
+                # A damaged artifact is only a cache miss: the pickle is still there (and re-exports it)
+                print(f"⚠ Model artifact unreadable, unpickling instead: {e}")
+        if state["model_source"] is None:
+            report("unpickling model", 0.0)
+            with open(MODEL_PATH, 'rb') as f:
+                state["ensemble_model_package"] = pickle.load(f)
+            state["model_source"] = "pickle"
             print("✓ Ensemble model loaded")
-        except Exception as e:
-            print(f"⚠ Model loading failed (predictions disabled): {e}")
+            if INFERENCE == "fused":
+                report("compiling inference engine", 0.3)
+                state["inference_engine"] = compile_inference(state["ensemble_model_package"])
+            if artifact_usable and state["inference_engine"] is not None:
+                report("exporting model artifact", 0.4)
+                try:
+                    # Later starts (and the other workers) map this instead of unpickling
+                    export_artifact(state["inference_engine"], MODEL_ARTIFACT_DIR, MODEL_PATH)
+                    print(f"✓ Model artifact written to {MODEL_ARTIFACT_DIR.name}/")
+                except Exception as e:
+                    print(f"⚠ Model artifact not written: {e}")
+    except Exception as e:
+        if require_model:
+            raise
+        print(f"⚠ Model loading failed (predictions disabled): {e}")
+    
+    if state["ensemble_model_package"] is not None and PREDICTION_GRID:
+        report("building prediction grid", 0.5)
+        state["prediction_grid"] = build_prediction_grid(state["ensemble_model_package"], state["inference_engine"],
+                                                         market)
+    return state
+
+def _install_model(loader: ModelLoader, state: Dict[str, Any]) -> None:
+    """Swap in a model loaded after startup, unless a reload has replaced its loader meanwhile"""
+    global memory_footprint
+    with _install_lock:
+        if model_loader is not loader:
+            return
+        globals().update(state)
+        memory_footprint = _memory_footprint()
+
+def prediction_grid_start() -> date:
+    """First day of the prediction grid's window: JEWELAI_PREDICTION_GRID_START if set, else today"""
+    start_date = os.environ.get("JEWELAI_PREDICTION_GRID_START")
+    return datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else datetime.now().date()
+
+def build_prediction_grid(model_package: Dict[str, Any], engine: Optional[FusedEnsemble],
+                          market: Optional[MarketFeatureStore] = None) -> Optional[PredictionGrid]:
+    """Prediction table for the window starting today, with these market features, or None if it can't be built"""
+    start = prediction_grid_start()
+    predict = engine.predict if engine is not None else (lambda X: predict_matrix(model_package, X)[0])
+    try:
+        # The weights where the trees split bound the interpolation error; the engine knows them
+        split_weights = (engine or FusedEnsemble(model_package)).split_values('net_weight')
+    except Exception:
+        split_weights = None
+    if split_weights is None:
+        print("⚠ Tree splits unknown: prediction grid error checked at interval midpoints only")
+    try:
+        started = datetime.now()
+        grid = PredictionGrid(model_package, predict, start, market=market, split_weights=split_weights,
+                              **PREDICTION_GRID_OPTIONS)
+        print(f"✓ Prediction grid built from {start} for {grid.days} days in "
+              f"{(datetime.now() - started).total_seconds():.1f}s "
+              f"({grid.valid_fraction:.1%} of intervals within {grid.max_error:.2%})")
+        return grid
+    except Exception as e:
+        print(f"⚠ Prediction grid unavailable, using the model for every request: {e}")
+        return None
+
+# Requests used to check the fused engine against the model package after compiling
+_INFERENCE_CHECK = [
+    ("RING", 5.0, "2025-10-02", 22.0, "MAIN_STORE"),
+    ("GOLD CHAINS", 25.0, "2025-08-09", 18.0, "STORE_3"),
+    ("BANGLE", 60.0, "2025-11-29", 24.0, "STORE_6"),
+    ("NECKLACE", 12.5, "2025-12-31", 22.0, "STORE_1"),
+]
+
+def compile_inference(model_package: Dict[str, Any]) -> Optional[FusedEnsemble]:
+    """Fused engine for the package, or None (per-model scoring) if it can't be built or disagrees"""
+    try:
+        engine = FusedEnsemble(model_package, models=INFERENCE_MODELS)
+        if INFERENCE_MODELS is None:
+            X = build_feature_matrix(*map(list, zip(*_INFERENCE_CHECK)), model_package['feature_columns'])
+            expected, _ = predict_matrix(model_package, X)
+            error = np.max(np.abs(engine.predict(X) - expected) / np.maximum(np.abs(expected), 1.0))
+            if not error <= 1e-6:
+                raise ValueError(f"fused predictions differ from the models by {error:.2e}")
+        print(f"✓ Fused inference engine compiled ({', '.join(engine.models)}; {len(engine.trees)} trees)")
+        return engine
+    except Exception as e:
+        print(f"⚠ Fused inference unavailable, scoring each model: {e}")
+        return None
+
+def install_artifacts(state: Dict[str, Any]) -> None:
+    """Swap a fully loaded state into the module globals in one step"""
+    global memory_footprint
+    with _install_lock:
+        # Responses being computed from the previous data are not kept (clear() bumps the
+        # cache generation), and the new version is published in the same update as the
+        # data, last, so a request that sees it also sees the new data
+        response_cache.clear()
+        # Rebinding the globals only moves references; requests already running keep
+        # the objects they picked up, which are never modified after loading
+        globals().update(state, data_version=data_version + 1)
+        memory_footprint = _memory_footprint()
+        if model_loader is not None and MODEL_LOAD == "background":
+            model_loader.start()
+        # The sales CSV is the source of truth again: rows ingested so far are dropped,
+        # and only rows appended to the store files from now on are tailed
+        tailer.rebaseline()
+
+def _reload_artifacts() -> Dict[str, Any]:
+    # Keep serving the current model if the new one can't be loaded yet
+    return load_artifacts(require_model=ensemble_model_package is not None)
+
+# Incremental sales ingestion
+def _date_range_overlaps(params: Dict[str, str], first: pd.Timestamp, last: pd.Timestamp,
+                         undated_from_sales: bool = False) -> bool:
+    start, end = params.get("start_date"), params.get("end_date")
+    if start is None and end is None:
+        # Undated requests are answered from turnover_df, not the sales data (unless a store is selected)
+        return undated_from_sales or params.get("store") is not None
+    try:
+        return (start is None or pd.Timestamp(start).normalize() <= last) and (end is None or pd.Timestamp(end) >= first)
+    except (ValueError, TypeError):
+        return True
+
+def ingest_sales(rows: pd.DataFrame, source: str) -> int:
+    """Overlay new voucher rows on the sales data and drop the cached responses they affect"""
+    global sales_rollup, market_features, memory_footprint
+    rows = typed_rows(rows)
+    if not len(rows):
+        return 0
+    with _install_lock:
+        rollup = sales_rollup
+        if rollup is None and market_features is None:
+            raise RuntimeError("Sales data not loaded")
+        if rollup is not None:
+            delta = (rollup.delta or SalesDelta(rollup.store)).append(rows)
+            sales_rollup = rollup.with_delta(delta)
+            pending = len(delta)
+        else:
+            # Prediction-only workers keep no sales rows; a "compaction" just rebuilds the prediction grid
+            _compaction["feature_rows"] += len(rows)
+            pending = _compaction["feature_rows"]
+        if market_features is not None:
+            # New predictions see the new rows; cached ones are dropped as the features change
+            market_features = market_features.with_rows(rows)
+        memory_footprint = _memory_footprint()
+        # Only responses whose date range covers the new rows change
+        first, last = rows['voucher_date'].min().normalize(), rows['voucher_date'].max().normalize()
+        stores = {str(store).upper() for store in rows['store'].dropna()}
+        dropped = response_cache.invalidate(
+            lambda path, params: path in DATE_FILTERED_PATHS
+            and _date_range_overlaps(params, first, last, path in SALES_SERIES_PATHS)
+            and (params.get("store") is None or params["store"].upper() in stores)
+        )
+    print(f"✓ Ingested {len(rows)} sales rows from {source} ({pending} pending, {dropped} cached responses dropped)")
+    if pending >= INGEST_COMPACT_ROWS:
+        _start_compaction()
+    return len(rows)
+
+_compaction = {"running": False, "count": 0, "last_error": None, "feature_rows": 0}
+
+def _start_compaction() -> None:
+    with _install_lock:
+        if _compaction["running"]:
+            return
+        _compaction["running"] = True
+    threading.Thread(target=_compact_sales, name="sales-compaction", daemon=True).start()
+
+def _compact_sales() -> None:
+    """Fold the ingested rows into a new sales store and rollup, off the request path"""
+    global sales_store, sales_df, sales_rollup, memory_footprint
+    try:
+        snapshot = sales_rollup
+        if snapshot is None:
+            _compaction["feature_rows"] = 0
+            _refresh_prediction_grid()
+            return
+        covered = len(snapshot.delta) if snapshot.delta is not None else 0
+        if not covered:
+            return
+        base = snapshot.store.df
+        combined = pd.concat([base.astype({c: object for c in base.select_dtypes('category')}), snapshot.delta.df],
+                             ignore_index=True).astype({c: t for c, t in SALES_SCHEMA.items() if t == 'category'})
+        store = SalesStore(combined)
+        rollup = SalesRollup(store)
+        with _install_lock:
+            current = sales_rollup
+            if current.store is not snapshot.store:
+                # A full reload replaced the sales data meanwhile
+                return
+            remaining = current.delta.rebase(store, covered) if current.delta is not None else None
+            sales_store, sales_df = store, store.df
+            sales_rollup = rollup.with_delta(remaining)
+            memory_footprint = _memory_footprint()
+            _compaction["count"] += 1
+            _compaction["last_error"] = None
+        print(f"✓ Compacted {covered} ingested sales rows ({len(store)} records)")
+        # Until then, grid predictions go to the model (the grid was built with the earlier features)
+        _refresh_prediction_grid()
+    except Exception as e:
+        _compaction["last_error"] = str(e)
+        print(f"⚠ Sales compaction failed, keeping the ingested rows pending: {e}")
+    finally:
+        _compaction["running"] = False
+
+def _refresh_prediction_grid() -> None:
+    """Rebuild a prediction grid whose market features ingested rows have replaced, or whose window has moved on"""
+    global prediction_grid, memory_footprint
+    grid, package, market = prediction_grid, ensemble_model_package, market_features
+    if grid is None or grid.package is not package:
+        return
+    if grid.market is market and grid.start == prediction_grid_start():
+        return
+    rebuilt = build_prediction_grid(package, inference_engine, market)
+    with _install_lock:
+        if rebuilt is not None and prediction_grid is grid:
+            prediction_grid = rebuilt
+            memory_footprint = _memory_footprint()
+
+_grid_refresh = {"running": False}
+
+def _start_grid_refresh() -> None:
+    """Roll the prediction grid's window forward in the background (requests use the current grid meanwhile)"""
+    with _install_lock:
+        if _grid_refresh["running"]:
+            return
+        _grid_refresh["running"] = True
+
+    def refresh():
+        try:
+            _refresh_prediction_grid()
+        finally:
+            _grid_refresh["running"] = False
+
+    threading.Thread(target=refresh, name="prediction-grid-refresh", daemon=True).start()
+
+tailer = StoreFileTailer(
+    STORE_SALES_FILES, lambda rows, source: ingest_sales(rows, source),
+    interval=float(os.environ.get("JEWELAI_INGEST_INTERVAL", "0"))
+)
+
+_install_lock = threading.Lock()
+reloader = ArtifactReloader(
+    _reload_artifacts, install_artifacts, WATCHED_ARTIFACTS,
+    interval=float(os.environ.get("JEWELAI_RELOAD_INTERVAL", "0"))
+)
+
+# Load data on startup
+@app.on_event("startup")
+async def load_data():
+    try:
+        print(f"Loading data files (role: {ROLE})...")
+        install_artifacts(load_artifacts())
+        reloader.start_watching()
+        tailer.start()
         
         print("✓ Data loaded successfully")
-        print(f"  - Inventory items: {len(turnover_df)}")
-        print(f"  - Predictions: {len(ensemble_df)}")
+        if turnover_df is not None:
+            print(f"  - Inventory items: {len(turnover_df)}")
+            print(f"  - Predictions: {len(ensemble_df)}")
+        print(f"  - Startup: imports {IMPORT_SECONDS:.2f}s, " +
+              ", ".join(f"{name} {seconds:.2f}s" for name, seconds in load_timings.items()))
     except Exception as e:
         print(f"❌ Error loading data: {e}")
         raise
 
+@app.on_event("shutdown")
+async def stop_reloader():
+    reloader.stop_watching()
+    tailer.stop()
+    compute_pool.shutdown()
+
 # Root endpoint
 @app.get("/")
 def read_root():
     return {
         "message": "JewelAI API is running",
         "version": "1.0.0",
+        "role": ROLE,
         "endpoints": [
             "/api/kpis/summary",
             "/api/inventory/categories",
             "/api/analytics/performance",
+            "/api/analytics/data",
             "/api/market/trends",
             "/health"
         ]
     }
 
+# Helpers to encode JSON responses and serve GET responses through the response cache
+def _response_format(fmt: str) -> str:
+    if fmt not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(RESPONSE_FORMATS)}")
+    return fmt
+
+def json_response(content) -> Response:
+    """Encode content directly, bypassing FastAPI's per-value jsonable_encoder pass"""
+    with phase("serialize"):
+        return Response(content=dumps(content), media_type="application/json")
+
+def _encode_timed(content) -> bytes:
+    with phase("serialize"):
+        return dumps(content)
+
+async def cached_json(request: Request, endpoint: str, compute) -> Response:
+    """Serve compute()'s JSON from the response cache, honouring If-None-Match.
+
+    Cache hits are answered on the event loop; misses compute and encode on the compute pool.
+    """
+    key = response_cache.key(request.url.path, request.query_params.multi_items(), data_version)
+    entry = response_cache.get(key)
+    if entry is None:
+        # Read before computing: if rows are ingested meanwhile, this result is served but not kept
+        generation = response_cache.generation
+        body = await compute_pool.run(endpoint, lambda: _encode_timed(compute()))
+        entry = response_cache.put(key, body, generation)
+    
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+# Endpoints of a role this worker (JEWELAI_ROLE) does not serve answer 503, so a router can retry elsewhere
+def _check_role(role: str) -> None:
+    if ROLE not in ("all", role):
+        raise HTTPException(status_code=503, detail=f"This worker serves the {ROLE} endpoints only, not {role}")
+
+# Store-filtered queries are answered from the sales data's per-store partitions
+def _check_store_filter(store: Optional[str]) -> None:
+    if store is not None and sales_rollup is None:
+        raise HTTPException(status_code=503, detail="Sales data not loaded, store filter unavailable")
+
 # Helper function to filter by date range
 def filter_by_date(df: pd.DataFrame, start_date: Optional[str], end_date: Optional[str]) -> pd.DataFrame:
     """Filter dataframe by date range if dates are provided"""
     if start_date is None and end_date is None:
         return df
     
+    # The loaded sales data is date-indexed, so the range is a binary-searched slice
+    if sales_store is not None and df is sales_store.df:
+        return sales_store.slice(start_date, end_date)
+    
     if 'voucher_date' not in df.columns:
         return df
     
-    filtered = df.copy()
+    filtered = df
     if start_date:
         filtered = filtered[filtered['voucher_date'] >= start_date]
     if end_date:
@@ -101,40 +600,44 @@ def filter_by_date(df: pd.DataFrame, start_date: Optional[str], end_date: Option
 
 # KPIs endpoint
 @app.get("/api/kpis/summary")
-def get_kpis(
+async def get_kpis(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    store: Optional[str] = Query(None, description="Only this store's sales (e.g. STORE_1)")
 ):
     """Get KPI summary including total stock value, ageing stock, deadstock, and fast-moving items"""
+    _check_role("analytics")
+    return await cached_json(request, "kpis", lambda: compute_kpis(start_date, end_date, store))
+
+def compute_kpis(start_date: Optional[str], end_date: Optional[str], store: Optional[str] = None):
+    """Get KPI summary including total stock value, ageing stock, deadstock, and fast-moving items"""
+    _check_store_filter(store)
     try:
-        # Use sales_df with date filtering if available, otherwise use turnover_df
-        if sales_df is not None and (start_date or end_date):
-            filtered_sales = filter_by_date(sales_df, start_date, end_date)
-            
-            # Calculate metrics from filtered sales
-            total_stock = float(filtered_sales['value'].sum())
-            
-            # Group by label to get unique items
-            items_df = filtered_sales.groupby('label_no').agg({
-                'value': 'sum',
-                'voucher_date': ['min', 'max']
-            }).reset_index()
+        # Use the sales rollup with date or store filtering if available, otherwise use turnover_df
+        if sales_rollup is not None and (start_date or end_date or store):
+            # Per-label totals for the range come straight from the daily rollup
+            with phase("groupby"):
+                items_df = sales_rollup.by_label(start_date, end_date, store)
+                # Every row's value, labelled or not
+                total_stock = sales_rollup.total(start_date, end_date, store)
+            add_rows(items_df['count'].sum())
             
             # Calculate age and velocity
-            items_df['days_active'] = (items_df[('voucher_date', 'max')] - items_df[('voucher_date', 'min')]).dt.days + 1
-            items_df['risk_score'] = items_df['days_active'].apply(lambda x: min(x * 5, 50))  # Simple risk calculation
-            
-            ageing_stock = len(items_df[items_df['risk_score'] > 45])
-            deadstock = len(items_df[items_df['risk_score'] > 48])
-            fast_moving = len(items_df[items_df['risk_score'] < 30])
+            items_df['days_active'] = (items_df['last_date'] - items_df['first_date']).dt.days + 1
+            counts = risk_counts(risk_score(items_df['days_active']))  # Simple risk calculation
             total_items = len(items_df)
         else:
             # Fallback to turnover_df
-            total_stock = float(turnover_df['predicted_potential_sales'].sum())
-            ageing_stock = len(turnover_df[turnover_df['inventory_risk_score'] > 45])
-            deadstock = len(turnover_df[turnover_df['inventory_risk_score'] > 48])
-            fast_moving = len(turnover_df[turnover_df['inventory_risk_score'] < 30])
+            with phase("groupby"):
+                total_stock = float(turnover_df['predicted_potential_sales'].sum())
+                counts = risk_counts(turnover_df['inventory_risk_score'])
             total_items = len(turnover_df)
+            add_rows(total_items)
+        
+        ageing_stock = counts['ageing']
+        deadstock = counts['deadstock']
+        fast_moving = counts['fast_moving']
         
         return {
             "totalStockValue": total_stock,
@@ -148,53 +651,59 @@ def get_kpis(
 
 # Inventory categories endpoint
 @app.get("/api/inventory/categories")
-def get_inventory_categories(
+async def get_inventory_categories(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    store: Optional[str] = Query(None, description="Only this store's sales (e.g. STORE_1)"),
+    format: str = Query("records", description="records or columnar")
 ):
     """Get inventory breakdown by category with stock value, turnover, and risk metrics"""
+    _check_role("analytics")
+    fmt = _response_format(format)
+    return await cached_json(request, "categories", lambda: compute_inventory_categories(start_date, end_date, fmt, store))
+
+def compute_inventory_categories(start_date: Optional[str], end_date: Optional[str], fmt: str = "records",
+                                 store: Optional[str] = None):
+    """Get inventory breakdown by category with stock value, turnover, and risk metrics"""
+    _check_store_filter(store)
     try:
-        # Use sales_df with date filtering if available
-        if sales_df is not None and (start_date or end_date):
-            filtered_sales = filter_by_date(sales_df, start_date, end_date)
-            
-            # Group by category
-            category_summary = filtered_sales.groupby('category').agg({
-                'value': 'sum',
-                'label_no': 'count',
-                'voucher_date': ['min', 'max']
-            }).reset_index()
+        # Use the sales rollup with date or store filtering if available
+        if sales_rollup is not None and (start_date or end_date or store):
+            # Per-category totals for the range come straight from the daily rollup
+            with phase("groupby"):
+                category_summary = sales_rollup.by_category(start_date, end_date, store)
+            add_rows(category_summary['count'].sum())
             
-            # Calculate metrics
-            category_summary.columns = ['category', 'stockValue', 'itemCount', 'first_date', 'last_date']
+            # Calculate metrics; items are rows with a label, as groupby's 'label_no': 'count'
+            category_summary = category_summary.rename(columns={'sum': 'stockValue', 'label_count': 'itemCount'})
             category_summary['avgDaysToSell'] = ((pd.to_datetime(category_summary['last_date']) - 
                                                   pd.to_datetime(category_summary['first_date'])).dt.days / 
                                                   category_summary['itemCount']).fillna(1)
-            category_summary['riskScore'] = category_summary['avgDaysToSell'].apply(lambda x: min(x * 5, 50))
-            category_summary['trend'] = category_summary['avgDaysToSell'].apply(
-                lambda x: 'rising' if x < 7 else 'falling' if x > 30 else 'stable'
-            )
+            category_summary['riskScore'] = risk_score(category_summary['avgDaysToSell'])
+            category_summary['trend'] = velocity_trend(category_summary['avgDaysToSell'])
             
             # Select and rename columns
             result = category_summary[['category', 'stockValue', 'avgDaysToSell', 'riskScore', 'itemCount', 'trend']]
         else:
             # Fallback to turnover_df
-            category_summary = turnover_df.groupby('category').agg({
-                'predicted_potential_sales': 'sum',
-                'days_to_sell': 'mean',
-                'inventory_risk_score': 'mean',
-                'label_no': 'count'
-            }).reset_index()
+            with phase("groupby"):
+                category_summary = turnover_df.groupby('category', observed=True).agg({
+                    'predicted_potential_sales': 'sum',
+                    'days_to_sell': 'mean',
+                    'inventory_risk_score': 'mean',
+                    'label_no': 'count'
+                }).reset_index()
+            add_rows(len(turnover_df))
             
             category_summary.columns = ['category', 'stockValue', 'avgDaysToSell', 'riskScore', 'itemCount']
             
             # Add velocity trend
-            category_summary['trend'] = category_summary['avgDaysToSell'].apply(
-                lambda x: 'rising' if x < 7 else 'falling' if x > 30 else 'stable'
-            )
+            category_summary['trend'] = velocity_trend(category_summary['avgDaysToSell'])
             result = category_summary
         
-        return result.to_dict('records')
+        with phase("serialize"):
+            return frame_payload(result, fmt)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -202,6 +711,7 @@ def get_inventory_categories(
 @app.get("/api/analytics/performance")
 def get_analytics_performance():
     """Get model performance metrics and training information"""
+    _check_role("analytics")
     try:
         return {
             "ensemble": {
@@ -218,67 +728,123 @@ def get_analytics_performance():
 
 # Market trends endpoint
 @app.get("/api/market/trends")
-def get_market_trends(
+async def get_market_trends(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    store: Optional[str] = Query(None, description="Only this store's sales (e.g. STORE_1)"),
+    format: str = Query("records", description="records or columnar")
 ):
     """Get market trends aggregated by category"""
+    _check_role("analytics")
+    fmt = _response_format(format)
+    return await cached_json(request, "trends", lambda: compute_market_trends(start_date, end_date, fmt, store))
+
+def compute_market_trends(start_date: Optional[str], end_date: Optional[str], fmt: str = "records",
+                          store: Optional[str] = None):
+    """Get market trends aggregated by category"""
+    _check_store_filter(store)
     try:
-        # Use sales_df with date filtering if available
-        if sales_df is not None and (start_date or end_date):
-            filtered_sales = filter_by_date(sales_df, start_date, end_date)
-            
-            # Aggregate by category for market view
-            trends = filtered_sales.groupby('category').agg({
-                'value': ['sum', 'mean'],
-                'voucher_date': ['min', 'max'],
-                'label_no': 'count'
-            }).reset_index()
-            
-            trends.columns = ['category', 'total_sales', 'avg_sales', 'first_date', 'last_date', 'item_count']
+        # Use the sales rollup with date or store filtering if available
+        if sales_rollup is not None and (start_date or end_date or store):
+            # Aggregate by category for market view from the daily rollup
+            with phase("groupby"):
+                trends = sales_rollup.by_category(start_date, end_date, store)
+            add_rows(trends['count'].sum())
+            trends = trends.rename(columns={'sum': 'total_sales', 'label_count': 'item_count'})
+            # Mean over the rows with a value, as Series.mean skips NaN
+            trends['avg_sales'] = trends['total_sales'] / trends['value_count']
             
             # Calculate risk and turnover days
             trends['turnover_days'] = ((pd.to_datetime(trends['last_date']) - 
                                        pd.to_datetime(trends['first_date'])).dt.days / 
                                        trends['item_count']).fillna(1)
-            trends['risk'] = trends['turnover_days'].apply(lambda x: min(x * 5, 50))
+            trends['risk'] = risk_score(trends['turnover_days'])
             
             result = trends[['category', 'total_sales', 'avg_sales', 'risk', 'turnover_days']]
         else:
             # Fallback to turnover_df
-            trends = turnover_df.groupby('category').agg({
-                'predicted_potential_sales': ['sum', 'mean'],
-                'inventory_risk_score': 'mean',
-                'days_to_sell': 'mean'
-            }).reset_index()
+            with phase("groupby"):
+                trends = turnover_df.groupby('category', observed=True).agg({
+                    'predicted_potential_sales': ['sum', 'mean'],
+                    'inventory_risk_score': 'mean',
+                    'days_to_sell': 'mean'
+                }).reset_index()
+            add_rows(len(turnover_df))
             
             trends.columns = ['category', 'total_sales', 'avg_sales', 'risk', 'turnover_days']
             result = trends
         
-        return result.to_dict('records')
+        with phase("serialize"):
+            return frame_payload(result, fmt)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Inventory details endpoint
+MAX_ITEMS_PAGE = 1000
+
 @app.get("/api/inventory/items")
-def get_inventory_items(category: str = None, risk_min: float = 0, risk_max: float = 100):
-    """Get detailed inventory items with optional filtering"""
+async def get_inventory_items(
+    category: str = None,
+    risk_min: float = 0,
+    risk_max: float = 100,
+    sort: Optional[str] = Query(None, description="Sort by: " + ", ".join(SORT_COLUMNS)),
+    order: str = Query("desc", description="asc or desc (with sort)"),
+    limit: int = Query(100, ge=1, le=MAX_ITEMS_PAGE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    format: str = Query("records", description="records (a list of item objects) or columnar (a list per field)")
+):
+    """Get detailed inventory items with optional filtering, sorting and pagination"""
+    _check_role("analytics")
+    return await compute_pool.run(
+        "inventory_items", compute_inventory_items,
+        category, risk_min, risk_max, sort, order, limit, offset, cursor, fields, format
+    )
+
+def compute_inventory_items(category: Optional[str], risk_min: float, risk_max: float, sort: Optional[str],
+                            order: str, limit: int, offset: int, cursor: Optional[str], fields: Optional[str],
+                            fmt: str = "records"):
+    """Get detailed inventory items with optional filtering, sorting and pagination"""
+    _response_format(fmt)
+    if sort is not None and sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    columns = ITEM_FIELDS
+    if fields:
+        columns = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in columns if f not in ITEM_FIELDS]
+        if unknown or not columns:
+            raise HTTPException(status_code=400, detail=f"fields must be among: {', '.join(ITEM_FIELDS)}")
+    
+    # One reference for the whole request, so a reload can't swap the index mid-way
+    index, version = inventory_index, data_version
+    signature = query_signature(version, category, risk_min, risk_max, sort, order)
+    if cursor:
+        try:
+            offset = decode_cursor(cursor, signature)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        df = turnover_df.copy()
+        with phase("filter"):
+            selection = index.select(category, risk_min, risk_max, sort, descending=sort is not None and order == "desc")
+        total = len(selection)
+        start = min(offset, total)
+        end = min(start + limit, total)
+        add_rows(total)
+        with phase("serialize"):
+            items = frame_payload(index.rows(selection[start:end], columns), fmt)
         
-        # Apply filters
-        if category:
-            df = df[df['category'] == category.upper()]
-        df = df[(df['inventory_risk_score'] >= risk_min) & (df['inventory_risk_score'] <= risk_max)]
-        
-        # Select relevant columns
-        result = df[['label_no', 'category', 'predicted_potential_sales', 
-                     'days_to_sell', 'inventory_risk_score', 'turnover_category']].to_dict('records')
-        
-        return {
-            "total": len(result),
-            "items": result[:100]  # Limit to 100 items
-        }
+        return json_response({
+            "total": total,
+            "offset": start,
+            "limit": limit,
+            "items": items,
+            "next_cursor": encode_cursor(end, signature) if end < total else None
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -290,90 +856,105 @@ class PredictionRequest(BaseModel):
     purity: float = 22.0
     store_id: str = "MAIN_STORE"
 
+# Batch prediction request schema
+class BatchPredictionRequest(BaseModel):
+    items: List[PredictionRequest]
+
+# Largest batch accepted by /api/predict/sales/batch
+MAX_PREDICTION_BATCH = 100_000
+
+def _check_voucher_dates(items: List[PredictionRequest], batch: bool = True) -> None:
+    """422 naming every item whose voucher_date the feature builder can't parse, before any is scored"""
+    bad = invalid_dates([item.voucher_date for item in items])
+    if len(bad):
+        raise HTTPException(status_code=422, detail=[
+            {"loc": ["body", "items", int(i), "voucher_date"] if batch else ["body", "voucher_date"],
+             "msg": "voucher_date must be a date in YYYY-MM-DD format", "type": "value_error"}
+            for i in bad
+        ])
+
+async def _served_model() -> Dict[str, Any]:
+    """The model package to predict with, waiting for a model still loading after startup"""
+    _check_role("predict")
+    model_package = ensemble_model_package
+    loader = model_loader
+    if model_package is None and loader is not None:
+        loader.start()
+        try:
+            await asyncio.wrap_future(loader.future)
+        except Exception:
+            pass
+        model_package = ensemble_model_package
+    if model_package is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    return model_package
+
+def _predict_requests(model_package: Dict[str, Any], requests: List[PredictionRequest],
+                      market: Optional[MarketFeatureStore] = None):
+    """Predictions for a list of requests, from the prediction grid where it can answer them"""
+    grid = prediction_grid
+    if grid is not None and grid.start != prediction_grid_start():
+        # A new day: the window still answers its remaining days until the rolled one is built
+        _start_grid_refresh()
+    if grid is not None and grid.package is model_package and grid.market is market:
+        # Answer what the table can; only the rest goes through the model
+        with phase("grid"):
+            predicted, hit = grid.lookup(
+                [r.category for r in requests],
+                [r.net_weight for r in requests],
+                [r.voucher_date for r in requests],
+                [r.purity for r in requests],
+                [r.store_id for r in requests],
+            )
+        if not hit.all():
+            missed = np.flatnonzero(~hit)
+            predicted[missed] = _score_requests(model_package, [requests[i] for i in missed], market)
+        return predicted
+    return _score_requests(model_package, requests, market)
+
+def _score_requests(model_package: Dict[str, Any], requests: List[PredictionRequest],
+                    market: Optional[MarketFeatureStore] = None):
+    """Build the feature matrix for a list of requests and score it with the ensemble"""
+    add_rows(len(requests))
+    with phase("features"):
+        X = build_feature_matrix(
+            [r.category for r in requests],
+            [r.net_weight for r in requests],
+            [r.voucher_date for r in requests],
+            [r.purity for r in requests],
+            [r.store_id for r in requests],
+            model_package['feature_columns'],
+            market,
+        )
+    engine = inference_engine
+    with phase("inference"):
+        if engine is not None and engine.package is model_package:
+            return engine.predict(X)
+        ensemble_pred, _ = predict_matrix(model_package, X)
+    return ensemble_pred
+
+# Single predictions share an LRU of recent results, in-flight computations and micro-batches
+prediction_service = PredictionService(
+    _predict_requests,
+    lambda fn, *args: compute_pool.run("predict", fn, *args),
+    max_entries=int(os.environ.get("JEWELAI_PREDICTION_CACHE_ENTRIES", "4096")),
+    window=float(os.environ.get("JEWELAI_PREDICTION_BATCH_MS", "2")) / 1000,
+    max_batch=int(os.environ.get("JEWELAI_PREDICTION_BATCH_MAX", "256")),
+)
+
 # Prediction endpoint (Phase 4)
 @app.post("/api/predict/sales")
-def predict_sales(request: PredictionRequest):
+async def predict_sales(request: PredictionRequest):
     """Predict sales value for a new item (requires loaded model)"""
-    if ensemble_model_package is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+    # One reference for the whole request, so a reload can't swap the model mid-way
+    model_package = await _served_model()
+    # A bad date is this request's error, not one for the batch it would be scored with
+    _check_voucher_dates([request], batch=False)
     
     try:
-        from datetime import datetime
-        
-        # Parse date
-        date_obj = datetime.strptime(request.voucher_date, '%Y-%m-%d')
-        
-        # Calculate price per gram (estimated)
-        price_per_gram = 6000 if request.purity == 22 else 5500 if request.purity == 18 else 6500
-        
-        # Create feature dictionary with all 35 features
-        features = {
-            # Date features
-            'year': date_obj.year,
-            'month': date_obj.month,
-            'day': date_obj.day,
-            'day_of_week': date_obj.weekday(),
-            'week_of_year': date_obj.isocalendar()[1],
-            'is_weekend': 1 if date_obj.weekday() >= 5 else 0,
-            'is_festival': 0,  # Simplified
-            
-            # Numeric features
-            'net_weight': request.net_weight,
-            'price_per_gram': price_per_gram,
-            'market_share': 13.0,
-            'category_avg_market': 90000,
-            'store_avg_sales': 95000,
-            'sales_momentum': 92000,
-            
-            # Product category (one-hot encoded)
-            'product_category_GOLD BRACELET': 1 if request.category.upper() in ['BRACELET', 'GOLD BRACELET'] else 0,
-            'product_category_GOLD CHAINS': 1 if request.category.upper() in ['CHAIN', 'GOLD CHAINS'] else 0,
-            'product_category_GOLD EARRING': 1 if request.category.upper() in ['EARRING', 'GOLD EARRING'] else 0,
-            'product_category_GOLD NECKLACE': 1 if request.category.upper() in ['NECKLACE', 'GOLD NECKLACE'] else 0,
-            'product_category_GOLD RINGS': 1 if request.category.upper() in ['RING', 'GOLD RINGS'] else 0,
-            
-            # Weight category (one-hot encoded)
-            'weight_category_Light': 1 if request.net_weight < 5 else 0,
-            'weight_category_Medium': 1 if 5 <= request.net_weight < 10 else 0,
-            'weight_category_Heavy': 1 if 10 <= request.net_weight < 20 else 0,
-            'weight_category_Very_Heavy': 1 if 20 <= request.net_weight < 50 else 0,
-            'weight_category_Ultra_Heavy': 1 if request.net_weight >= 50 else 0,
-            
-            # Price bracket (one-hot encoded)
-            'price_bracket_Budget': 1 if price_per_gram * request.net_weight < 20000 else 0,
-            'price_bracket_Mid': 1 if 20000 <= price_per_gram * request.net_weight < 50000 else 0,
-            'price_bracket_Premium': 1 if 50000 <= price_per_gram * request.net_weight < 100000 else 0,
-            'price_bracket_Luxury': 1 if 100000 <= price_per_gram * request.net_weight < 200000 else 0,
-            'price_bracket_Ultra': 1 if price_per_gram * request.net_weight >= 200000 else 0,
-            
-            # Store ID (one-hot encoded)
-            'store_id_MAIN_STORE': 1 if request.store_id == 'MAIN_STORE' else 0,
-            'store_id_STORE_1': 1 if request.store_id == 'STORE_1' else 0,
-            'store_id_STORE_2': 1 if request.store_id == 'STORE_2' else 0,
-            'store_id_STORE_3': 1 if request.store_id == 'STORE_3' else 0,
-            'store_id_STORE_4': 1 if request.store_id == 'STORE_4' else 0,
-            'store_id_STORE_5': 1 if request.store_id == 'STORE_5' else 0,
-            'store_id_STORE_6': 1 if request.store_id == 'STORE_6' else 0,
-        }
-        
-        # Create DataFrame in the correct order
-        feature_columns = ensemble_model_package['feature_columns']
-        X = pd.DataFrame([features])[feature_columns]
-        
-        # Scale features
-        scaler = ensemble_model_package['scaler']
-        X_scaled = scaler.transform(X)
-        
-        # Ensemble prediction
-        base_models = ensemble_model_package['base_models']
-        weights = ensemble_model_package['weights']
-        
-        predictions = []
-        for model_name, model in base_models.items():
-            pred = model.predict(X_scaled)[0]
-            predictions.append(pred)
-        
-        ensemble_pred = sum(w * p for w, p in zip(weights, predictions))
+        # Same feature construction and scoring path as the batch endpoint, batched with concurrent requests
+        ensemble_pred = await prediction_service.predict(model_package, request, market_features)
+        weights = model_package['weights']
         
         return {
             "predicted_sales": float(ensemble_pred),
@@ -382,38 +963,426 @@ def predict_sales(request: PredictionRequest):
             "category": request.category,
             "weight_grams": request.net_weight
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+def _predict_batch(model_package: Dict[str, Any], items: List[PredictionRequest],
+                   market: Optional[MarketFeatureStore] = None):
+    _check_voucher_dates(items)
+    predicted = _predict_requests(model_package, items, market) if items else []
+    return {
+        "count": len(items),
+        "confidence": model_package['weights'].tolist(),
+        "predictions": [
+            {"predicted_sales": value, "category": item.category, "weight_grams": item.net_weight}
+            for value, item in zip(np.asarray(predicted, dtype=float).tolist(), items)
+        ]
+    }
+
+# Batch prediction endpoint
+@app.post("/api/predict/sales/batch")
+async def predict_sales_batch(batch: BatchPredictionRequest):
+    """Predict sales values for many items with one scaler and model pass (requires loaded model)"""
+    model_package = await _served_model()
+    if len(batch.items) > MAX_PREDICTION_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_PREDICTION_BATCH} items)")
+    
+    try:
+        return await compute_pool.run("predict_batch", _predict_batch, model_package, batch.items, market_features)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 # Prediction comparison endpoint for charts
 @app.get("/api/analytics/predictions")
-def get_prediction_comparison(limit: int = 50):
+async def get_prediction_comparison(
+    limit: int = 50,
+    format: str = Query("records", description="records or columnar")
+):
+    """Get sample of actual vs predicted sales for visualization"""
+    _check_role("analytics")
+    fmt = _response_format(format)
+    return await compute_pool.run("prediction_comparison", compute_prediction_comparison, limit, fmt)
+
+def compute_prediction_comparison(limit: int, fmt: str = "records"):
     """Get sample of actual vs predicted sales for visualization"""
     try:
-        # Get a sample of predictions
-        sample = ensemble_df.head(limit)
+        # Get a sample of predictions as columns
+        with phase("filter"):
+            columns = prediction_comparison(ensemble_df, limit)
+        add_rows(len(ensemble_df))
         
-        comparison = []
-        for _, row in sample.iterrows():
-            comparison.append({
-                'actual': float(row['actual_sales']),
-                'predicted': float(row['ensemble_prediction']),
-                'category': row.get('product_category', 'Unknown') if 'product_category' in row else 'Unknown',
-            })
+        with phase("serialize"):
+            columns = {name: column_values(pd.Series(values)) for name, values in columns.items()}
+            if fmt != "columnar":
+                columns = [dict(zip(columns, row)) for row in zip(*columns.values())]
+        return json_response(columns)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Sales time series for the analytics page
+@app.get("/api/analytics/data")
+async def get_analytics_data(
+    request: Request,
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    store: Optional[str] = Query(None, description="Only this store's sales (e.g. STORE_1)"),
+    group_by: str = Query("category", description="Series per category or per store"),
+    freq: str = Query("day", description="day, week or month"),
+    rolling: int = Query(0, ge=0, le=366, description="Trailing average over this many periods (0 for none)"),
+    max_points: int = Query(0, ge=0, description="Downsample the series to at most this many points (LTTB of the total)")
+):
+    """Model summary plus sales series over the date range, resampled and optionally smoothed and downsampled"""
+    _check_role("analytics")
+    if group_by not in SERIES_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(SERIES_GROUPS)}")
+    if freq not in RESAMPLE_FREQS:
+        raise HTTPException(status_code=400, detail=f"freq must be one of: {', '.join(RESAMPLE_FREQS)}")
+    if sales_rollup is None:
+        raise HTTPException(status_code=503, detail="Sales data not loaded")
+    return await cached_json(request, "analytics_data", lambda: compute_analytics_data(
+        start_date, end_date, store, group_by, freq, rolling, max_points
+    ))
+
+# Rows of ensemble_predictions.csv in the dashboard's actual-vs-predicted sample
+ANALYTICS_SAMPLE_ROWS = 100
+
+def compute_analytics_data(start_date: Optional[str], end_date: Optional[str], store: Optional[str],
+                           group_by: str, freq: str, rolling: int, max_points: int):
+    """Model summary plus sales series over the date range, resampled and optionally smoothed and downsampled"""
+    try:
+        rollup = sales_rollup
+        with phase("groupby"):
+            days, _, total_sums, total_counts = rollup.daily(start_date, end_date, "total", store)
+            _, names, sums, counts = rollup.daily(start_date, end_date, group_by, store)
+            periods, total_sums, total_counts = resample(days, total_sums, total_counts, freq)
+            _, sums, counts = resample(days, sums, counts, freq)
+        add_rows(total_counts.sum())
         
-        return comparison
+        with phase("serialize"):
+            # One set of points, picked from the total, so every series has the same dates
+            keep = lttb(total_sums[0], max_points) if max_points else None
+            total = series_payload(["total"], periods, total_sums, total_counts, rolling, keep)[0]
+            groups = series_payload(names, periods, sums, counts, rolling, keep)
+            sample = ensemble_df[['actual_sales', 'ensemble_prediction']].head(ANALYTICS_SAMPLE_ROWS)
+            ensemble = metrics['ensemble']
+            return {
+                # Same model fields as public/data/analytics.json (the sample is not date-filtered)
+                "model_performance": {name: ensemble[name] for name in ("r2_score", "rmse", "mae", "mape")},
+                "base_models": metrics['base_models'],
+                "predictions_sample": frame_payload(sample, "records"),
+                "training_info": metrics['training_info'],
+                "series": {
+                    "start_date": str(periods[0]) if len(periods) else None,
+                    "end_date": str(days[-1]) if len(days) else None,
+                    "store": store,
+                    "freq": freq,
+                    "group_by": group_by,
+                    "rolling": rolling,
+                    "total": total,
+                    "groups": groups,
+                },
+            }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Streaming exports
+def _export_format(fmt: str) -> str:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+def _stream_export(df: pd.DataFrame, positions, fmt: str, name: str,
+                   extra: Optional[pd.DataFrame] = None) -> StreamingResponse:
+    # A sync generator: the server gathers and encodes each chunk in a worker thread, never on the event loop
+    return StreamingResponse(
+        iter_export(df, fmt, positions, extra=extra),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt if fmt == "csv" else "jsonl"}"'}
+    )
+
+def _select_sales(rollup: SalesRollup, start_date, end_date, category, store_id):
+    # Positions into the store's table (a store's come from its partition only), gathered chunk by
+    # chunk while streaming; ingested rows are few and come along as a frame
+    filters = {"category": category}
+    with phase("filter"):
+        in_range = rollup.store.positions(start_date, end_date, store_id)
+        positions = match_positions(rollup.store.df, filters, in_range)
+        extra = rollup.delta_slice(start_date, end_date, store_id)
+        if extra is not None:
+            matched = match_positions(extra, filters)
+            extra = extra if matched is None else extra.iloc[matched]
+    add_rows(len(in_range) + (0 if extra is None else len(extra)))
+    return rollup.store.df, positions, extra
+
+@app.get("/api/export/sales")
+async def export_sales(
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    category: Optional[str] = None,
+    store: Optional[str] = None,
+    format: str = Query("ndjson", description="ndjson or csv")
+):
+    """Stream the (filtered) sales rows as NDJSON or CSV"""
+    _check_role("analytics")
+    fmt = _export_format(format)
+    rollup = sales_rollup
+    if rollup is None:
+        raise HTTPException(status_code=503, detail="Sales data not loaded")
+    try:
+        rows, positions, extra = await compute_pool.run(
+            "export", _select_sales, rollup, start_date, end_date, category, store
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return _stream_export(rows, positions, fmt, "sales", extra)
+
+def _select_predictions(df: pd.DataFrame, start_date, end_date, category, store_id):
+    filters = {"category": category, "store": store_id}
+    # ensemble_predictions.csv is the model's test split and may carry none of these columns
+    missing = [name for name, value in filters.items() if value and name not in df.columns]
+    if (start_date or end_date) and 'voucher_date' not in df.columns:
+        missing.append('voucher_date')
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Predictions cannot be filtered by: {', '.join(missing)}")
+    
+    with phase("filter"):
+        in_range = _date_positions(df, start_date, end_date)
+        positions = match_positions(df, filters, in_range)
+    add_rows(len(df) if in_range is None else len(in_range))
+    return df, positions
+
+def _date_positions(df: pd.DataFrame, start_date: Optional[str], end_date: Optional[str]) -> Optional[np.ndarray]:
+    """Positions of the rows filter_by_date keeps, without copying them (None when no date is given)"""
+    if not (start_date or end_date):
+        return None
+    mask = np.ones(len(df), dtype=bool)
+    if start_date:
+        mask &= (df['voucher_date'] >= start_date).to_numpy()
+    if end_date:
+        mask &= (df['voucher_date'] <= end_date).to_numpy()
+    return np.flatnonzero(mask)
+
+@app.get("/api/export/predictions")
+async def export_predictions(
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    category: Optional[str] = None,
+    store: Optional[str] = None,
+    format: str = Query("ndjson", description="ndjson or csv")
+):
+    """Stream the ensemble predictions as NDJSON or CSV"""
+    _check_role("analytics")
+    fmt = _export_format(format)
+    try:
+        rows, positions = await compute_pool.run(
+            "export", _select_predictions, ensemble_df, start_date, end_date, category, store
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _stream_export(rows, positions, fmt, "predictions")
+
+def _memory_footprint() -> Dict[str, int]:
+    """Bytes held by the in-memory data frames and indexes"""
+    footprint = {}
+    if sales_store is not None:
+        sales_memory = sales_store.memory_bytes()
+        footprint["sales_df"] = sales_memory["frame"]
+        footprint["sales_index"] = sales_memory["index"]
+    if sales_rollup is not None:
+        footprint["sales_rollup"] = sales_rollup.memory_bytes()
+        if sales_rollup.delta is not None:
+            footprint["sales_delta"] = sales_rollup.delta.memory_bytes()
+    if inventory_index is not None:
+        footprint["inventory_index"] = inventory_index.memory_bytes()
+    if market_features is not None:
+        footprint["market_features"] = market_features.memory_bytes()
+    if prediction_grid is not None:
+        footprint["prediction_grid"] = prediction_grid.memory_bytes()
+    if inference_engine is not None:
+        footprint["inference_engine"] = inference_engine.memory_bytes()
+    for name, df in (("turnover_df", turnover_df), ("ensemble_df", ensemble_df)):
+        if df is not None:
+            footprint[name] = int(df.memory_usage(deep=True).sum())
+    # Part of the above that is memory-mapped from the column cache and shared across workers
+    footprint["shared"] = sum(
+        mapped_bytes(df) for df in (sales_df, turnover_df, ensemble_df) if df is not None
+    )
+    if inference_engine is not None:
+        footprint["shared"] += model_mapped_bytes(inference_engine)
+    return footprint
+
+# Artifact reload (admin)
+def _check_admin_token(token: Optional[str]) -> None:
+    """Admin endpoints answer only to the configured JEWELAI_ADMIN_TOKEN; without one they stay closed"""
+    expected = os.environ.get("JEWELAI_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (JEWELAI_ADMIN_TOKEN is not set)")
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/api/admin/reload", status_code=202)
+def trigger_reload(x_admin_token: Optional[str] = Header(None)):
+    """Reload output/ artifacts in the background and swap them in when complete"""
+    _check_admin_token(x_admin_token)
+    started = reloader.trigger("admin request")
+    return dict(reloader.status(), accepted=True, queued=not started)
+
+@app.get("/api/admin/reload")
+def get_reload_status(x_admin_token: Optional[str] = Header(None)):
+    """Status of the most recent artifact reload"""
+    _check_admin_token(x_admin_token)
+    return dict(reloader.status(), data_version=data_version)
+
+# Voucher ingestion (admin)
+class VoucherRow(BaseModel):
+    voucher_date: str
+    label_no: str
+    category: str
+    store: str
+    value: float
+    purity: int
+    net_weight: Optional[float] = None
+    gold_rate_used: Optional[float] = None
+    product_category: Optional[str] = None
+
+class VoucherBatch(BaseModel):
+    rows: List[VoucherRow]
+
+@app.post("/api/ingest/vouchers")
+async def ingest_vouchers(batch: VoucherBatch, x_admin_token: Optional[str] = Header(None)):
+    """Add new voucher rows to the served sales data without reloading the CSV"""
+    _check_admin_token(x_admin_token)
+    if sales_rollup is None and market_features is None:
+        raise HTTPException(status_code=503, detail="Sales data not loaded")
+    rows = pd.DataFrame([row.dict() for row in batch.rows])
+    try:
+        added = await compute_pool.run("ingest", ingest_sales, rows, "api")
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid voucher rows: {e}")
+    return get_ingest_status_dict(ingested=added)
+
+def get_ingest_status_dict(**extra) -> Dict[str, Any]:
+    rollup = sales_rollup
+    return dict(
+        extra,
+        pending_rows=(len(rollup.delta) if rollup.delta is not None else 0) if rollup is not None
+        else _compaction["feature_rows"],
+        compact_threshold=INGEST_COMPACT_ROWS,
+        compacting=_compaction["running"],
+        compactions=_compaction["count"],
+        last_compaction_error=_compaction["last_error"],
+        tailer=tailer.status(),
+    )
+
+@app.get("/api/ingest/status")
+async def get_ingest_status(x_admin_token: Optional[str] = Header(None)):
+    """Ingested rows waiting for compaction, and the store file tailer's state"""
+    _check_admin_token(x_admin_token)
+    return get_ingest_status_dict()
+
+# Response cache counters
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Response cache size and hit/miss/eviction counters, and the prediction cache's"""
+    return dict(response_cache.stats(), data_version=data_version, predictions=prediction_service.stats())
+
+# Compute pool counters
+@app.get("/api/compute/stats")
+async def get_compute_stats():
+    """Compute pool size and per-endpoint running/waiting/shed counters"""
+    return compute_pool.stats()
+
+# Prometheus metrics (answered on the event loop)
+def _metric_families():
+    """Cache, compute pool, prediction grid and memory gauges alongside the request metrics"""
+    cache = response_cache.stats()
+    families = [
+        ("jewelai_response_cache_lookups_total", "counter", "Response cache lookups by result.",
+         [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])]),
+        ("jewelai_response_cache_not_modified_total", "counter", "Cache hits answered with 304 Not Modified.",
+         [({}, cache["not_modified"])]),
+        ("jewelai_response_cache_hit_ratio", "gauge", "Share of response cache lookups that hit.",
+         [({}, cache["hit_rate"])]),
+        ("jewelai_response_cache_entries", "gauge", "Responses held in the cache.", [({}, cache["entries"])]),
+        ("jewelai_response_cache_bytes", "gauge", "Bytes of responses held in the cache.", [({}, cache["bytes"])]),
+    ]
+    pool = compute_pool.stats()["endpoints"]
+    for name, help_text in (("running", "Compute calls running."), ("waiting", "Compute calls queued.")):
+        families.append((f"jewelai_compute_{name}", "gauge", help_text,
+                         [({"endpoint": endpoint}, counters[name]) for endpoint, counters in pool.items()]))
+    for name, help_text in (("completed", "Compute calls finished."), ("shed", "Compute calls rejected with 503.")):
+        families.append((f"jewelai_compute_{name}_total", "counter", help_text,
+                         [({"endpoint": endpoint}, counters[name]) for endpoint, counters in pool.items()]))
+    predictions = prediction_service.stats()
+    families += [
+        ("jewelai_prediction_cache_lookups_total", "counter", "Single prediction lookups by result.",
+         [({"result": name}, predictions[name]) for name in ("hits", "misses", "coalesced")]),
+        ("jewelai_prediction_cache_entries", "gauge", "Predictions held in the cache.", [({}, predictions["entries"])]),
+        ("jewelai_prediction_batches_total", "counter", "Micro-batches of single predictions scored.",
+         [({}, predictions["batches"])]),
+    ]
+    grid = prediction_grid
+    if grid is not None:
+        grid_stats = grid.stats()
+        families.append(("jewelai_prediction_grid_lookups_total", "counter", "Prediction grid lookups by result.",
+                         [({"result": "hit"}, grid_stats["hits"]), ({"result": "miss"}, grid_stats["misses"])]))
+    families.append(("jewelai_memory_bytes", "gauge", "Bytes held by each loaded data structure.",
+                     [({"component": name}, value) for name, value in memory_footprint.items()]))
+    families.append(("jewelai_data_version", "gauge", "Loads of the data artifacts so far.", [({}, data_version)]))
+    families.append(("jewelai_load_phase_seconds", "gauge", "Seconds per phase of the latest data load (and imports).",
+                     [({"phase": name, "role": ROLE}, seconds)
+                      for name, seconds in dict(imports=IMPORT_SECONDS, **load_timings).items()]))
+    return families
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request, phase, cache and compute metrics in Prometheus text format"""
+    return Response(content=request_metrics.render(_metric_families()), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/profile/slow")
+async def get_slow_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Sampled stacks of recent slow requests (JEWELAI_PROFILE_SLOW_MS enables the profiler)"""
+    _check_admin_token(x_admin_token)
+    if slow_profiler is None:
+        return {"enabled": False, "profiles": []}
+    return {
+        "enabled": True,
+        "threshold_ms": slow_profiler.threshold * 1000,
+        "interval_ms": slow_profiler.interval * 1000,
+        "profiles": list(slow_profiler.profiles),
+    }
+
+# Libraries the pickled model needs, reported by /health when a worker has imported them
+ML_LIBRARIES = ("sklearn", "xgboost")
 
-# Health check
+# Health check (answered on the event loop, never queued behind compute work)
 @app.get("/health")
-def health_check():
+async def health_check():
     """API health check endpoint"""
     return {
         "status": "healthy",
-        "data_loaded": turnover_df is not None,
+        "role": ROLE,
+        "data_loaded": data_version > 0,
         "model_loaded": ensemble_model_package is not None,
-        "inventory_items": len(turnover_df) if turnover_df is not None else 0
+        "model_source": model_source,
+        "model_load": model_loader.status() if model_loader is not None else None,
+        "data_plane": DATA_PLANE,
+        "inference": "fused" if inference_engine is not None else "models",
+        "prediction_grid": prediction_grid.stats() if prediction_grid is not None else None,
+        "market_features": market_features.stats() if market_features is not None else None,
+        "inventory_items": len(turnover_df) if turnover_df is not None else 0,
+        "memory_bytes": memory_footprint,
+        "startup_seconds": dict(imports=IMPORT_SECONDS, **load_timings),
+        # Only ever imported by unpickling a model, never by analytics workers
+        "ml_libraries": [name for name in ML_LIBRARIES if name in sys.modules],
     }
 
 if __name__ == "__main__":
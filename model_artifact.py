@@ -0,0 +1,232 @@
+# model_artifact.py
+"""Memory-mappable model artifact and background model loading
+
+ensemble_model.pkl holds the complete scikit-learn and XGBoost objects, so each
+worker unpickles its own copy of every tree before it can serve a prediction,
+and startup time grows with the number of trees. The artifact directory holds
+only what FusedEnsemble scores with: the scaler mean and scale, the folded
+linear coefficients and the flattened tree node arrays, one .npy file each,
+plus a manifest.json with the feature columns, the ensemble weights, the
+engine's constants and the fingerprint of the pickle it was exported from.
+Loaded with mmap=True the arrays are mapped read-only, so all workers share one
+copy through the page cache and loading takes milliseconds whatever the forest
+size.
+
+Artifacts are cache files, kept under the column cache directory (one per
+pickle path, see artifact_path()) rather than next to the pickle. Exports swap
+the directory in under an exclusive file lock and loads map it under a shared
+one, so workers exporting and loading at once never see a half-replaced
+artifact.
+
+ModelLoader runs a model load on a background thread (started at once, or by
+the first caller that needs the model) and reports its progress.
+
+Usage: python model_artifact.py build    # export output/ensemble_model.pkl
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from inference import TREE_ARRAYS, FusedEnsemble
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process exports only
+    fcntl = None
+
+# Bump when the on-disk layout changes so older artifacts are re-exported
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def source_fingerprint(path: Path) -> Optional[Dict]:
+    """Identity of the pickle an artifact is exported from, or None if it is missing"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return {'format': ARTIFACT_FORMAT_VERSION, 'source': path.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def artifact_path(source: Path, cache_dir: Path) -> Path:
+    """Cache directory for the artifact exported from this pickle (keyed on its resolved path)"""
+    digest = hashlib.sha256(str(source.resolve()).encode()).hexdigest()[:16]
+    return cache_dir / f"{source.stem}-{digest}.model"
+
+
+@contextmanager
+def _artifact_lock(target: Path, exclusive: bool):
+    """Cross-process lock on an artifact: shared while it is mapped, exclusive while it is replaced"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target.parent / f".{target.name}.lock", 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_manifest(target: Path) -> Optional[Dict]:
+    try:
+        with open(target / "manifest.json", 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(target: Path, source: Path) -> bool:
+    """Whether the artifact can be served: exported from the current pickle, or the pickle is gone"""
+    manifest = read_manifest(target)
+    if manifest is None or manifest.get('format') != ARTIFACT_FORMAT_VERSION:
+        return False
+    fingerprint = source_fingerprint(source)
+    return fingerprint is None or manifest.get('source') == fingerprint
+
+
+def export_artifact(engine: FusedEnsemble, target: Path, source: Path) -> None:
+    """Write a full-ensemble engine as an artifact directory, replacing target atomically"""
+    if engine.models != list(engine.package['base_models']):
+        raise ValueError("only engines over every base model can be exported")
+    arrays, constants = engine.export_state()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+    try:
+        for i, (name, array) in enumerate(arrays.items()):
+            np.save(tmp / f"{i}.npy", np.ascontiguousarray(array))
+        manifest = {
+            'format': ARTIFACT_FORMAT_VERSION,
+            'source': source_fingerprint(source),
+            'feature_columns': list(engine.package['feature_columns']),
+            'base_models': list(engine.package['base_models']),
+            'weights': np.asarray(engine.package['weights'], dtype=np.float64).tolist(),
+            'constants': constants,
+            'arrays': list(arrays),
+        }
+        with open(tmp / "manifest.json", 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Not while another process is mapping the current artifact (or replacing it too)
+        with _artifact_lock(target, exclusive=True):
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def load_artifact(target: Path, mmap: bool = True,
+                  progress: Optional[Callable[[float], None]] = None) -> FusedEnsemble:
+    """Engine over the artifact's arrays; its .package carries feature_columns, weights and base_models"""
+    # Mappings stay valid once made, even if the files are replaced afterwards
+    with _artifact_lock(target, exclusive=False):
+        manifest = read_manifest(target)
+        if manifest is None or manifest.get('format') != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"{target} is not a model artifact (format {ARTIFACT_FORMAT_VERSION})")
+        arrays = {}
+        for i, name in enumerate(manifest['arrays']):
+            # Plain ndarray views of the mapping: np.memmap's own indexing is slow in the tree walk
+            arrays[name] = np.asarray(np.load(target / f"{i}.npy", mmap_mode='r' if mmap else None))
+            if progress is not None:
+                progress((i + 1) / len(manifest['arrays']))
+    package = {
+        'feature_columns': manifest['feature_columns'],
+        'base_models': manifest['base_models'],  # Names only; the model objects stay in the pickle
+        'weights': np.asarray(manifest['weights'], dtype=np.float64),
+    }
+    return FusedEnsemble.from_state(package, arrays, manifest['constants'])
+
+
+def mapped_bytes(engine: FusedEnsemble) -> int:
+    """Bytes of the engine's arrays that are memory-mapped from an artifact and shared across workers"""
+    arrays = [engine.coef, engine.mean, engine.scale] + [getattr(engine.trees, name) for name in TREE_ARRAYS]
+    return int(sum(a.nbytes for a in arrays if isinstance(a.base, np.memmap)))
+
+
+class ModelLoader:
+    """Runs `load(report)` once on a background thread and hands its result to `install(loader, state)`.
+
+    `load` calls `report(phase, progress)` as it goes. The thread starts with
+    start(), or with the first wait(); `future` resolves once the result is
+    installed, so async callers can await it without holding a thread.
+    """
+
+    def __init__(self, load: Callable[[Callable[[str, float], None]], Dict],
+                 install: Callable[['ModelLoader', Dict], None]):
+        self._load = load
+        self._install = install
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.future: Future = Future()
+        self.phase = "pending"
+        self.progress = 0.0
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self.start()
+        try:
+            self.future.result(timeout)
+        except Exception:
+            pass
+        return self.future.done()
+
+    def report(self, phase: str, progress: float) -> None:
+        self.phase, self.progress = phase, progress
+
+    def _run(self) -> None:
+        self.started_at = time.perf_counter()
+        try:
+            state = self._load(self.report)
+            self._install(self, state)
+        except Exception as e:
+            self.error = str(e)
+            self.report("failed", self.progress)
+            self.seconds = time.perf_counter() - self.started_at
+            print(f"⚠ Model loading failed (predictions disabled): {e}")
+            self.future.set_exception(e)
+            return
+        self.report("ready", 1.0)
+        self.seconds = time.perf_counter() - self.started_at
+        self.future.set_result(state)
+
+    def status(self) -> Dict:
+        running = self.started_at is not None and self.seconds is None
+        return {
+            "phase": self.phase,
+            "progress": round(self.progress, 3),
+            "seconds": round(time.perf_counter() - self.started_at if running else self.seconds or 0.0, 3),
+            "error": self.error,
+        }
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    import main
+    with open(main.MODEL_PATH, 'rb') as f:
+        engine = FusedEnsemble(pickle.load(f))
+    export_artifact(engine, main.MODEL_ARTIFACT_DIR, main.MODEL_PATH)
+    print(f"✓ Exported {len(engine.trees)} trees to {main.MODEL_ARTIFACT_DIR}")
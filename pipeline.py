@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Offline regeneration of the output/ data artifacts from the raw dataset
+
+Stages, each rebuilt only when one of its inputs (or the pipeline version)
+changed since its outputs were written; content digests are kept in
+output/.pipeline_state.json:
+
+  denormalize  sales_data.csv (MAIN_STORE) and store_N_sales.csv joined with
+               item_master, accounts and weight_slab, plus date, slab and price
+               features -> processed_main_store.csv, processed_market_data.csv
+  turnover     predicted_potential_sales.csv -> inventory_turnover_predictions.csv,
+               high_risk_inventory.csv, turnover_by_category.csv, turnover_metrics.json
+
+Each store's sales file is streamed in chunks and joined against hash indexes
+of the dimension tables in its own process pool worker. Missing values are
+filled with dataset-wide medians and modes, and relative_price is relative to
+the dataset-wide mean gold rate, so workers first write denormalized parts and
+report their statistics, then fill and encode their parts with the merged
+statistics; the parent only concatenates the encoded parts.
+
+Not regenerated: the model training outputs (ensemble_*, model_*_sales.pkl,
+metrics_*.json, predicted_existing_sales.csv, predicted_potential_sales.csv),
+whose training scripts are not part of the repo.
+
+Usage: python pipeline.py [--stages denormalize turnover] [--jobs N] [--force]
+                          [--raw-dir Data/jewellery_multi_store_dataset] [--output-dir output]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).parent
+RAW_DIR = BASE_DIR / "Data" / "jewellery_multi_store_dataset"
+OUTPUT_DIR = Path(os.environ.get("JEWELAI_DATA_DIR", BASE_DIR / "output"))
+
+# Bumped when a stage's outputs change for the same inputs, so they are rebuilt
+PIPELINE_VERSION = 1
+STATE_FILE = ".pipeline_state.json"
+CHUNK_ROWS = 100_000
+STAGES = ('denormalize', 'turnover')
+
+# Store files assign slabs by gross weight alone: (upper bound, slab_id), lower bound inclusive
+STORE_SLAB_BINS = ((5, 1), (10, 10), (15, 19), (20, 11), (30, 20), (40, 12), (np.inf, 9))
+# Month-day ranges (inclusive) of the festival season
+FESTIVAL_PERIODS = (('08-20', '09-07'), ('10-15', '10-25'))
+# Store files name the account columns as customer fields
+STORE_ACCOUNT_COLUMNS = {
+    'account_id': 'acct_account_id',
+    'account_name': 'customer_name',
+    'account_type': 'customer_type',
+    'credit_terms': 'customer_credit_terms',
+    'contact': 'customer_contact',
+}
+FEATURE_COLUMNS = ['month', 'week', 'day_of_week', 'is_weekend', 'is_festival_period',
+                   'min_wt', 'max_wt', 'price_per_gram', 'relative_price']
+
+# Turnover: demand is per month of sales history; risk weighs time to sell and slab demand equally
+DAYS_PER_MONTH = 30
+MAX_DAYS_TO_SELL = 365
+HIGH_RISK_SCORE = 70
+SLOW_MOVING_DAYS = 30
+TURNOVER_CATEGORIES = ((7, 'Fast (< 1 week)'), (30, 'Medium (1-4 weeks)'), (90, 'Slow (1-3 months)'),
+                       (np.inf, 'Very Slow (3+ months)'))
+PRICE_BRACKETS = ((30000, 'Budget(<30K)'), (60000, 'Mid(30-60K)'), (100000, 'Premium(60-100K)'),
+                  (200000, 'Luxury(100-200K)'), (np.inf, 'Ultra(200K+)'))
+
+
+# Inputs and incremental state
+def sales_sources(raw_dir: Path) -> List[Tuple[str, Path, str]]:
+    """(store, path, kind) of every sales file: the main store's first, then STORE_1, STORE_2, ..."""
+    stores = []
+    for path in raw_dir.glob("store_*_sales.csv"):
+        match = re.fullmatch(r"store_(\d+)_sales\.csv", path.name)
+        if match:
+            stores.append((int(match.group(1)), path))
+    return [("MAIN_STORE", raw_dir / "sales_data.csv", "main")] + [
+        (f"STORE_{n}", path, "store") for n, path in sorted(stores)
+    ]
+
+
+def _digest(path: Path) -> Optional[str]:
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_state(output_dir: Path) -> Dict[str, Any]:
+    try:
+        with open(output_dir / STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(output_dir: Path, state: Dict[str, Any]) -> None:
+    tmp = output_dir / f".{STATE_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, output_dir / STATE_FILE)
+
+
+def _fingerprint(inputs: Sequence[Path]) -> Dict[str, Any]:
+    return {"version": PIPELINE_VERSION, "inputs": {str(path): _digest(path) for path in inputs}}
+
+
+def _up_to_date(recorded: Optional[Dict], fingerprint: Dict, outputs: Sequence[Path]) -> bool:
+    if not recorded or {k: recorded.get(k) for k in fingerprint} != fingerprint:
+        return False
+    return all(recorded.get("outputs", {}).get(path.name) == _digest(path) for path in outputs)
+
+
+# Denormalization (runs in the pool workers)
+_dimensions: Dict[str, Dict[str, pd.DataFrame]] = {}
+
+
+def _load_dimensions(raw_dir: Path) -> Dict[str, pd.DataFrame]:
+    """item_master, accounts and weight_slab indexed by their keys (loaded once per worker)"""
+    key = str(raw_dir)
+    if key not in _dimensions:
+        _dimensions[key] = {
+            "items": pd.read_csv(raw_dir / "item_master.csv").set_index("label_no", drop=False),
+            "accounts": pd.read_csv(raw_dir / "accounts.csv").set_index("account_id", drop=False),
+            "slabs": pd.read_csv(raw_dir / "weight_slab.csv").set_index("slab_id", drop=False),
+        }
+    return _dimensions[key]
+
+
+def _lookup(table: pd.DataFrame, keys: pd.Series, columns: Sequence[str]) -> pd.DataFrame:
+    """Left join of keys onto table's index (a hash lookup); missing keys give NaN rows"""
+    return table[list(columns)].reindex(keys.to_numpy()).reset_index(drop=True)
+
+
+def denormalize_chunk(chunk: pd.DataFrame, kind: str, dims: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Sales rows joined with their item, account and slab, laid out as the denormalized files"""
+    chunk = chunk.reset_index(drop=True)
+    items, accounts, slabs = dims["items"], dims["accounts"], dims["slabs"]
+    if kind == "main":
+        # The item's slab; item columns the sale also has get an _item suffix
+        item = _lookup(items, chunk["label_no"], [c for c in items.columns if c != "label_no"])
+        item.columns = [f"{c}_item" if c in chunk.columns else c for c in item.columns]
+        account = _lookup(accounts, chunk["account_id"], [c for c in accounts.columns if c != "account_id"])
+        slab = _lookup(slabs, item["slab_id"], ["slab_label", "product_category"])
+        out = pd.concat([chunk, item, account, slab], axis=1)
+        out["store"] = out["location_to"]
+        return out
+
+    # Store files: a slab by gross weight, then the item and account under prefixed names
+    weights = chunk["gross_weight"].to_numpy(dtype=np.float64)
+    bins = np.searchsorted([upper for upper, _ in STORE_SLAB_BINS], weights, side='right')
+    slab_ids = np.array([slab_id for _, slab_id in STORE_SLAB_BINS] + [-1])[np.where(np.isnan(weights), -1, bins)]
+    slab_id = pd.Series(slab_ids).where(slab_ids >= 0)
+    if slab_id.notna().all():
+        slab_id = slab_id.astype(np.int64)
+    item = _lookup(items, chunk["label_no"], items.columns).add_prefix("item_")
+    account = _lookup(accounts, chunk["account_id"], list(STORE_ACCOUNT_COLUMNS)).rename(columns=STORE_ACCOUNT_COLUMNS)
+    slab = _lookup(slabs, slab_id, ["slab_label"])
+    return pd.concat([chunk, pd.DataFrame({"slab_id": slab_id}), slab, item, account], axis=1)
+
+
+def add_row_features(df: pd.DataFrame, slabs: pd.DataFrame) -> pd.DataFrame:
+    """Date, slab and price features computed from each row alone (relative_price needs the whole data)"""
+    dates = pd.to_datetime(df["voucher_date"])
+    df["month"] = dates.dt.month
+    df["week"] = dates.dt.isocalendar().week.astype(int).to_numpy()
+    df["day_of_week"] = dates.dt.dayofweek
+    df["is_weekend"] = (df["day_of_week"] >= 5).astype(int)
+    # Month and day as MMDD, so the month-day ranges compare as integers
+    month_day = (df["month"] * 100 + dates.dt.day).to_numpy()
+    festival = np.zeros(len(df), dtype=bool)
+    for first, last in FESTIVAL_PERIODS:
+        festival |= (month_day >= int(first.replace("-", ""))) & (month_day <= int(last.replace("-", "")))
+    df["is_festival_period"] = festival.astype(int)
+    slab = _lookup(slabs, df["slab_id"], ["min_wt", "max_wt", "product_category"])
+    df["min_wt"] = slab["min_wt"].to_numpy()
+    df["max_wt"] = slab["max_wt"].to_numpy()
+    # Store files carry no product category; the slab's is used
+    if "product_category" in df.columns:
+        df["product_category"] = df["product_category"].fillna(slab["product_category"])
+    else:
+        df["product_category"] = slab["product_category"].to_numpy()
+    df["price_per_gram"] = df["value"] / (df["net_weight"] + 1e-6)
+    return df
+
+
+def _denormalize_source(store: str, path: Path, kind: str, raw_dir: Path, part_dir: Path,
+                        chunk_rows: int) -> Dict[str, Any]:
+    """Pass 1: denormalized parts of one sales file, with their columns, dtypes and missing-value columns"""
+    dims = _load_dimensions(raw_dir)
+    parts, dtypes, missing, gold = [], {}, set(), []
+    columns: List[str] = []
+    for k, chunk in enumerate(pd.read_csv(path, chunksize=chunk_rows)):
+        df = add_row_features(denormalize_chunk(chunk, kind, dims), dims["slabs"])
+        part = part_dir / f"{store}-{k:05d}.pkl"
+        df.to_pickle(part)
+        parts.append(str(part))
+        columns += [c for c in df.columns if c not in dtypes]
+        for column in df.columns:
+            dtypes.setdefault(column, set()).add(str(df[column].dtype))
+        missing.update(df.columns[df.isna().any()].tolist())
+        gold.append(df["gold_rate_used"].to_numpy(dtype=np.float64))
+    return {
+        "store": store, "kind": kind, "parts": parts, "columns": columns, "dtypes": dtypes, "missing": missing,
+        "gold": np.concatenate(gold) if gold else np.empty(0),
+    }
+
+
+def _value_counts(parts: Sequence[str], columns: Sequence[str]) -> Dict[str, pd.Series]:
+    """Pass 2: counts of each non-missing value of the columns across parts"""
+    counts: Dict[str, pd.Series] = {}
+    for part in parts:
+        df = pd.read_pickle(part)
+        for column in columns:
+            if column in df.columns:
+                values = df[column].astype(object).value_counts(dropna=True)
+                counts[column] = values if column not in counts else counts[column].add(values, fill_value=0)
+    return counts
+
+
+def _encode_parts(parts: Sequence[str], out: str, columns: Sequence[str], dtypes: Dict[str, str],
+                  fills: Dict[str, Any], gold_mean: float) -> int:
+    """Pass 3: parts with the dataset-wide columns, dtypes, relative prices and fills, as CSV rows"""
+    rows = 0
+    with open(out, 'w', newline='') as f:
+        for part in parts:
+            df = pd.read_pickle(part).reindex(columns=columns)
+            df["relative_price"] = df["gold_rate_used"] / gold_mean
+            for column, dtype in dtypes.items():
+                if str(df[column].dtype) != dtype:
+                    df[column] = df[column].astype(dtype)
+            df = df.fillna({column: value for column, value in fills.items() if value is not None})
+            df.to_csv(f, header=False, index=False)
+            rows += len(df)
+    return rows
+
+
+def _common_dtype(dtypes: set, everywhere: bool) -> str:
+    """The dtype pandas.concat gives a column with these part dtypes (absent from some parts unless everywhere)"""
+    if len(dtypes) == 1 and everywhere:
+        return next(iter(dtypes))
+    kinds = [np.dtype(d).kind if d not in ('str', 'string', 'object', 'category') else 'O' for d in dtypes]
+    if all(kind in 'iuf' for kind in kinds):
+        return 'float64'
+    return 'object'
+
+
+def _fill_value(counts: Optional[pd.Series], numeric: bool):
+    """Median of a numeric column, mode of any other (smallest of tied values), None if it has no values"""
+    if counts is None or not len(counts):
+        return None
+    if numeric:
+        counts = counts.groupby(counts.index.astype(np.float64)).sum().sort_index()
+        cumulative = counts.to_numpy().cumsum()
+        total = int(cumulative[-1])
+        values = counts.index.to_numpy()
+        lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+        upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+        return (lower + upper) / 2 if lower != upper else lower
+    top = counts[counts == counts.max()].index
+    try:
+        return sorted(top)[0]
+    except TypeError:
+        return top[0]
+
+
+def _pool_map(fn: Callable, calls: Sequence[Tuple], jobs: int) -> List:
+    if jobs <= 1 or len(calls) <= 1:
+        return [fn(*args) for args in calls]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(calls))) as pool:
+        return [future.result() for future in [pool.submit(fn, *args) for args in calls]]
+
+
+def _dataset_layout(sources: Sequence[Dict], gold_parts: Sequence[np.ndarray]):
+    """Columns, dtypes, fill columns and mean gold rate of the concatenation of these sources"""
+    columns: List[str] = []
+    for source in sources:
+        columns += [c for c in source["columns"] if c not in columns]
+    # The features follow every source's own columns (relative_price is computed in pass 3)
+    columns = [c for c in columns if c not in FEATURE_COLUMNS] + FEATURE_COLUMNS
+    dtypes = {}
+    for column in columns:
+        if column == "relative_price":
+            dtypes[column] = "float64"
+            continue
+        found = set().union(*(s["dtypes"].get(column, set()) for s in sources))
+        dtypes[column] = _common_dtype(found, all(column in s["dtypes"] for s in sources))
+    fill_columns = sorted(set().union(*(s["missing"] for s in sources)) |
+                          {c for c in columns if c != "relative_price" and not all(c in s["dtypes"] for s in sources)})
+    gold = pd.Series(np.concatenate(gold_parts) if gold_parts else np.empty(0))
+    return columns, dtypes, fill_columns, float(gold.mean())
+
+
+def run_denormalize(raw_dir: Path, output_dir: Path, jobs: int, chunk_rows: int) -> Dict[str, int]:
+    """Write processed_main_store.csv and processed_market_data.csv; returns rows written per file"""
+    sources = sales_sources(raw_dir)
+    with tempfile.TemporaryDirectory(prefix=".pipeline-", dir=output_dir) as tmp:
+        part_dir = Path(tmp)
+        results = _pool_map(_denormalize_source,
+                            [(store, path, kind, raw_dir, part_dir, chunk_rows) for store, path, kind in sources], jobs)
+        main = [r for r in results if r["kind"] == "main"]
+        outputs = {"processed_main_store.csv": main, "processed_market_data.csv": results}
+
+        # Dataset-wide statistics for each output, merged from per-source value counts
+        layouts = {name: _dataset_layout(group, [r["gold"] for r in group]) for name, group in outputs.items()}
+        wanted = sorted(set().union(*(set(layout[2]) for layout in layouts.values())))
+        counts = _pool_map(_value_counts, [(r["parts"], wanted) for r in results], jobs)
+        by_store = {r["store"]: c for r, c in zip(results, counts)}
+
+        calls, pieces = [], {}
+        for name, group in outputs.items():
+            columns, dtypes, fill_columns, gold_mean = layouts[name]
+            fills = {}
+            for column in fill_columns:
+                merged = None
+                for source in group:
+                    values = by_store[source["store"]].get(column)
+                    if values is not None:
+                        merged = values if merged is None else merged.add(values, fill_value=0)
+                numeric = np.dtype(dtypes[column]).kind in 'iuf' if dtypes[column] != 'object' else False
+                fills[column] = _fill_value(merged, numeric)
+            pieces[name] = []
+            for source in group:
+                piece = str(part_dir / f"{name}.{source['store']}.csv")
+                pieces[name].append(piece)
+                calls.append((source["parts"], piece, columns, dtypes, fills, gold_mean))
+        rows = _pool_map(_encode_parts, calls, jobs)
+
+        written = {}
+        for name, files in pieces.items():
+            columns = layouts[name][0]
+            tmp_out = output_dir / f".{name}.tmp"
+            with open(tmp_out, 'w', newline='') as out:
+                pd.DataFrame(columns=columns).to_csv(out, index=False)
+                for piece in files:
+                    with open(piece) as f:
+                        shutil.copyfileobj(f, out, 1 << 20)
+            os.replace(tmp_out, output_dir / name)
+            written[name] = sum(n for n, call in zip(rows, calls) if call[1] in files)
+    return written
+
+
+# Turnover
+def build_turnover(potential: pd.DataFrame, as_of: pd.Timestamp) -> Tuple[pd.DataFrame, pd.DataFrame,
+                                                                           pd.DataFrame, Dict[str, Any]]:
+    """Inventory turnover predictions, high-risk items, per-category summary and metrics.
+
+    days_to_sell is a month over the category's monthly market demand (at least
+    a day); the risk score adds up to 50 for a year to sell and up to 50 for the
+    lowest slab demand relative to the highest.
+    """
+    df = potential.copy()
+    demand_columns = ["market_demand_per_slab", "market_demand_per_category"]
+    df = df[[c for c in df.columns if c not in demand_columns] + demand_columns]
+    days = np.ceil(DAYS_PER_MONTH / df["market_demand_per_category"].to_numpy(dtype=np.float64))
+    df["days_to_sell"] = np.clip(np.nan_to_num(days, nan=MAX_DAYS_TO_SELL), 1, MAX_DAYS_TO_SELL)
+    df["estimated_sell_date"] = (as_of + pd.to_timedelta(df["days_to_sell"], unit="D")).dt.strftime("%Y-%m-%d")
+    bounds = [upper for upper, _ in TURNOVER_CATEGORIES]
+    labels = np.array([label for _, label in TURNOVER_CATEGORIES])
+    df["turnover_category"] = labels[np.searchsorted(bounds, df["days_to_sell"].to_numpy(), side='right')]
+    slab_demand = df["market_demand_per_slab"]
+    df["inventory_risk_score"] = (df["days_to_sell"] / MAX_DAYS_TO_SELL * 50
+                                  + (50 - slab_demand / slab_demand.max() * 50))
+    df["price_bracket"] = pd.cut(df["predicted_potential_sales"], [0] + [upper for upper, _ in PRICE_BRACKETS],
+                                 labels=[label for _, label in PRICE_BRACKETS])
+
+    high_risk = df[df["inventory_risk_score"] >= HIGH_RISK_SCORE].sort_values("inventory_risk_score", ascending=False)
+    by_category = df.groupby("category").agg(
+        Avg_Days=("days_to_sell", "mean"),
+        Median_Days=("days_to_sell", "median"),
+        Min_Days=("days_to_sell", "min"),
+        Max_Days=("days_to_sell", "max"),
+        Avg_Risk=("inventory_risk_score", "mean"),
+        Total_Value=("predicted_potential_sales", "sum"),
+        Item_Count=("label_no", "count"),
+    ).round(2)
+    slow = df["days_to_sell"] > SLOW_MOVING_DAYS
+    metrics = {
+        "total_items": int(len(df)),
+        "avg_days_to_sell": float(df["days_to_sell"].mean()),
+        "median_days_to_sell": float(df["days_to_sell"].median()),
+        "fast_moving_items": int((df["turnover_category"] == TURNOVER_CATEGORIES[0][1]).sum()),
+        "slow_moving_items": int(slow.sum()),
+        "high_risk_items": int(len(high_risk)),
+        "total_inventory_value": float(df["predicted_potential_sales"].sum()),
+        "slow_moving_value": float(df.loc[slow, "predicted_potential_sales"].sum()),
+        "high_risk_value": float(high_risk["predicted_potential_sales"].sum()),
+        "turnover_distribution": {k: int(v) for k, v in df["turnover_category"].value_counts().items()},
+    }
+    return df, high_risk, by_category, metrics
+
+
+def run_turnover(raw_dir: Path, output_dir: Path) -> Dict[str, int]:
+    potential = pd.read_csv(output_dir / "predicted_potential_sales.csv")
+    # Inventory is valued as of the item master snapshot
+    created = pd.read_csv(raw_dir / "item_master.csv", usecols=["created_at"])["created_at"]
+    as_of = pd.to_datetime(created).max().normalize()
+    turnover, high_risk, by_category, metrics = build_turnover(potential, as_of)
+    _write_csv(turnover, output_dir / "inventory_turnover_predictions.csv", index=False)
+    _write_csv(high_risk, output_dir / "high_risk_inventory.csv", index=False)
+    _write_csv(by_category, output_dir / "turnover_by_category.csv")
+    tmp = output_dir / ".turnover_metrics.json.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(metrics, f, indent=4)
+    os.replace(tmp, output_dir / "turnover_metrics.json")
+    return {"inventory_turnover_predictions.csv": len(turnover), "high_risk_inventory.csv": len(high_risk),
+            "turnover_by_category.csv": len(by_category)}
+
+
+def _write_csv(df: pd.DataFrame, path: Path, **kwargs) -> None:
+    tmp = path.parent / f".{path.name}.tmp"
+    df.to_csv(tmp, **kwargs)
+    os.replace(tmp, path)
+
+
+def stage_files(stage: str, raw_dir: Path, output_dir: Path) -> Tuple[List[Path], List[Path]]:
+    """Inputs and outputs of a stage"""
+    if stage == "denormalize":
+        inputs = [path for _, path, _ in sales_sources(raw_dir)]
+        inputs += [raw_dir / "item_master.csv", raw_dir / "accounts.csv", raw_dir / "weight_slab.csv"]
+        return inputs, [output_dir / "processed_main_store.csv", output_dir / "processed_market_data.csv"]
+    inputs = [output_dir / "predicted_potential_sales.csv", raw_dir / "item_master.csv"]
+    outputs = [output_dir / name for name in ("inventory_turnover_predictions.csv", "high_risk_inventory.csv",
+                                              "turnover_by_category.csv", "turnover_metrics.json")]
+    return inputs, outputs
+
+
+def run(stages: Sequence[str] = STAGES, raw_dir: Path = RAW_DIR, output_dir: Path = OUTPUT_DIR,
+        jobs: Optional[int] = None, chunk_rows: int = CHUNK_ROWS, force: bool = False) -> Dict[str, str]:
+    """Rebuild the stages whose inputs changed; returns 'rebuilt' or 'up to date' per stage"""
+    jobs = jobs or os.cpu_count() or 1
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state = _load_state(output_dir)
+    status = {}
+    for stage in stages:
+        inputs, outputs = stage_files(stage, raw_dir, output_dir)
+        absent = [path.name for path in inputs if not path.exists()]
+        if absent:
+            raise FileNotFoundError(f"{stage}: missing inputs {', '.join(absent)}")
+        fingerprint = _fingerprint(inputs)
+        if not force and _up_to_date(state.get(stage), fingerprint, outputs):
+            print(f"✓ {stage}: up to date")
+            status[stage] = "up to date"
+            continue
+        started = time.perf_counter()
+        if stage == "denormalize":
+            written = run_denormalize(raw_dir, output_dir, jobs, chunk_rows)
+        else:
+            written = run_turnover(raw_dir, output_dir)
+        state[stage] = dict(fingerprint, outputs={path.name: _digest(path) for path in outputs})
+        _save_state(output_dir, state)
+        summary = ", ".join(f"{name} ({rows} rows)" for name, rows in written.items())
+        print(f"✓ {stage}: wrote {summary} in {time.perf_counter() - started:.1f}s")
+        status[stage] = "rebuilt"
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the output/ data artifacts from the raw dataset")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--raw-dir", type=Path, default=RAW_DIR)
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="sales rows read per chunk")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the inputs did not change")
+    args = parser.parse_args()
+    run(args.stages, args.raw_dir, args.output_dir, args.jobs, args.chunk_rows, args.force)
+
+
+if __name__ == "__main__":
+    main()
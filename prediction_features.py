@@ -0,0 +1,152 @@
+# prediction_features.py
+"""Vectorized feature construction and ensemble scoring for sales predictions"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Sequence, Tuple
+
+# Request category aliases for each one-hot product category column
+PRODUCT_CATEGORY_ALIASES = {
+    'GOLD BRACELET': ('BRACELET', 'GOLD BRACELET'),
+    'GOLD CHAINS': ('CHAIN', 'GOLD CHAINS'),
+    'GOLD EARRING': ('EARRING', 'GOLD EARRING'),
+    'GOLD NECKLACE': ('NECKLACE', 'GOLD NECKLACE'),
+    'GOLD RINGS': ('RING', 'GOLD RINGS'),
+}
+
+# One-hot product category of each request category alias
+_ALIAS_PRODUCT = {alias: product for product, aliases in PRODUCT_CATEGORY_ALIASES.items() for alias in aliases}
+
+# Lower bounds (grams) of each weight category, in ascending order
+WEIGHT_CATEGORIES = (('Light', 0), ('Medium', 5), ('Heavy', 10), ('Very_Heavy', 20), ('Ultra_Heavy', 50))
+
+# Lower bounds (estimated item price) of each price bracket, in ascending order
+PRICE_BRACKETS = (('Budget', 0), ('Mid', 20000), ('Premium', 50000), ('Luxury', 100000), ('Ultra', 200000))
+
+STORE_IDS = ('MAIN_STORE', 'STORE_1', 'STORE_2', 'STORE_3', 'STORE_4', 'STORE_5', 'STORE_6')
+
+# Market features for predictions made without a feature store (see feature_store.py), and its fallbacks
+DEFAULT_MARKET_FEATURES = {
+    'is_festival': 0,
+    'market_share': 13.0,
+    'category_avg_market': 90000,
+    'store_avg_sales': 95000,
+    'sales_momentum': 92000,
+}
+
+
+def price_per_gram(purity: np.ndarray) -> np.ndarray:
+    """Estimated gold price per gram: 22K -> 6000, 18K -> 5500, anything else -> 6500"""
+    return np.where(purity == 22, 6000.0, np.where(purity == 18, 5500.0, 6500.0))
+
+
+def feature_key(category: str, net_weight: float, voucher_date: str, purity: float, store_id: str) -> Tuple:
+    """The request fields reduced to what build_feature_matrix reads from them.
+
+    Requests with equal keys get identical feature rows, so 'RING' and 'gold rings',
+    or purities 14 and 24, share one key.
+    """
+    return (
+        _ALIAS_PRODUCT.get(str(category).upper()),
+        float(net_weight),
+        str(voucher_date),
+        float(price_per_gram(np.float64(purity))),
+        store_id if store_id in STORE_IDS else None,
+    )
+
+
+def _bucket(values: np.ndarray, bounds: Sequence[Tuple[str, float]]) -> np.ndarray:
+    """Index of the [lower, next lower) bucket each value falls into"""
+    edges = np.array([lower for _, lower in bounds[1:]], dtype=np.float64)
+    return np.searchsorted(edges, values, side='right')
+
+
+def _parse_dates(voucher_dates: Sequence[str], errors: str = 'raise') -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(pd.to_datetime(pd.Series(voucher_dates, dtype=object), format='%Y-%m-%d', errors=errors))
+
+
+def invalid_dates(voucher_dates: Sequence[str]) -> np.ndarray:
+    """Positions of the voucher dates build_feature_matrix cannot parse as YYYY-MM-DD"""
+    return np.flatnonzero(np.isnat(_parse_dates(voucher_dates, errors='coerce').to_numpy()))
+
+
+def build_feature_matrix(
+    categories: Sequence[str],
+    net_weights: Sequence[float],
+    voucher_dates: Sequence[str],
+    purities: Sequence[float],
+    store_ids: Sequence[str],
+    feature_columns: List[str],
+    market=None,
+) -> np.ndarray:
+    """Model input matrix (rows x feature_columns) built column-wise from request fields.
+
+    With a MarketFeatureStore as `market`, the market features and price per
+    gram are looked up per request; otherwise DEFAULT_MARKET_FEATURES and the
+    purity-based price per gram are used.
+    """
+    n = len(categories)
+    column_index = {name: i for i, name in enumerate(feature_columns)}
+    X = np.zeros((n, len(feature_columns)), dtype=np.float64)
+
+    def put(name: str, values) -> None:
+        if name in column_index:
+            X[:, column_index[name]] = values
+
+    # Date features
+    dates = _parse_dates(voucher_dates)
+    weekday = dates.weekday.to_numpy()
+    put('year', dates.year.to_numpy())
+    put('month', dates.month.to_numpy())
+    put('day', dates.day.to_numpy())
+    put('day_of_week', weekday)
+    put('week_of_year', dates.isocalendar()['week'].to_numpy(dtype=np.int64))
+    put('is_weekend', weekday >= 5)
+
+    # Numeric features
+    upper = pd.Series(categories, dtype=object).str.upper()
+    net_weight = np.asarray(net_weights, dtype=np.float64)
+    ppg = price_per_gram(np.asarray(purities, dtype=np.float64))
+    for name, value in DEFAULT_MARKET_FEATURES.items():
+        put(name, value)
+    if market is not None:
+        products = [_ALIAS_PRODUCT.get(c) for c in upper.tolist()]
+        features = market.lookup(products, store_ids, dates)
+        ppg = np.where(np.isnan(features['price_per_gram']), ppg, features['price_per_gram'])
+        for name in ('market_share', 'category_avg_market', 'store_avg_sales', 'sales_momentum'):
+            put(name, features[name])
+    put('net_weight', net_weight)
+    put('price_per_gram', ppg)
+
+    # Product category (one-hot encoded)
+    for product_category, aliases in PRODUCT_CATEGORY_ALIASES.items():
+        put(f'product_category_{product_category}', upper.isin(aliases).to_numpy())
+
+    # Weight category and price bracket (one-hot encoded)
+    weight_bucket = _bucket(net_weight, WEIGHT_CATEGORIES)
+    for i, (name, _) in enumerate(WEIGHT_CATEGORIES):
+        put(f'weight_category_{name}', weight_bucket == i)
+    price_bucket = _bucket(ppg * net_weight, PRICE_BRACKETS)
+    for i, (name, _) in enumerate(PRICE_BRACKETS):
+        put(f'price_bracket_{name}', price_bucket == i)
+
+    # Store ID (one-hot encoded)
+    stores = np.asarray(store_ids, dtype=object)
+    for store_id in STORE_IDS:
+        put(f'store_id_{store_id}', stores == store_id)
+
+    return X
+
+
+def predict_matrix(model_package: Dict, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Weighted ensemble prediction per row, plus the (models x rows) base model predictions"""
+    feature_columns = model_package['feature_columns']
+    scaler = model_package['scaler']
+    # The scaler was fitted on a named frame; wrapping the array keeps it quiet without copying
+    X_scaled = scaler.transform(pd.DataFrame(X, columns=feature_columns, copy=False))
+
+    base_predictions = np.vstack([
+        np.asarray(model.predict(X_scaled), dtype=np.float64)
+        for model in model_package['base_models'].values()
+    ])
+    weights = np.asarray(model_package['weights'], dtype=np.float64)
+    return weights @ base_predictions, base_predictions
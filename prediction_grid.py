@@ -0,0 +1,249 @@
+# prediction_grid.py
+"""Precomputed prediction table for the common request space, answered by interpolation
+
+For one model package and one set of market features (DEFAULT_MARKET_FEATURES,
+or a MarketFeatureStore), a prediction depends only on category, store, purity,
+date and net weight. Category, store and purity each map onto a handful of
+distinct feature patterns (with a feature store the price per gram comes from
+the store's gold rate, so purity drops out), and the dates of a configured
+window are enumerated, so everything but the weight is a table index. Along
+the weight axis the model is scored at evenly spaced knots inside every
+segment where the weight category and price bracket stay the same for every
+cell, and a request is answered by linear interpolation between its two knots.
+
+When the table is built, each knot interval is also scored where interpolation
+can miss the model most, and intervals where it misses by more than `max_error`
+(relative) are marked invalid; requests landing in them, like requests outside
+the table, go to the model. Within a segment the model is linear in the weight
+except where a tree splits on net_weight, so given those split weights
+(FusedEnsemble.split_values) every interval is scored at its midpoint and at
+and just either side of each split inside it (SPLIT_MARGIN grams away), where
+the relative error peaks (a tree sends the split weight itself one way or the
+other depending on its comparison). That makes `max_error` a bound on every answer. Without
+split weights only midpoints are scored, and `max_error` is a heuristic: a
+split elsewhere in an interval can make interpolation miss by more.
+"""
+import threading
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from prediction_features import (
+    PRICE_BRACKETS, PRODUCT_CATEGORY_ALIASES, STORE_IDS, WEIGHT_CATEGORIES, build_feature_matrix, price_per_gram,
+)
+
+# One representative request value per distinct feature pattern; the last entry matches none
+GRID_CATEGORIES = list(PRODUCT_CATEGORY_ALIASES) + ['OTHER']
+GRID_STORES = list(STORE_IDS) + ['OTHER']
+GRID_PURITIES = [22.0, 18.0, 24.0]  # 22K, 18K, and every other purity share one price per gram
+
+# Rows scored per model call while building
+BUILD_CHUNK = 65536
+# Distance (grams) either side of a tree split at which an interval is checked; above the
+# float32 rounding of scaled weights, so each check lands on one side of the split
+SPLIT_MARGIN = 1e-5
+
+_CATEGORY_INDEX = {alias: i for i, aliases in enumerate(PRODUCT_CATEGORY_ALIASES.values()) for alias in aliases}
+_STORE_INDEX = {store: i for i, store in enumerate(STORE_IDS)}
+
+
+def _purity_index(purity: float) -> int:
+    return 0 if purity == 22 else 1 if purity == 18 else 2
+
+
+class _WeightAxis:
+    """Knot weights for one purity: evenly spaced within each constant-feature segment"""
+
+    def __init__(self, edges: np.ndarray, max_weight: float, step: float):
+        self.edges = edges  # Segment starts; a segment runs to the next edge (exclusive)
+        self.max_weight = max_weight
+        ends = np.append(edges[1:], max_weight)
+        self.counts = np.maximum(np.ceil((ends - edges) / step).astype(np.int64), 1)  # Intervals per segment
+        self.spacing = (ends - edges) / self.counts
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts + 1)[:-1]])  # First knot of each segment
+        knots = []
+        for start, end, count in zip(edges, ends, self.counts):
+            segment = np.linspace(start, end, count + 1)
+            if end < max_weight:
+                # The segment's right end belongs to the next bucket; score just below it
+                segment[-1] = np.nextafter(end, -np.inf)
+            knots.append(segment)
+        self.knots = np.concatenate(knots)
+
+    def locate(self, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Left knot index and interpolation fraction for in-range weights"""
+        segment = np.searchsorted(self.edges, weights, side='right') - 1
+        local = np.minimum(((weights - self.edges[segment]) // self.spacing[segment]).astype(np.int64),
+                           self.counts[segment] - 1)
+        left = self.offsets[segment] + local
+        width = self.knots[left + 1] - self.knots[left]
+        return left, np.clip((weights - self.knots[left]) / width, 0.0, 1.0)
+
+    def midpoints(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Midpoint weight of every interval, and the index of its left knot"""
+        left = np.concatenate([offset + np.arange(count) for offset, count in zip(self.offsets, self.counts)])
+        return (self.knots[left] + self.knots[left + 1]) / 2, left
+
+    def around(self, splits: np.ndarray, margin: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Weights at and just either side of each in-range split, kept inside its interval, and its left knot"""
+        splits = splits[(splits >= self.edges[0]) & (splits < self.max_weight)]
+        left, _ = self.locate(splits)
+        lower, upper = self.knots[left], self.knots[left + 1]
+        weights = np.concatenate([np.clip(splits + offset, lower, upper) for offset in (-margin, 0.0, margin)])
+        return weights, np.tile(left, 3)
+
+
+class PredictionGrid:
+    """Interpolated predictions over category x store x purity x date x weight"""
+
+    def __init__(self, model_package: Dict, predict: Callable[[np.ndarray], np.ndarray], start: date,
+                 days: int = 7, max_weight: float = 100.0, step: float = 0.5, max_error: float = 0.005,
+                 market: Any = None, split_weights: Optional[np.ndarray] = None):
+        self.package = model_package
+        self.market = market
+        self.start = start
+        self.days = days
+        self.max_weight = max_weight
+        self.max_error = max_error
+        # Whether max_error was checked around every tree split (a bound) or at midpoints only
+        self.error_bound = split_weights is not None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        feature_columns = model_package['feature_columns']
+        dates = [(start + timedelta(days=d)).isoformat() for d in range(days)]
+        weight_edges = np.array([lower for _, lower in WEIGHT_CATEGORIES], dtype=np.float64)
+        self.axes: List[_WeightAxis] = []
+        self.values: List[np.ndarray] = []  # per purity: (category, store, day, knot)
+        self.valid: List[np.ndarray] = []   # per purity: (category, store, day, left knot)
+        shape = (len(GRID_CATEGORIES), len(GRID_STORES), days)
+        self.max_observed_error = 0.0
+        valid_intervals = total_intervals = 0
+        price_lowers = np.array([lower for _, lower in PRICE_BRACKETS[1:]], dtype=np.float64)
+
+        purities = GRID_PURITIES
+        if market is not None:
+            category, store, day = (a.ravel() for a in np.indices(shape))
+            products = [GRID_CATEGORIES[i] if i < len(PRODUCT_CATEGORY_ALIASES) else None for i in category]
+            rates = market.lookup(products, [GRID_STORES[i] for i in store],
+                                  pd.DatetimeIndex([dates[i] for i in day]))['price_per_gram']
+            if not np.isnan(rates).any():
+                # Every cell has a gold rate for its price per gram, so purity drops out
+                purities = GRID_PURITIES[:1]
+
+        for purity in purities:
+            ppg = price_per_gram(np.array([purity]))
+            if market is not None:
+                # Every cell's price per gram, so no interval straddles any cell's bracket boundary
+                ppg = np.unique(np.where(np.isnan(rates), ppg, rates))
+            price_edges = (price_lowers[None, :] / ppg[:, None]).ravel()
+            edges = np.unique(np.concatenate([weight_edges, price_edges]))
+            axis = _WeightAxis(edges[edges < max_weight], max_weight, step)
+            check_weights, check_left = axis.midpoints()
+            if split_weights is not None:
+                around, around_left = axis.around(np.asarray(split_weights, dtype=np.float64), SPLIT_MARGIN)
+                check_weights = np.concatenate([check_weights, around])
+                check_left = np.concatenate([check_left, around_left])
+
+            weights = np.concatenate([axis.knots, check_weights])
+            combos = np.prod(shape)
+            category, store, day = (a.ravel() for a in np.indices(shape))
+            scored = np.empty(combos * len(weights))
+            rows = np.arange(len(scored))
+            for chunk in range(0, len(scored), BUILD_CHUNK):
+                r = rows[chunk:chunk + BUILD_CHUNK]
+                combo, w = r // len(weights), r % len(weights)
+                X = build_feature_matrix(
+                    [GRID_CATEGORIES[i] for i in category[combo]], weights[w],
+                    [dates[i] for i in day[combo]], np.full(len(r), purity),
+                    [GRID_STORES[i] for i in store[combo]], feature_columns, market,
+                )
+                scored[chunk:chunk + BUILD_CHUNK] = predict(X)
+            scored = scored.reshape(shape + (len(weights),))
+            values = scored[..., :len(axis.knots)]
+            expected = scored[..., len(axis.knots):]
+
+            lower, upper = values[..., check_left], values[..., check_left + 1]
+            t = (check_weights - axis.knots[check_left]) / (axis.knots[check_left + 1] - axis.knots[check_left])
+            interpolated = lower + (upper - lower) * t
+            error = np.abs(interpolated - expected) / np.maximum(np.abs(expected), 1.0)
+            # An interval is valid when every check inside it is within max_error
+            failed = np.zeros((len(axis.knots), int(np.prod(shape))), dtype=np.int64)
+            np.add.at(failed, check_left, (error > max_error).reshape(-1, len(check_weights)).T)
+            intervals = np.zeros(len(axis.knots), dtype=bool)
+            intervals[check_left] = True
+            valid = ((failed == 0) & intervals[:, None]).T.reshape(shape + (len(axis.knots),))
+            self.max_observed_error = max(self.max_observed_error, float(error.max()))
+            valid_intervals += int(valid.sum())
+            total_intervals += int(intervals.sum()) * int(np.prod(shape))
+
+            self.axes.append(axis)
+            self.values.append(values)
+            self.valid.append(valid)
+        self.valid_fraction = valid_intervals / total_intervals
+
+    def _day(self, voucher_date) -> int:
+        """Day index in the window, or -1 (strict YYYY-MM-DD, as the feature builder parses)"""
+        try:
+            if len(voucher_date) != 10:
+                return -1
+            day = (date.fromisoformat(voucher_date) - self.start).days
+        except (TypeError, ValueError):
+            return -1
+        return day if 0 <= day < self.days else -1
+
+    def lookup(self, categories: Sequence[str], net_weights: Sequence[float], voucher_dates: Sequence[str],
+               purities: Sequence[float], store_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpolated predictions and a mask of the requests the table could answer"""
+        other_category, other_store = len(GRID_CATEGORIES) - 1, len(GRID_STORES) - 1
+        day = np.array([self._day(d) for d in voucher_dates], dtype=np.int64)
+        weight = np.asarray(net_weights, dtype=np.float64)
+        if len(self.axes) == 1:
+            purity = np.zeros(len(day), dtype=np.int64)
+        else:
+            purity = np.array([_purity_index(p) for p in purities], dtype=np.int64)
+        category = np.array([_CATEGORY_INDEX.get(str(c).upper(), other_category) for c in categories], dtype=np.int64)
+        store = np.array([_STORE_INDEX.get(s, other_store) for s in store_ids], dtype=np.int64)
+        inside = (day >= 0) & (weight >= 0) & (weight <= self.max_weight)
+
+        out = np.full(len(day), np.nan)
+        hit = np.zeros(len(day), dtype=bool)
+        for p, axis in enumerate(self.axes):
+            rows = np.flatnonzero(inside & (purity == p))
+            if not len(rows):
+                continue
+            left, t = axis.locate(weight[rows])
+            cell = (category[rows], store[rows], day[rows])
+            lower = self.values[p][cell + (left,)]
+            upper = self.values[p][cell + (left + 1,)]
+            out[rows] = lower + (upper - lower) * t
+            hit[rows] = self.valid[p][cell + (left,)]
+        out[~hit] = np.nan
+
+        answered = int(hit.sum())
+        with self._lock:
+            self.hits += answered
+            self.misses += len(hit) - answered
+        return out, hit
+
+    def memory_bytes(self) -> int:
+        arrays = self.values + self.valid + [axis.knots for axis in self.axes]
+        return int(sum(a.nbytes for a in arrays))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            'start': self.start.isoformat(),
+            'days': self.days,
+            'max_weight': self.max_weight,
+            'max_error': self.max_error,
+            'error_bound': self.error_bound,
+            'valid_fraction': self.valid_fraction,
+            'max_observed_error': self.max_observed_error,
+            'hits': hits,
+            'misses': misses,
+        }
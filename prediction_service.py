@@ -0,0 +1,188 @@
+# prediction_service.py
+"""Cached, coalesced and micro-batched single predictions
+
+/api/predict/sales callers (kiosks, the frontend's predictSales) often repeat
+the same request within seconds. PredictionService answers each one in order
+from the first of these that applies:
+
+1. an LRU of recent predictions, keyed on feature_key() of the request (so
+   requests that build the same feature row share an entry);
+2. an identical request already being scored, whose result it awaits
+   (single flight);
+3. the next micro-batch: requests arriving within `window` seconds of each
+   other are scored with one vectorized call, one row per distinct key.
+
+The cache belongs to one model package and one set of market features (the
+feature store) and is cleared when either is replaced.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from prediction_features import feature_key
+
+
+class _Pending:
+    """One distinct key waiting in the next batch"""
+
+    __slots__ = ('key', 'request', 'future')
+
+    def __init__(self, key: Tuple, request: Any, future: asyncio.Future):
+        self.key = key
+        self.request = request
+        self.future = future
+
+
+class PredictionService:
+    """Single predictions through an LRU, single-flight coalescing and a micro-batcher.
+
+    `score(package, requests, features)` returns one prediction per request;
+    `run(fn, *args)` awaits fn(*args) off the event loop (the compute pool).
+    """
+
+    def __init__(self, score: Callable[[Dict, Sequence[Any], Any], np.ndarray],
+                 run: Callable[..., Awaitable], max_entries: int = 4096,
+                 window: float = 0.002, max_batch: int = 256):
+        self.score = score
+        self.run = run
+        self.max_entries = max_entries
+        self.window = window
+        self.max_batch = max_batch
+        self.package: Optional[Dict] = None
+        self.features: Any = None
+        self._entries: 'OrderedDict[Tuple, float]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._pending: List[_Pending] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks; a batch collected mid-flight would strand its futures
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.batches = 0
+        self.batched_rows = 0
+
+    async def predict(self, package: Dict, request: Any, features: Any = None) -> float:
+        """The ensemble prediction for one request (an object with the PredictionRequest fields)"""
+        key = feature_key(request.category, request.net_weight, request.voucher_date,
+                          request.purity, request.store_id)
+        self._bind(package, features, asyncio.get_running_loop())
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            with self._lock:
+                self.coalesced += 1
+            # Shielded, so one caller going away does not cancel the others' result
+            return await asyncio.shield(future)
+
+        with self._lock:
+            self.misses += 1
+        future = self._inflight[key] = self._loop.create_future()
+        self._pending.append(_Pending(key, request, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _bind(self, package: Dict, features: Any, loop: asyncio.AbstractEventLoop) -> None:
+        if loop is not self._loop:
+            # Futures and timers belong to one event loop (matters for test clients that start new ones)
+            self._inflight, self._pending, self._flush_handle = {}, [], None
+            self._loop = loop
+        if package is not self.package or features is not self.features:
+            # Requests already waiting are scored with the model and features they asked for; nothing of it is kept
+            self._flush()
+            self._inflight = {}
+            self.clear()
+            self.package, self.features = package, features
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._score_batch(self.package, self.features, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score_batch(self, package: Dict, features: Any, batch: List[_Pending]) -> None:
+        try:
+            values = await self.run(self.score, package, [p.request for p in batch], features)
+            results = [float(v) for v in np.asarray(values, dtype=np.float64)]
+        except HTTPException as e:
+            # Refused rather than failed to score (e.g. a 503 from a full compute pool): every request gets
+            # the same answer, and retrying them one by one would only add load
+            results = [e] * len(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                results = [e]
+            else:
+                # Score each request on its own, so a bad one only fails itself
+                results = await asyncio.gather(*(self._score_one(package, features, p.request) for p in batch))
+        else:
+            with self._lock:
+                self.batches += 1
+                self.batched_rows += len(batch)
+
+        for pending, result in zip(batch, results):
+            if self._inflight.get(pending.key) is pending.future:
+                del self._inflight[pending.key]
+            if isinstance(result, Exception):
+                pending.future.set_exception(result)
+                continue
+            if package is self.package and features is self.features:
+                self._put(pending.key, result)
+            pending.future.set_result(result)
+
+    async def _score_one(self, package: Dict, features: Any, request: Any):
+        try:
+            return float(np.asarray(await self.run(self.score, package, [request], features), dtype=np.float64)[0])
+        except Exception as e:
+            return e
+
+    def _put(self, key: Tuple, value: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'window_seconds': self.window,
+                'max_batch': self.max_batch,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'batches': self.batches,
+                'mean_batch_size': self.batched_rows / self.batches if self.batches else 0.0,
+                'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,150 @@
+# response_cache.py
+"""In-process LRU/TTL cache of serialized GET responses, with ETag support"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+
+class CachedResponse:
+    """Serialized response body and its entity tag"""
+
+    __slots__ = ('body', 'etag', 'expires_at')
+
+    def __init__(self, body: bytes, expires_at: float):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.expires_at = expires_at
+
+
+def normalize_param(name: str, value: Optional[str]) -> Optional[str]:
+    """Canonical form of a query parameter so equivalent requests share a cache key"""
+    if value is None or value == '':
+        return None
+    if name.endswith('_date'):
+        try:
+            ts = pd.Timestamp(value)
+        except (ValueError, TypeError):
+            return value
+        return ts.strftime('%Y-%m-%d') if ts == ts.normalize() else ts.isoformat()
+    return value
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(','))
+    return any(tag[2:] == etag if tag.startswith('W/') else tag == etag for tag in candidates)
+
+
+class ResponseCache:
+    """Thread-safe LRU cache bounded by entry count and total body bytes, with a TTL.
+
+    Keys include the loaded data version, so responses computed from older data
+    are never served after a reload.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Tuple, CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped by clear()/invalidate(), so results computed before one are not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(path: str, params: Iterable[Tuple[str, str]], data_version: int) -> Tuple:
+        normalized = sorted(
+            (name, normalize_param(name, value)) for name, value in params
+        )
+        return (path, tuple((n, v) for n, v in normalized if v is not None), data_version)
+
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, body: bytes, generation: Optional[int] = None) -> CachedResponse:
+        """Store body under key; with a generation, only if nothing was invalidated since it was read"""
+        entry = CachedResponse(body, time.monotonic() + self.ttl_seconds)
+        if len(body) > self.max_bytes:
+            # Too large to keep, but still served with an ETag
+            return entry
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return entry
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.generation += 1
+
+    def invalidate(self, stale: Callable[[str, Dict[str, str]], bool]) -> int:
+        """Drop entries for which stale(path, params) is true; returns how many were dropped"""
+        with self._lock:
+            keys = [key for key in self._entries if stale(key[0], dict(key[1]))]
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+            self.generation += 1
+            return len(keys)
+
+    def _drop(self, key: Tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'not_modified': self.not_modified,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
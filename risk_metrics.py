@@ -0,0 +1,51 @@
+# risk_metrics.py
+"""Vectorized risk, velocity and comparison metrics shared by the API endpoints"""
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+# Days-based risk saturates at this score
+MAX_RISK_SCORE = 50
+RISK_PER_DAY = 5
+
+# Velocity trend thresholds (average days to sell)
+RISING_BELOW_DAYS = 7
+FALLING_ABOVE_DAYS = 30
+_TREND_LABELS = np.array(['stable', 'rising', 'falling'], dtype=object)
+
+
+def risk_score(days) -> np.ndarray:
+    """Risk score of 5 points per day, capped at 50"""
+    return np.minimum(np.asarray(days, dtype=np.float64) * RISK_PER_DAY, MAX_RISK_SCORE)
+
+
+def velocity_trend(days) -> np.ndarray:
+    """'rising' below 7 days to sell, 'falling' above 30, otherwise 'stable'"""
+    days = np.asarray(days, dtype=np.float64)
+    # 0 = stable, 1 = rising, 2 = falling; the two conditions never overlap
+    codes = (days < RISING_BELOW_DAYS).astype(np.intp) + 2 * (days > FALLING_ABOVE_DAYS)
+    return _TREND_LABELS[codes]
+
+
+def risk_counts(scores) -> Dict[str, int]:
+    """Ageing, deadstock and fast-moving item counts for an array of risk scores"""
+    scores = np.asarray(scores, dtype=np.float64)
+    return {
+        'ageing': int(np.count_nonzero(scores > 45)),
+        'deadstock': int(np.count_nonzero(scores > 48)),
+        'fast_moving': int(np.count_nonzero(scores < 30)),
+    }
+
+
+def prediction_comparison(df: pd.DataFrame, limit: int) -> Dict[str, np.ndarray]:
+    """Actual vs ensemble prediction columns for the first `limit` rows"""
+    sample = df.head(limit)
+    if 'product_category' in sample.columns:
+        category = sample['product_category'].to_numpy(dtype=object)
+    else:
+        category = np.full(len(sample), 'Unknown', dtype=object)
+    return {
+        'actual': sample['actual_sales'].to_numpy(dtype=np.float64),
+        'predicted': sample['ensemble_prediction'].to_numpy(dtype=np.float64),
+        'category': category,
+    }
@@ -0,0 +1,217 @@
+# sales_ingest.py
+"""Incremental ingestion of new voucher rows on top of the loaded sales store
+
+New rows land in a SalesDelta: a small frame next to the immutable
+SalesStore/SalesRollup built at load. Queries combine the rollup's answer with
+an aggregate of the delta, so ingesting costs O(delta) instead of a rebuild.
+When the delta grows past a threshold it is compacted: a new store and rollup
+are built from base + delta in the background and swapped in.
+
+StoreFileTailer follows the per-store store_N_denorm.csv files and feeds rows
+appended to them since they were last read.
+"""
+import io
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sales_store import DAY, SALES_SCHEMA, SalesStore
+
+
+def typed_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Project raw voucher rows onto the SALES_SCHEMA columns and dtypes.
+
+    Columns missing from the input (e.g. product_category in the per-store
+    files) are filled with NaN. String columns stay object dtype: deltas are
+    small, and categoricals are rebuilt when the delta is compacted.
+    """
+    out = {}
+    for column, dtype in SALES_SCHEMA.items():
+        values = df[column] if column in df.columns else pd.Series(np.nan, index=df.index)
+        if dtype.startswith('datetime'):
+            out[column] = pd.to_datetime(values)
+        elif dtype == 'category':
+            out[column] = values.astype(object).where(values.notna(), np.nan)
+        else:
+            out[column] = pd.to_numeric(values).astype(dtype)
+    return pd.DataFrame(out).reset_index(drop=True)
+
+
+class SalesDelta:
+    """Rows ingested since the base store was built.
+
+    Rows are kept in ingestion order (so a compaction can tell which rows it
+    covered) with a date-sorted position index for range lookups.
+    """
+
+    def __init__(self, base: SalesStore, df: Optional[pd.DataFrame] = None):
+        self.base = base
+        self.df = df if df is not None else typed_rows(pd.DataFrame(columns=list(SALES_SCHEMA)))
+        dates = self.df['voucher_date'].to_numpy(dtype='datetime64[ns]')
+        # Day offsets against the base store's first day; may be negative or past its last day
+        day_offsets = ((dates.astype('datetime64[D]') - base.base_date) // DAY).astype(np.int64)
+        self.order = np.argsort(day_offsets, kind='stable')
+        self.day_offsets = day_offsets[self.order]
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def append(self, rows: pd.DataFrame) -> 'SalesDelta':
+        """A new delta with rows added (this one is left untouched for readers still holding it)"""
+        rows = typed_rows(rows)
+        if not len(rows):
+            return self
+        return SalesDelta(self.base, pd.concat([self.df, rows], ignore_index=True) if len(self.df) else rows)
+
+    def rebase(self, base: SalesStore, skip: int) -> 'SalesDelta':
+        """The rows after the first `skip` ingested, on top of a compacted base"""
+        return SalesDelta(base, self.df.iloc[skip:].reset_index(drop=True))
+
+    def day_range(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        """Inclusive day offsets for a date range; open ends are unbounded (unlike the base store)"""
+        start = self.base._bound(start_date, 'start')
+        end = self.base._bound(end_date, 'end')
+        return (np.iinfo(np.int64).min if start is None else start,
+                np.iinfo(np.int64).max if end is None else end)
+
+    def slice(self, start_date: Optional[str], end_date: Optional[str]) -> pd.DataFrame:
+        """Rows in the date range, in date order"""
+        first, last = self.day_range(start_date, end_date)
+        lo = int(np.searchsorted(self.day_offsets, first, side='left'))
+        hi = int(np.searchsorted(self.day_offsets, last, side='right'))
+        return self.df.iloc[self.order[lo:max(lo, hi)]]
+
+    def aggregate(self, key: str, start_date: Optional[str], end_date: Optional[str],
+                  store: Optional[str] = None) -> pd.DataFrame:
+        """Sum, count and first/last date of value per key (of one store, if given), shaped like SalesRollup frames"""
+        rows = self.slice(start_date, end_date)
+        if store is not None:
+            rows = rows[rows['store'].str.upper() == store.upper()]
+        rows = rows[rows[key].notna()]
+        grouped = rows.groupby(key, sort=True).agg(
+            sum=('value', lambda v: np.nan_to_num(v.to_numpy(dtype=np.float64)).sum()),
+            count=('value', 'size'),
+            value_count=('value', 'count'),
+            label_count=('label_no', 'count'),
+            first_date=('voucher_date', 'min'),
+            last_date=('voucher_date', 'max'),
+        )
+        return grouped.reset_index()
+
+    def date_bounds(self) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """First and last day with ingested rows"""
+        if not len(self.df):
+            return None
+        first, last = self.base.base_date + self.day_offsets[[0, -1]].astype('timedelta64[D]')
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def memory_bytes(self) -> int:
+        return int(self.df.memory_usage(deep=True).sum() + self.day_offsets.nbytes + self.order.nbytes)
+
+
+def merge_aggregates(base: pd.DataFrame, delta: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Combine a rollup frame with a delta aggregate of the same shape"""
+    if not len(delta):
+        return base
+    delta = delta.assign(
+        first_date=delta['first_date'].dt.normalize(),
+        last_date=delta['last_date'].dt.normalize(),
+    )
+    combined = pd.concat([base.astype({key: object}), delta.astype({key: object})], ignore_index=True)
+    merged = combined.groupby(key, sort=True).agg(
+        sum=('sum', 'sum'), count=('count', 'sum'), value_count=('value_count', 'sum'),
+        label_count=('label_count', 'sum'), first_date=('first_date', 'min'), last_date=('last_date', 'max'),
+    )
+    return merged.reset_index()
+
+
+class StoreFileTailer:
+    """Reads rows appended to CSV files since the last poll.
+
+    Offsets start at the files' sizes when the tailer is created, so only rows
+    written after the data was loaded are picked up. Only complete lines are
+    consumed; a partially written last line waits for the next poll. A file
+    that shrinks (rewritten or rotated) is re-baselined to its new size.
+    """
+
+    def __init__(self, paths: List[Path], on_rows: Callable[[pd.DataFrame, str], None], interval: float = 0.0):
+        self.paths = paths
+        self.on_rows = on_rows
+        self.interval = interval
+        self._headers: Dict[Path, bytes] = {}
+        self._offsets: Dict[Path, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.rows_read = 0
+        self.last_error: Optional[str] = None
+        self.rebaseline()
+
+    def rebaseline(self) -> None:
+        """Treat everything currently in the files as already loaded"""
+        for path in self.paths:
+            try:
+                with open(path, 'rb') as f:
+                    self._headers[path] = f.readline()
+                    self._offsets[path] = path.stat().st_size
+            except OSError:
+                self._offsets[path] = 0
+
+    def poll(self) -> int:
+        """Ingest complete lines appended since the last poll; returns rows read"""
+        total = 0
+        for path in self.paths:
+            try:
+                size = path.stat().st_size
+                offset = self._offsets.get(path, 0)
+                if size < offset:
+                    print(f"⚠ {path.name} shrank, re-reading from its new end")
+                    self._offsets[path] = size
+                    continue
+                if size == offset:
+                    continue
+                with open(path, 'rb') as f:
+                    if path not in self._headers or offset == 0:
+                        self._headers[path] = f.readline()
+                        offset = max(offset, f.tell())
+                    f.seek(offset)
+                    chunk = f.read(size - offset)
+                end = chunk.rfind(b'\n') + 1
+                if not end:
+                    continue
+                rows = pd.read_csv(io.BytesIO(self._headers[path] + chunk[:end]))
+                self._offsets[path] = offset + end
+                if len(rows):
+                    self.on_rows(rows, path.name)
+                    total += len(rows)
+            except Exception as e:
+                self.last_error = f"{path.name}: {e}"
+                print(f"⚠ Could not ingest from {path.name}: {e}")
+        self.rows_read += total
+        return total
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="store-file-tailer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def status(self) -> Dict:
+        return {
+            "watching": self._thread is not None,
+            "interval_seconds": self.interval,
+            "files": len(self.paths),
+            "rows_read": self.rows_read,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,258 @@
+# sales_rollup.py
+"""Pre-aggregated daily rollups answering date range queries without touching raw rows"""
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sales_ingest import SalesDelta, merge_aggregates
+from sales_series import DailySeries, overlay_rows
+from sales_store import SalesStore
+
+# Store partitions are built, and all-store queries answered, on these threads once
+# the work is large enough to outweigh handing it over (numpy releases the GIL)
+PARTITION_THREADS = int(os.environ.get("JEWELAI_PARTITION_THREADS", str(min(8, os.cpu_count() or 1))))
+PARALLEL_MIN_ROWS = 200_000  # Rows in the table before partitions are built in parallel
+PARALLEL_MIN_CELLS = 100_000  # Groups x partitions before a query runs the partitions in parallel
+# Counts kept per cell: rows, rows with a value (for means), rows with a label_no (groupby's 'label_no': 'count')
+COUNT_COLUMNS = ('count', 'value_count', 'label_count')
+
+_partition_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _map_partitions(fn: Callable, items: Sequence, parallel: bool) -> List:
+    """[fn(item) for item in items], spread over the partition threads when parallel"""
+    global _partition_pool
+    if not parallel or len(items) < 2 or PARTITION_THREADS < 2:
+        return [fn(item) for item in items]
+    if _partition_pool is None:
+        _partition_pool = ThreadPoolExecutor(max_workers=PARTITION_THREADS, thread_name_prefix="partition")
+    return list(_partition_pool.map(fn, items))
+
+
+class RangeRollup:
+    """Daily sum and COUNT_COLUMNS cells for one grouping, with prefix sums along the day axis.
+
+    Non-empty (group, day) cells are stored sorted by group and then day, so each
+    group owns a contiguous run of cells. A day range becomes two binary searches
+    per group, and the totals are differences of the prefix sums.
+    """
+
+    def __init__(self, group_codes: np.ndarray, n_groups: int, day_offsets: np.ndarray, values: np.ndarray,
+                 counted: np.ndarray):
+        """counted: (rows x COUNT_COLUMNS) flags of which counts each row adds to"""
+        self.n_groups = n_groups
+        self.day_span = int(day_offsets.max()) + 1 if len(day_offsets) else 1
+
+        keys = group_codes.astype(np.int64) * self.day_span + day_offsets
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.cell_days = (self.keys % self.day_span).astype(np.int32)
+
+        cell_sums = np.bincount(inverse, weights=np.nan_to_num(values), minlength=len(self.keys))
+        cell_counts = np.stack([np.bincount(inverse, weights=flags, minlength=len(self.keys)).astype(np.int64)
+                                for flags in counted.T], axis=1).reshape(len(self.keys), counted.shape[1])
+        self.prefix_sum = np.concatenate(([0.0], np.cumsum(cell_sums)))
+        self.prefix_count = np.concatenate((np.zeros((1, counted.shape[1]), dtype=np.int64),
+                                            np.cumsum(cell_counts, axis=0)))
+        self._group_base = np.arange(n_groups, dtype=np.int64) * self.day_span
+
+    def query(self, lo_day: int, hi_day: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Per-group sum, (groups x COUNT_COLUMNS) counts, first day and last day over the inclusive day range.
+
+        first/last are -1 for groups without rows in the range.
+        """
+        lo_day = max(lo_day, 0)
+        hi_day = min(hi_day, self.day_span - 1)
+        if hi_day < lo_day or not len(self.keys):
+            empty = np.full(self.n_groups, -1, dtype=np.int32)
+            counts = np.zeros((self.n_groups, self.prefix_count.shape[1]), dtype=np.int64)
+            return np.zeros(self.n_groups), counts, empty, empty.copy()
+
+        lo = np.searchsorted(self.keys, self._group_base + lo_day, side='left')
+        hi = np.searchsorted(self.keys, self._group_base + hi_day, side='right')
+
+        sums = self.prefix_sum[hi] - self.prefix_sum[lo]
+        counts = self.prefix_count[hi] - self.prefix_count[lo]
+        present = hi > lo
+        first = np.where(present, self.cell_days[np.minimum(lo, len(self.keys) - 1)], -1)
+        last = np.where(present, self.cell_days[np.maximum(hi - 1, 0)], -1)
+        return sums, counts, first, last
+
+
+class StorePartition:
+    """Category, label and unkeyed total rollups over the rows of one store"""
+
+    def __init__(self, category_codes: np.ndarray, n_categories: int, label_codes: np.ndarray, n_labels: int,
+                 day_offsets: np.ndarray, values: np.ndarray):
+        counted = np.column_stack([np.ones(len(values), dtype=bool), ~np.isnan(values), label_codes >= 0])
+        # Rows with a missing key are left out, matching how groupby drops NaN keys
+        by_category = category_codes >= 0
+        self.category_cells = RangeRollup(category_codes[by_category], n_categories,
+                                          day_offsets[by_category], values[by_category], counted[by_category])
+        by_label = label_codes >= 0
+        self.label_cells = RangeRollup(label_codes[by_label], n_labels, day_offsets[by_label], values[by_label],
+                                       counted[by_label])
+        # Every row, keyed or not, for range totals
+        self.total_cells = RangeRollup(np.zeros(len(values), dtype=np.int64), 1, day_offsets, values, counted)
+
+    def memory_bytes(self) -> int:
+        return sum(
+            cells.keys.nbytes + cells.cell_days.nbytes + cells.prefix_sum.nbytes + cells.prefix_count.nbytes
+            for cells in (self.category_cells, self.label_cells, self.total_cells)
+        )
+
+
+class SalesRollup:
+    """(day x category x label) rollups of sales value per store, built once at startup.
+
+    Each store partition of the SalesStore gets its own category and label
+    rollups (built in parallel for large tables). A store filter queries only
+    that store's partition; all-store queries merge the per-store partials and
+    that of the rows without a store. Either way a range query costs O(#categories) or O(#labels) per partition
+    regardless of how many vouchers fall inside it.
+    """
+
+    def __init__(self, store: SalesStore):
+        self.store = store
+        self.delta: Optional[SalesDelta] = None  # Rows ingested since the store was built
+        df = store.df
+        days = store.day_offsets
+        values = df['value'].to_numpy(dtype=np.float64)
+
+        category_codes, self.categories = pd.factorize(df['category'], sort=True)
+        label_codes, self.labels = pd.factorize(df['label_no'], sort=True)
+        positions = {name: rows for name, (rows, _) in store.partitions.items()}
+        if 'store' not in df.columns:
+            positions = {'ALL': np.arange(len(df))}
+        self.stores = pd.Index(list(positions))
+        storeless = store.storeless[0]
+
+        def build(rows: np.ndarray) -> StorePartition:
+            return StorePartition(category_codes[rows], len(self.categories), label_codes[rows], len(self.labels),
+                                  days[rows], values[rows])
+
+        rows = list(positions.values()) + ([storeless] if len(storeless) else [])
+        partitions = _map_partitions(build, rows, parallel=len(df) >= PARALLEL_MIN_ROWS)
+        self.partitions: Dict[str, StorePartition] = dict(zip(positions, partitions))
+        # Rows without a store: in every all-store query, never selected by a store filter
+        self.storeless: Optional[StorePartition] = partitions[-1] if len(storeless) else None
+        self.series = DailySeries(store)
+
+    def with_delta(self, delta: Optional[SalesDelta]) -> 'SalesRollup':
+        """This rollup with ingested rows overlaid; the base cells are shared, not copied"""
+        rollup = copy.copy(self)
+        rollup.delta = delta if delta is not None and len(delta) else None
+        return rollup
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the rollup cells, prefix sums and daily series"""
+        partitions = list(self.partitions.values()) + ([self.storeless] if self.storeless is not None else [])
+        return sum(partition.memory_bytes() for partition in partitions) + self.series.memory_bytes()
+
+    def delta_slice(self, start_date: Optional[str], end_date: Optional[str],
+                    store: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Ingested rows in a date range (of one store, if given), in date order; None when there are none"""
+        if self.delta is None:
+            return None
+        rows = self.delta.slice(start_date, end_date)
+        if store is not None:
+            rows = rows[rows['store'].str.upper() == store.upper()]
+        return rows if len(rows) else None
+
+    def slice(self, start_date: Optional[str], end_date: Optional[str], store: Optional[str] = None) -> pd.DataFrame:
+        """Sales rows in a date range (of one store, if given), including ingested ones"""
+        rows = self.store.slice(start_date, end_date, store)
+        extra = self.delta_slice(start_date, end_date, store)
+        if extra is None:
+            return rows
+        combined = pd.concat([rows.astype({c: object for c in rows.select_dtypes('category')}), extra], ignore_index=True)
+        return combined.sort_values('voucher_date', kind='mergesort', ignore_index=True)
+
+    def day_range(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        """Inclusive day-offset bounds for a date range"""
+        return self.store.day_range(start_date, end_date)
+
+    def _merge_partitions(self, cells: str, n_keys: int, lo_day: int, hi_day: int, store: Optional[str]):
+        """Query the `cells` rollup of the selected partitions and fold them into per-key totals"""
+        if store is None:
+            partitions = list(self.partitions.values()) + ([self.storeless] if self.storeless is not None else [])
+        else:
+            name = self.store.partition_name(store)
+            partitions = [self.partitions[name]] if name in self.partitions else []
+        partials = _map_partitions(
+            lambda partition: getattr(partition, cells).query(lo_day, hi_day), partitions,
+            parallel=n_keys * len(partitions) >= PARALLEL_MIN_CELLS,
+        )
+        if not partials:
+            empty = np.full(n_keys, -1, dtype=np.int32)
+            return np.zeros(n_keys), np.zeros((n_keys, len(COUNT_COLUMNS)), dtype=np.int64), empty, empty.copy()
+        sums = np.sum([p[0] for p in partials], axis=0)
+        counts = np.sum([p[1] for p in partials], axis=0)
+        first = np.min([np.where(p[2] < 0, np.iinfo(np.int32).max, p[2]) for p in partials], axis=0)
+        last = np.max([p[3] for p in partials], axis=0)
+        return sums, counts, first, last
+
+    def _frame(self, key_name: str, keys: pd.Index, sums, counts, first, last) -> pd.DataFrame:
+        present = counts[:, 0] > 0
+        base = self.store.base_date
+        return pd.DataFrame({
+            key_name: np.asarray(keys)[present],
+            'sum': sums[present],
+            **{name: counts[present, i] for i, name in enumerate(COUNT_COLUMNS)},
+            'first_date': pd.to_datetime(base + first[present].astype('timedelta64[D]')),
+            'last_date': pd.to_datetime(base + last[present].astype('timedelta64[D]')),
+        })
+
+    def by_category(self, start_date: Optional[str], end_date: Optional[str],
+                    store: Optional[str] = None) -> pd.DataFrame:
+        """Sales value sum, COUNT_COLUMNS and first/last voucher date per category (of one store, if given)"""
+        lo_day, hi_day = self.day_range(start_date, end_date)
+        totals = self._merge_partitions('category_cells', len(self.categories), lo_day, hi_day, store)
+        frame = self._frame('category', self.categories, *totals)
+        if self.delta is not None:
+            frame = merge_aggregates(frame, self.delta.aggregate('category', start_date, end_date, store), 'category')
+        return frame
+
+    def by_label(self, start_date: Optional[str], end_date: Optional[str], store: Optional[str] = None) -> pd.DataFrame:
+        """Sales value sum, COUNT_COLUMNS and first/last voucher date per label (of one store, if given)"""
+        lo_day, hi_day = self.day_range(start_date, end_date)
+        totals = self._merge_partitions('label_cells', len(self.labels), lo_day, hi_day, store)
+        frame = self._frame('label_no', self.labels, *totals)
+        if self.delta is not None:
+            frame = merge_aggregates(frame, self.delta.aggregate('label_no', start_date, end_date, store), 'label_no')
+        return frame
+
+    def total(self, start_date: Optional[str], end_date: Optional[str], store: Optional[str] = None) -> float:
+        """Sales value over a date range (of one store, if given), rows without a category or label included"""
+        lo_day, hi_day = self.day_range(start_date, end_date)
+        total = float(self._merge_partitions('total_cells', 1, lo_day, hi_day, store)[0][0])
+        extra = self.delta_slice(start_date, end_date, store)
+        if extra is not None:
+            total += float(np.nansum(extra['value'].to_numpy(dtype=np.float64)))
+        return total
+
+    def daily(self, start_date: Optional[str], end_date: Optional[str], group_by: str,
+              store: Optional[str] = None) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+        """Days, group names and (groups x days) sales sums and counts over a date range, ingested rows included.
+
+        The days run from the first to the last day with data, narrowed to the range.
+        """
+        first_data, last_data = 0, self.series.n_days - 1
+        bounds = self.delta.date_bounds() if self.delta is not None else None
+        if bounds is not None:
+            first_data = min(first_data, self.store._bound(str(bounds[0]), 'start'))
+            last_data = max(last_data, self.store._bound(str(bounds[1]), 'end'))
+        start, end = self.store._bound(start_date, 'start'), self.store._bound(end_date, 'end')
+        first = first_data if start is None else max(start, first_data)
+        last = last_data if end is None else min(end, last_data)
+
+        names, sums, counts = self.series.window(first, last, group_by, store)
+        if self.delta is not None:
+            rows = self.delta.slice(start_date, end_date)
+            if store is not None:
+                rows = rows[rows['store'].str.upper() == store.upper()]
+            names, sums, counts = overlay_rows(names, sums, counts, rows, group_by, self.store.base_date, first)
+        days = self.store.base_date + np.arange(first, max(first, last + 1)).astype('timedelta64[D]')
+        return days, names, sums, counts
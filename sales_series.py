@@ -0,0 +1,195 @@
+# sales_series.py
+"""Daily sales time series materialized once from the sales store
+
+DailySeries holds a dense (store x category x day) cube of sales value sums
+and voucher counts, so a per-category, per-store or total series for any date
+range is a slice and a sum over one axis. Period resampling (day, week,
+month), trailing rolling means and LTTB downsampling then work on those few
+arrays, never on voucher rows. Downsampling picks one set of points (from the
+total) for every series, so they all keep the same dates.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sales_store import SalesStore
+
+SERIES_GROUPS = ('category', 'store')  # Group series next to the total
+RESAMPLE_FREQS = ('day', 'week', 'month')
+
+
+class DailySeries:
+    """Sales value and voucher count per (store, category, day) of a SalesStore.
+
+    Rows without a store or category count towards the total (and the other
+    grouping's series), never towards a series of their own.
+    """
+
+    def __init__(self, store: SalesStore):
+        df = store.df
+        self.base_date = store.base_date
+        self.n_days = int(store.day_offsets[-1]) + 1 if len(store.day_offsets) else 0
+        category_codes, self.categories = pd.factorize(df['category'], sort=True)
+        if 'store' in df.columns:
+            store_codes, self.stores = pd.factorize(df['store'], sort=True)
+        else:
+            store_codes, self.stores = np.zeros(len(df), dtype=np.int64), pd.Index(['ALL'])
+        self._store_names = {str(name).upper(): i for i, name in enumerate(self.stores)}
+
+        # The last store and category slots collect rows without a store or category
+        n_stores, n_categories = len(self.stores) + 1, len(self.categories) + 1
+        store_codes = np.where(store_codes < 0, n_stores - 1, store_codes)
+        category_codes = np.where(category_codes < 0, n_categories - 1, category_codes)
+        shape = (n_stores, n_categories, max(self.n_days, 1))
+        cells = (store_codes * n_categories + category_codes) * shape[2] + store.day_offsets
+        size = int(np.prod(shape))
+        values = np.nan_to_num(df['value'].to_numpy(dtype=np.float64))
+        self.sums = np.bincount(cells, weights=values, minlength=size).reshape(shape)
+        self.counts = np.bincount(cells, minlength=size).reshape(shape)
+
+    def memory_bytes(self) -> int:
+        return int(self.sums.nbytes + self.counts.nbytes)
+
+    def window(self, first: int, last: int, group_by: str,
+               store: Optional[str] = None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Group names and their (groups x days) sums and counts over day offsets first..last.
+
+        Days outside the materialized range are zero. With a store, only its
+        slice of the cube is read (an unknown store yields a zero total and no groups).
+        """
+        n = max(last - first + 1, 0)
+        sums, counts = self.sums, self.counts
+        if store is not None:
+            index = self._store_names.get(str(store).upper())
+            if index is None:
+                names = ['total'] if group_by == 'total' else []
+                return names, np.zeros((len(names), n)), np.zeros((len(names), n), dtype=np.int64)
+            sums, counts = sums[index:index + 1], counts[index:index + 1]
+
+        if group_by == 'category':
+            names = [str(name) for name in self.categories]
+            sums, counts = sums[:, :-1].sum(axis=0), counts[:, :-1].sum(axis=0)
+        elif group_by == 'store':
+            names = [str(name) for name in (self.stores if store is None else self.stores[[index]])]
+            sums, counts = sums[:len(names)].sum(axis=1), counts[:len(names)].sum(axis=1)
+        else:
+            names = ['total']
+            sums, counts = sums.sum(axis=(0, 1))[None, :], counts.sum(axis=(0, 1))[None, :]
+
+        out_sums = np.zeros((len(names), n))
+        out_counts = np.zeros((len(names), n), dtype=np.int64)
+        lo, hi = max(first, 0), min(last, self.n_days - 1)
+        if hi >= lo:
+            out_sums[:, lo - first:hi - first + 1] = sums[:, lo:hi + 1]
+            out_counts[:, lo - first:hi - first + 1] = counts[:, lo:hi + 1]
+        return names, out_sums, out_counts
+
+
+def overlay_rows(names: List[str], sums: np.ndarray, counts: np.ndarray, rows: pd.DataFrame, group_by: str,
+                 base_date: np.datetime64, first: int) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Add voucher rows (e.g. ingested ones) to window() output on the same day axis"""
+    if group_by == 'total':
+        keys = np.zeros(len(rows), dtype=np.int64)
+        new_names: List[str] = []
+    else:
+        rows = rows[rows[group_by].notna()]
+        labels = rows[group_by].astype(str).to_numpy()
+        new_names = sorted(set(labels) - set(names))
+        position = {name: i for i, name in enumerate(names + new_names)}
+        keys = np.array([position[label] for label in labels], dtype=np.int64)
+    if not len(rows):
+        return names, sums, counts
+
+    n = sums.shape[1]
+    dates = rows['voucher_date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    days = (dates - base_date).astype(np.int64) - first
+    inside = (days >= 0) & (days < n)
+    cells = keys[inside] * n + days[inside]
+    size = (len(names) + len(new_names)) * n
+    values = np.nan_to_num(rows['value'].to_numpy(dtype=np.float64))[inside]
+    extra_sums = np.bincount(cells, weights=values, minlength=size).reshape(-1, n)
+    extra_counts = np.bincount(cells, minlength=size).reshape(-1, n)
+    extra_sums[:len(names)] += sums
+    extra_counts[:len(names)] += counts
+    order = np.argsort(names + new_names, kind='stable') if new_names else np.arange(len(names))
+    return [(names + new_names)[i] for i in order], extra_sums[order], extra_counts[order]
+
+
+def resample(dates: np.ndarray, sums: np.ndarray, counts: np.ndarray,
+             freq: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sum consecutive days into periods (weeks start on Monday) labelled by their first day in `dates`.
+
+    A period that starts before the first day (a week or month the range begins
+    partway through) is labelled, and summed, from that day only.
+    """
+    if freq == 'day' or not len(dates):
+        return dates, sums, counts
+    if freq == 'week':
+        # 1970-01-01 was a Thursday
+        periods = dates - ((dates.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    else:
+        periods = dates.astype('datetime64[M]').astype('datetime64[D]')
+    starts = np.flatnonzero(np.concatenate(([True], periods[1:] != periods[:-1])))
+    return dates[starts], np.add.reduceat(sums, starts, axis=1), np.add.reduceat(counts, starts, axis=1)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` periods along the last axis; NaN until a full window is seen"""
+    out = np.full(values.shape, np.nan)
+    if window <= 0 or values.shape[-1] < window:
+        return out
+    totals = np.cumsum(values, axis=-1)
+    out[..., window - 1] = totals[..., window - 1]
+    out[..., window:] = totals[..., window:] - totals[..., :-window]
+    return out / window
+
+
+def lttb(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps to draw y with `threshold` points.
+
+    x is the position in the series. The first and last points are always kept.
+    """
+    n = len(y)
+    if threshold <= 0 or threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])[:threshold]
+    # threshold - 2 buckets of the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = [0]
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Average point of the next bucket (the last point, after the final bucket)
+        next_lo, next_hi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        next_x, next_y = (next_lo + next_hi - 1) / 2, y[next_lo:next_hi].mean()
+        a = kept[-1]
+        x = np.arange(lo, hi)
+        area = np.abs((a - next_x) * (y[lo:hi] - y[a]) - (a - x) * (next_y - y[a]))
+        kept.append(lo + int(np.argmax(area)))
+    kept.append(n - 1)
+    return np.array(kept)
+
+
+def series_payload(names: List[str], dates: np.ndarray, sums: np.ndarray, counts: np.ndarray,
+                   rolling: int = 0, keep: Optional[np.ndarray] = None) -> List[Dict]:
+    """One {name, dates, sales, count[, rolling]} entry per group, at the `keep` positions (all when None).
+
+    Rolling means are taken over every period before the points are picked.
+    """
+    averages = rolling_mean(sums, rolling) if rolling else None
+    text = np.datetime_as_string(dates, unit='D')
+    keep = slice(None) if keep is None else keep
+    out = []
+    for i, name in enumerate(names):
+        entry = {
+            'name': name,
+            'dates': text[keep].tolist(),
+            'sales': sums[i][keep].tolist(),
+            'count': counts[i][keep].tolist(),
+        }
+        if averages is not None:
+            values = averages[i][keep]
+            entry['rolling'] = [None if v != v else v for v in values.tolist()]
+        out.append(entry)
+    return out
@@ -0,0 +1,125 @@
+# sales_store.py
+"""Date-indexed, in-memory store for the denormalized sales data"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple, Union
+
+DAY = np.timedelta64(1, 'D')
+
+# Columns of multi_store_denorm_sales.csv kept in the serving frame, with their dtypes.
+# Low-cardinality strings are categoricals; purity is a nullable integer (a row may
+# leave it empty); weights and gold rates fit float32, while value stays float64
+# because it is summed into rupee totals.
+SALES_SCHEMA: Dict[str, str] = {
+    'voucher_date': 'datetime64[ns]',
+    'label_no': 'category',
+    'category': 'category',
+    'product_category': 'category',
+    'store': 'category',
+    'purity': 'Int16',
+    'net_weight': 'float32',
+    'gold_rate_used': 'float32',
+    'value': 'float64',
+}
+
+
+class SalesStore:
+    """Sales rows kept sorted by voucher_date with an integer day-offset index.
+
+    A date range resolves to a contiguous block of rows via binary search over
+    the day offsets, so filtering returns a positional slice of the sorted frame
+    instead of copying and masking the whole table.
+
+    Rows are also partitioned by store: each store's row positions (in date
+    order) and day offsets, so a range within one store only touches its rows.
+    Rows without a store get a partition of their own (`storeless`) that no
+    store filter selects but all-store aggregates include.
+    """
+
+    def __init__(self, df: pd.DataFrame, date_column: str = 'voucher_date'):
+        self.date_column = date_column
+        if df[date_column].is_monotonic_increasing and isinstance(df.index, pd.RangeIndex):
+            # Already in date order (e.g. from the sorted column cache): keep the caller's
+            # arrays, which may be memory-mapped and shared with other workers
+            self.df = df
+        else:
+            self.df = df.sort_values(date_column, kind='mergesort').reset_index(drop=True)
+
+        dates = self.df[date_column].to_numpy(dtype='datetime64[ns]')
+        self.base_date = dates[0].astype('datetime64[D]') if len(dates) else np.datetime64('1970-01-01', 'D')
+        # Days since base_date for every row, non-decreasing because the frame is sorted
+        self.day_offsets = (dates.astype('datetime64[D]') - self.base_date).astype(np.int32)
+
+        # Store -> (row positions, their day offsets), and the same for the rows without a store
+        self.partitions: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.storeless: Tuple[np.ndarray, np.ndarray] = (np.empty(0, dtype=np.int32), self.day_offsets[:0])
+        if 'store' in self.df.columns:
+            codes, stores = pd.factorize(self.df['store'], sort=True)
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            # Missing stores are coded -1, so they sort first
+            bounds = np.searchsorted(codes[order], np.arange(-1, len(stores) + 1))
+            positions = order[bounds[0]:bounds[1]]
+            self.storeless = (positions, self.day_offsets[positions])
+            for i, name in enumerate(stores):
+                positions = order[bounds[i + 1]:bounds[i + 2]]
+                self.partitions[str(name)] = (positions, self.day_offsets[positions])
+        self._store_names = {name.upper(): name for name in self.partitions}
+
+    def partition_name(self, store: str) -> Optional[str]:
+        """The partition a store filter selects (store names match case-insensitively)"""
+        return self._store_names.get(str(store).upper())
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Bytes held by the serving frame and the day-offset index"""
+        return {
+            'frame': int(self.df.memory_usage(deep=True).sum()),
+            'index': int(self.day_offsets.nbytes + sum(p.nbytes + d.nbytes for p, d in
+                                                       [*self.partitions.values(), self.storeless])),
+        }
+
+    def _bound(self, value: Optional[str], side: str) -> Optional[int]:
+        """Translate a date bound into a day offset (inclusive on both ends)"""
+        if value is None or value == '':
+            return None
+        days = (np.datetime64(pd.Timestamp(value), 'ns') - self.base_date) / DAY
+        # Rows are whole days, so a bound partway through a day rounds inwards
+        return int(np.ceil(days)) if side == 'start' else int(np.floor(days))
+
+    def day_range(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        """Inclusive [first, last] day offsets covered by a date range (empty when first > last)"""
+        start = self._bound(start_date, 'start')
+        end = self._bound(end_date, 'end')
+        first = 0 if start is None else start
+        last = int(self.day_offsets[-1]) if end is None and len(self.day_offsets) else end
+        return first, (-1 if last is None else last)
+
+    def row_range(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        """Positional [lo, hi) row bounds for an inclusive date range"""
+        first, last = self.day_range(start_date, end_date)
+        lo = int(np.searchsorted(self.day_offsets, first, side='left'))
+        hi = int(np.searchsorted(self.day_offsets, last, side='right'))
+        return lo, max(lo, hi)
+
+    def positions(self, start_date: Optional[str], end_date: Optional[str],
+                  store: Optional[str] = None) -> Union[range, np.ndarray]:
+        """Row positions of slice(), in date order: a range without a store, else from its partition"""
+        if store is None:
+            return range(*self.row_range(start_date, end_date))
+        positions, days = self.partitions.get(self.partition_name(store),
+                                              (np.empty(0, dtype=np.int32), self.day_offsets[:0]))
+        first, last = self.day_range(start_date, end_date)
+        lo = int(np.searchsorted(days, first, side='left'))
+        hi = int(np.searchsorted(days, last, side='right'))
+        return positions[lo:max(lo, hi)]
+
+    def slice(self, start_date: Optional[str], end_date: Optional[str], store: Optional[str] = None) -> pd.DataFrame:
+        """Rows with start_date <= voucher_date <= end_date (of one store, if given).
+
+        Without a store this is a view of the table; a store's rows are gathered
+        from its partition only.
+        """
+        rows = self.positions(start_date, end_date, store)
+        return self.df.iloc[rows.start:rows.stop] if isinstance(rows, range) else self.df.iloc[rows]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests: reloads swap in a complete state, never overlap, and survive failed loads
+"""
+import threading
+import time
+
+from artifact_reloader import ArtifactReloader, file_signature
+
+
+def wait_idle(reloader: ArtifactReloader, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while reloader.status()["running"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not reloader.status()["running"]
+
+
+def test_failed_load_keeps_current_state():
+    served = {"version": 1}
+    attempts = []
+
+    def load():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("half-written artifact")
+        return {"version": 2}
+
+    reloader = ArtifactReloader(load, served.update, [])
+    reloader.trigger("test")
+    wait_idle(reloader)
+    assert served == {"version": 1}
+    assert reloader.failures == 1 and reloader.last_error == "half-written artifact"
+
+    reloader.trigger("test")
+    wait_idle(reloader)
+    assert served == {"version": 2}
+    assert reloader.reloads == 1 and reloader.last_error is None
+
+
+def test_triggers_during_a_reload_queue_exactly_one_more():
+    release = threading.Event()
+    loads, active, overlapped = [], [], []
+
+    def load():
+        overlapped.append(bool(active))
+        active.append(1)
+        release.wait(5)
+        active.pop()
+        loads.append(1)
+        return {}
+
+    reloader = ArtifactReloader(load, lambda state: None, [])
+    assert reloader.trigger("first")
+    assert not reloader.trigger("second")
+    assert not reloader.trigger("third")
+    release.set()
+    wait_idle(reloader)
+    assert len(loads) == 2 and not any(overlapped)
+    assert reloader.last_reason == "queued"
+
+
+def test_watcher_reloads_once_files_settle(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"old")
+    installed = []
+    reloader = ArtifactReloader(lambda: {"bytes": path.read_bytes()}, installed.append, [path, tmp_path / "missing"],
+                                interval=0.05)
+    assert file_signature([tmp_path / "missing"]) == (None,)
+    reloader.start_watching()
+    try:
+        time.sleep(0.2)
+        assert installed == []  # Unchanged files never reload
+        path.write_bytes(b"new!")
+        deadline = time.monotonic() + 5
+        while not installed and time.monotonic() < deadline:
+            time.sleep(0.02)
+        wait_idle(reloader)
+        time.sleep(0.2)
+        assert installed == [{"bytes": b"new!"}]
+    finally:
+        reloader.stop_watching()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests: frames loaded through the column cache match pandas.read_csv
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from column_cache import mapped_bytes, read_csv_cached
+
+CSV = """label_no,item_name,voucher_date,net_weight,qty,flag
+L1,Ring A,2025-08-01,4.25,1,True
+L2,Chain B,2025-08-03,12.5,2,False
+L3,Ring A,2025-08-02,,3,True
+"""
+
+
+def write(path, text=CSV):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_cached_frame_matches_read_csv(tmp_path, mmap):
+    path = write(tmp_path / "items.csv")
+    expected = pd.read_csv(path, parse_dates=['voucher_date'])
+    for _ in range(2):  # Built, then read back from the cache
+        df = read_csv_cached(path, tmp_path / "cache", parse_dates=['voucher_date'], mmap=mmap)
+        # copy(): the comparison wants plain ndarrays, not the mapped ones
+        pd.testing.assert_frame_equal(df.astype({'label_no': object, 'item_name': object}).copy(), expected,
+                                      check_dtype=False)
+        assert df['voucher_date'].dtype == 'datetime64[ns]'
+    assert (mapped_bytes(df) > 0) == mmap
+
+
+def test_sorted_cache_matches_sorted_read_csv(tmp_path):
+    path = write(tmp_path / "items.csv")
+    df = read_csv_cached(path, tmp_path / "cache", parse_dates=['voucher_date'], sort_by='voucher_date')
+    expected = pd.read_csv(path, parse_dates=['voucher_date']).sort_values('voucher_date', kind='mergesort')
+    assert df['label_no'].astype(str).tolist() == expected['label_no'].tolist()
+
+
+def test_same_named_files_in_different_directories_do_not_collide(tmp_path):
+    first = write(tmp_path / "a" / "sales.csv")
+    second = write(tmp_path / "b" / "sales.csv", CSV.replace("L1,Ring A", "X9,Ring Z"))
+    # Same size and modification time: only the path tells them apart
+    stat = first.stat()
+    os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    cache = tmp_path / "cache"
+    assert read_csv_cached(first, cache)['label_no'].iloc[0] == 'L1'
+    assert read_csv_cached(second, cache)['label_no'].iloc[0] == 'X9'
+    assert read_csv_cached(first, cache)['label_no'].iloc[0] == 'L1'
+
+
+def test_changed_csv_is_reparsed(tmp_path):
+    path = write(tmp_path / "items.csv")
+    read_csv_cached(path, tmp_path / "cache")
+    write(path, CSV + "L4,Bangle C,2025-08-04,20.0,1,False\n")
+    df = read_csv_cached(path, tmp_path / "cache")
+    assert df['label_no'].astype(str).tolist() == ['L1', 'L2', 'L3', 'L4']
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests: the compute pool runs work off the event loop and sheds calls beyond an endpoint's limits
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from compute_pool import ComputePool, parse_limits
+
+
+def test_parse_limits():
+    assert parse_limits("predict=4:32, export=1 ,") == {"predict": (4, 32), "export": (1, 0)}
+    assert parse_limits("") == {}
+
+
+def test_runs_on_pool_threads_and_returns_results():
+    pool = ComputePool(2, {}, default_limit=(2, 4))
+
+    async def main():
+        loop_thread = threading.current_thread()
+        results = await asyncio.gather(*(pool.run("sum", lambda n: (sum(range(n)), threading.current_thread()), n)
+                                         for n in range(5)))
+        assert all(thread is not loop_thread for _, thread in results)
+        return [value for value, _ in results]
+
+    try:
+        assert asyncio.run(main()) == [sum(range(n)) for n in range(5)]
+        assert pool.stats()["endpoints"]["sum"]["completed"] == 5
+    finally:
+        pool.shutdown()
+
+
+def test_calls_beyond_concurrency_and_queue_are_shed():
+    pool = ComputePool(4, {"slow": (1, 1)}, default_limit=(2, 16))
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(pool.run("slow", release.wait, 5))
+        second = asyncio.ensure_future(pool.run("slow", lambda: "queued"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as shed:
+            await pool.run("slow", lambda: "shed")
+        assert shed.value.status_code == 503 and shed.value.headers == {"Retry-After": "1"}
+        # Other endpoints are unaffected
+        assert await pool.run("other", lambda: "ok") == "ok"
+        release.set()
+        return await first, await second
+
+    try:
+        assert asyncio.run(main()) == (True, "queued")
+        stats = pool.stats()["endpoints"]["slow"]
+        assert stats["shed"] == 1 and stats["completed"] == 2 and stats["running"] == stats["waiting"] == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_queue_timeout_sheds_waiting_calls():
+    pool = ComputePool(2, {"slow": (1, 4)}, default_limit=(2, 16), queue_timeout=0.05)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(pool.run("slow", release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as shed:
+            await pool.run("slow", lambda: "late")
+        release.set()
+        await first
+        return shed.value.status_code
+
+    try:
+        assert asyncio.run(main()) == 503
+        assert pool.stats()["endpoints"]["slow"]["waiting"] == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_pool_serves_again_after_shutdown():
+    pool = ComputePool(2, {}, default_limit=(2, 4))
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        return {"value": await pool.run("work", lambda: 42)}
+
+    @app.on_event("shutdown")
+    async def stop():
+        pool.shutdown()
+
+    # Two app lifespans in one process, as with a second test client or a server reload
+    for _ in range(2):
+        with TestClient(app) as client:
+            assert client.get("/work").json() == {"value": 42}
+    assert pool._executor is None
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests: dashboard endpoints answered from the sales rollup match the groupby code they replaced
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from conftest import sales_frame
+from sales_rollup import SalesRollup
+from sales_store import SalesStore
+
+RANGES = [('2025-08-01', '2025-09-29'), ('2025-08-10', '2025-08-20'), ('2025-09-15', '2025-12-31')]
+
+
+@pytest.fixture
+def sales(monkeypatch):
+    """Sales rows, some without a label_no or a value, behind main's rollup"""
+    df = sales_frame()
+    rng = np.random.default_rng(2)
+    df.loc[rng.random(len(df)) < 0.15, 'label_no'] = None
+    df.loc[rng.random(len(df)) < 0.15, 'value'] = np.nan
+    monkeypatch.setattr(main, "sales_rollup", SalesRollup(SalesStore(df)))
+    return df
+
+
+def filtered(df, start, end, store):
+    rows = df[(df['voucher_date'] >= start) & (df['voucher_date'] <= end)]
+    return rows if store is None else rows[rows['store'] == store]
+
+
+def risk(days):
+    return days.apply(lambda x: min(x * 5, 50))
+
+
+@pytest.mark.parametrize("store", [None, 'STORE_1'])
+def test_kpis_match_groupby(sales, store):
+    for start, end in RANGES:
+        rows = filtered(sales, start, end, store)
+        items = rows.groupby('label_no').agg({'value': 'sum', 'voucher_date': ['min', 'max']}).reset_index()
+        scores = risk((items[('voucher_date', 'max')] - items[('voucher_date', 'min')]).dt.days + 1)
+        kpis = main.compute_kpis(start, end, store)
+        assert kpis['totalStockValue'] == pytest.approx(float(rows['value'].sum()))
+        assert kpis['totalItems'] == len(items)
+        assert kpis['ageingStock'] == int((scores > 45).sum())
+        assert kpis['predictedDeadstock'] == int((scores > 48).sum())
+        assert kpis['fastMovingItems'] == int((scores < 30).sum())
+
+
+@pytest.mark.parametrize("store", [None, 'STORE_1'])
+def test_categories_and_trends_match_groupby(sales, store):
+    for start, end in RANGES:
+        rows = filtered(sales, start, end, store)
+        expected = rows.groupby('category').agg({
+            'value': ['sum', 'mean'],
+            'label_no': 'count',
+            'voucher_date': ['min', 'max'],
+        }).reset_index()
+        expected.columns = ['category', 'total_sales', 'avg_sales', 'item_count', 'first_date', 'last_date']
+        turnover = ((expected['last_date'] - expected['first_date']).dt.days / expected['item_count']).fillna(1)
+
+        categories = pd.DataFrame(main.compute_inventory_categories(start, end, 'columnar', store))
+        assert categories['category'].tolist() == expected['category'].tolist()
+        np.testing.assert_allclose(categories['stockValue'], expected['total_sales'])
+        assert categories['itemCount'].tolist() == expected['item_count'].tolist()
+        np.testing.assert_allclose(categories['avgDaysToSell'], turnover)
+
+        trends = pd.DataFrame(main.compute_market_trends(start, end, 'columnar', store))
+        assert trends['category'].tolist() == expected['category'].tolist()
+        np.testing.assert_allclose(trends['avg_sales'], expected['avg_sales'])
+        np.testing.assert_allclose(trends['turnover_days'], turnover)
+        np.testing.assert_allclose(trends['risk'], risk(turnover))
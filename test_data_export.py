@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests: chunked exports encode the same rows as one pandas to_csv / to_json call
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_export import iter_export, match_positions
+
+
+def sales_rows(rows: int = 53) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'voucher_date': pd.Timestamp('2025-08-01') + pd.to_timedelta(rng.integers(0, 30, rows), unit='D'),
+        'label_no': [f"L{i}" for i in range(rows)],
+        'category': pd.Categorical(rng.choice(['RING', 'Chain', 'EARRING'], rows)),
+        'store': rng.choice(['MAIN_STORE', 'store_1', None], rows),
+        'net_weight': np.round(rng.uniform(1, 30, rows), 3).astype(np.float32),
+        'value': rng.uniform(1e3, 1e5, rows),
+    })
+
+
+@pytest.mark.parametrize('filters', [
+    {}, {'category': 'ring'}, {'store': 'STORE_1'}, {'category': 'chain', 'store': 'main_store'}, {'store': 'none'},
+])
+def test_match_positions_matches_string_filter(filters):
+    df = sales_rows()
+    mask = pd.Series(True, index=df.index)
+    for column, value in filters.items():
+        mask &= df[column].astype(str).str.upper() == value.upper()
+    positions = match_positions(df, filters)
+    if not filters:
+        assert positions is None
+    else:
+        np.testing.assert_array_equal(positions, np.flatnonzero(mask.to_numpy()))
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 10, 1000])
+def test_csv_matches_to_csv(chunk_rows):
+    df = sales_rows()
+    positions = match_positions(df, {'category': 'ring'})
+    columns = ['label_no', 'voucher_date', 'value']
+    body = b''.join(iter_export(df, 'csv', positions, columns, chunk_rows=chunk_rows))
+    assert body == df.iloc[positions][columns].to_csv(index=False).encode('utf-8')
+    assert b''.join(iter_export(df, 'csv', chunk_rows=chunk_rows)) == df.to_csv(index=False).encode('utf-8')
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 10, 1000])
+def test_ndjson_matches_records(chunk_rows):
+    df = sales_rows()
+    lines = b''.join(iter_export(df, 'ndjson', chunk_rows=chunk_rows)).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == len(df)
+    weights = df['net_weight'].astype(str).astype(float).tolist()
+    for record, weight, (_, row) in zip(records, weights, df.iterrows()):
+        assert record['voucher_date'] == row['voucher_date'].isoformat()
+        assert record['label_no'] == row['label_no']
+        assert record['category'] == row['category']
+        assert record['store'] == (None if pd.isna(row['store']) else row['store'])
+        # float32 weights print as their shortest repr, not the widened binary value
+        assert record['net_weight'] == weight
+        assert record['value'] == pytest.approx(row['value'], rel=1e-12)
+
+
+def test_empty_selection():
+    df = sales_rows()
+    empty = np.empty(0, dtype=np.int64)
+    assert b''.join(iter_export(df, 'ndjson', empty)) == b''
+    assert b''.join(iter_export(df, 'csv', empty)) == df.iloc[:0].to_csv(index=False).encode('utf-8')
+
+
+@pytest.mark.parametrize('within', [range(5, 40), np.array([1, 4, 9, 16, 25, 36, 49])])
+def test_match_positions_within_positions(within):
+    df = sales_rows()
+    filters = {'category': 'ring', 'store': 'main_store'}
+    everywhere = match_positions(df, filters)
+    np.testing.assert_array_equal(match_positions(df, filters, within), np.intersect1d(everywhere, np.asarray(within)))
+    assert match_positions(df, {}, within) is within
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 1000])
+@pytest.mark.parametrize('store, category', [(None, None), ('STORE_1', None), (None, 'ring')])
+def test_sales_export_gathers_chunks_from_the_store(chunk_rows, store, category):
+    import main
+    from conftest import sales_frame
+    from sales_ingest import SalesDelta
+    from sales_rollup import SalesRollup
+    from sales_store import SalesStore
+
+    sales = SalesStore(sales_frame())
+    rollup = SalesRollup(sales).with_delta(SalesDelta(sales).append(sales_frame(rows=30, seed=1)))
+    df, positions, extra = main._select_sales(rollup, '2025-08-10', '2025-09-10', category, store)
+    assert df is sales.df and extra is not None
+
+    rows = rollup.slice('2025-08-10', '2025-09-10', store)
+    matched = match_positions(rows, {'category': category})
+    expected = (rows if matched is None else rows.iloc[matched])[df.columns]
+    body = b''.join(iter_export(df, 'csv', positions, chunk_rows=chunk_rows, extra=extra))
+    assert body == expected.to_csv(index=False).encode('utf-8')
+
+
+def test_prediction_export_selects_positions_without_copying():
+    import main
+
+    df = sales_rows()
+    rows, positions = main._select_predictions(df, '2025-08-05', '2025-08-20', 'ring', None)
+    assert rows is df
+    in_range = df[(df['voucher_date'] >= '2025-08-05') & (df['voucher_date'] <= '2025-08-20')]
+    expected = in_range.iloc[match_positions(in_range, {'category': 'ring'})]
+    assert b''.join(iter_export(rows, 'csv', positions, chunk_rows=4)) == expected.to_csv(index=False).encode('utf-8')
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests: feature store lookups match as-of means computed with pandas over the raw rows
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import PRODUCT_CATEGORIES, MarketFeatureStore, category_mapping
+from prediction_features import DEFAULT_MARKET_FEATURES
+
+WINDOW = 7
+STORES = ['MAIN_STORE', 'STORE_1', 'STORE_2', 'STORE_3', 'STORE_6', 'STORE_9']
+
+
+def vouchers(rows: int = 500, seed: int = 0, first: str = '2025-08-01', days: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    store = rng.choice(['MAIN_STORE', 'STORE_1', 'STORE_2', 'STORE_9', None], rows)
+    category = rng.choice(['RING', 'CHAIN', 'PENDANT', 'BANGLE', None], rows)
+    # Only the main store records product categories; PENDANT is a necklace there
+    product = np.where(category == 'PENDANT', 'GOLD NECKLACE', pd.Series(category).map(
+        {'RING': 'GOLD RINGS', 'CHAIN': 'GOLD CHAINS'}).to_numpy())
+    rates = rng.uniform(5800, 6400, rows)
+    rates[rng.random(rows) < 0.2] = np.nan
+    return pd.DataFrame({
+        'voucher_date': pd.Timestamp(first) + pd.to_timedelta(rng.integers(0, days, rows), unit='D')
+        + pd.to_timedelta(rng.integers(0, 36_000, rows), unit='s'),
+        'category': category,
+        'product_category': np.where(store == 'MAIN_STORE', product, None),
+        'store': store,
+        'gold_rate_used': rates,
+        'value': rng.uniform(1_000, 200_000, rows),
+    })
+
+
+def mean(values: pd.Series, fallback):
+    return values.mean() if len(values) else fallback
+
+
+def baseline(df: pd.DataFrame, store: str, product: str, day: pd.Timestamp) -> dict:
+    """Features as of `day` by filtering the raw rows (dates past the last day use the last day)"""
+    rows = df[df['store'].notna()]
+    day = min(day, rows['voucher_date'].max().normalize())
+    upto = rows[rows['voucher_date'].dt.normalize() <= day]
+    if not len(upto):
+        return {**{k: DEFAULT_MARKET_FEATURES[k] for k in ('store_avg_sales', 'market_share', 'sales_momentum',
+                                                         'category_avg_market')}, 'price_per_gram': np.nan}
+    recent = upto[upto['voucher_date'].dt.normalize() > day - pd.Timedelta(days=WINDOW)]
+    market_avg = upto['value'].mean()
+    market_rate = mean(recent['gold_rate_used'].dropna(), mean(upto['gold_rate_used'].dropna(), np.nan))
+    known = store in set(rows['store']) and store != 'STORE_9'
+    own, own_recent = (upto[upto['store'] == store], recent[recent['store'] == store]) if known else (upto, recent)
+    store_avg = mean(own['value'], market_avg)
+
+    mapping = category_mapping(df)
+    products = df['product_category'].where(df['product_category'].isin(PRODUCT_CATEGORIES),
+                                            df['category'].str.upper().map(mapping))
+    in_category = upto[products.loc[upto.index] == product]
+    return {
+        'store_avg_sales': store_avg,
+        'market_share': 100 * own['value'].sum() / upto['value'].sum() if known
+        else DEFAULT_MARKET_FEATURES['market_share'],
+        'sales_momentum': mean(own_recent['value'], store_avg),
+        'price_per_gram': mean(own_recent['gold_rate_used'].dropna(), market_rate),
+        'category_avg_market': mean(in_category['value'], market_avg),
+    }
+
+
+def check(features: MarketFeatureStore, df: pd.DataFrame, dates) -> None:
+    cases = [(store, product, day) for store in STORES for product in PRODUCT_CATEGORIES + ['OTHER'] for day in dates]
+    looked_up = features.lookup([c[1] for c in cases], [c[0] for c in cases], pd.DatetimeIndex([c[2] for c in cases]))
+    for i, (store, product, day) in enumerate(cases):
+        expected = baseline(df, store, product, day)
+        for name, value in expected.items():
+            np.testing.assert_allclose(looked_up[name][i], value, rtol=1e-9, err_msg=f"{name} {store} {product} {day}")
+
+
+def test_category_mapping_follows_main_store_rows():
+    mapping = category_mapping(vouchers())
+    assert mapping['PENDANT'] == 'GOLD NECKLACE'
+    assert mapping['RING'] == 'GOLD RINGS' and 'BANGLE' not in mapping
+
+
+def test_lookup_matches_as_of_means():
+    df = vouchers()
+    features = MarketFeatureStore.from_sales(df, window=WINDOW)
+    days = pd.to_datetime(['2025-07-20', '2025-08-01', '2025-08-03', '2025-08-09', '2025-08-25', '2025-09-09',
+                           '2026-01-01'])
+    check(features, df, days)
+
+
+@pytest.mark.parametrize('first', ['2025-07-25', '2025-08-20'])
+def test_added_rows_match_a_store_built_from_all_rows(first):
+    df, added = vouchers(seed=0), vouchers(rows=120, seed=1, first=first, days=30)
+    added.loc[added.index[:10], 'store'] = 'STORE_3'  # A store the base rows do not have
+    features = MarketFeatureStore.from_sales(df, window=WINDOW).with_rows(added)
+    assert features.version == 1
+    combined = pd.concat([df, added], ignore_index=True)
+    check(features, combined, pd.to_datetime(['2025-07-26', '2025-08-05', '2025-09-01', '2025-09-30']))
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests: the fused engine scores like the ensemble's own per-model predictions
+"""
+import numpy as np
+import pytest
+
+from conftest import FEATURE_COLUMNS, random_requests
+from inference import FUSED_MAX_ROWS, FusedEnsemble
+from prediction_features import build_feature_matrix, predict_matrix
+
+
+def features(n: int, seed: int) -> np.ndarray:
+    return build_feature_matrix(*random_requests(n, seed), FEATURE_COLUMNS)
+
+
+@pytest.mark.parametrize('rows', [1, 7, FUSED_MAX_ROWS, FUSED_MAX_ROWS + 1, 3000])
+def test_fused_matches_predict_matrix(model_package, rows):
+    X = features(rows, seed=rows)
+    expected, _ = predict_matrix(model_package, X)
+    np.testing.assert_allclose(FusedEnsemble(model_package).predict(X), expected, rtol=1e-6)
+
+
+def test_row_scores_the_same_alone_as_in_a_batch(model_package):
+    engine = FusedEnsemble(model_package)
+    X = features(50, seed=5)
+    batch = engine.predict(X)
+    np.testing.assert_array_equal([engine.predict(X[i:i + 1])[0] for i in range(len(X))], batch)
+
+
+def test_exported_state_scores_like_the_models(model_package):
+    engine = FusedEnsemble(model_package)
+    rebuilt = FusedEnsemble.from_state(model_package, *engine.export_state())
+    X = features(FUSED_MAX_ROWS * 3, seed=9)
+    expected, _ = predict_matrix(model_package, X)
+    np.testing.assert_allclose(rebuilt.predict(X), expected, rtol=1e-6)
+    np.testing.assert_array_equal(rebuilt.predict(X[:10]), engine.predict(X[:10]))
+
+
+def test_model_subset_rescales_weights(model_package):
+    names = ['Random Forest', 'XGBoost']
+    engine = FusedEnsemble(model_package, models=names)
+    X = features(20, seed=11)
+    _, base = predict_matrix(model_package, X)
+    weights = dict(zip(model_package['base_models'], model_package['weights']))
+    rows = [list(model_package['base_models']).index(name) for name in names]
+    expected = sum(weights[name] * base[row] for name, row in zip(names, rows)) \
+        * sum(model_package['weights']) / sum(weights[name] for name in names)
+    assert engine.models == names
+    np.testing.assert_allclose(engine.predict(X), expected, rtol=1e-6)
+    with pytest.raises(ValueError):
+        FusedEnsemble(model_package, models=['Lasso'])
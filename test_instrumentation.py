@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests: request metrics are labelled by route template and carry the phases and rows handlers report
+"""
+import re
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from instrumentation import (
+    LATENCY_BUCKETS, RequestMetrics, RequestMetricsMiddleware, RequestRecord, SlowRequestProfiler, add_rows, phase,
+    recording,
+)
+
+
+def metric(text: str, line_prefix: str) -> float:
+    matches = [line for line in text.splitlines() if line.startswith(line_prefix + ' ')]
+    assert len(matches) == 1, (line_prefix, matches)
+    return float(matches[0].rsplit(' ', 1)[1])
+
+
+def instrumented_app(profiler=None):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        with phase("filter"):
+            add_rows(10)
+        with phase("filter"):
+            add_rows(5)
+        return {"id": item_id}
+
+    @app.get("/slow")
+    def slow():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+        return {}
+
+    metrics = RequestMetrics()
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics, profiler=profiler)
+    return app, metrics
+
+
+def test_requests_are_labelled_by_route_template():
+    app, metrics = instrumented_app()
+    client = TestClient(app)
+    bodies = [client.get(f"/items/{i}").content for i in range(3)]
+    client.get("/missing")
+    text = metrics.render([("jewelai_extra", "gauge", "Extra.", [({"kind": 'a"b'}, 2)])])
+
+    assert metric(text, 'jewelai_requests_total{route="/items/{item_id}",method="GET",status="200"}') == 3
+    assert metric(text, 'jewelai_requests_total{route="unmatched",method="GET",status="404"}') == 1
+    assert metric(text, 'jewelai_rows_scanned_total{route="/items/{item_id}"}') == 45
+    assert metric(text, 'jewelai_response_bytes_total{route="/items/{item_id}"}') == sum(map(len, bodies))
+    # Repeated phases are summed per request
+    assert metric(text, 'jewelai_request_phase_seconds_count{route="/items/{item_id}",phase="filter"}') == 3
+    assert metric(text, 'jewelai_request_duration_seconds_bucket{route="/items/{item_id}",method="GET",le="+Inf"}') == 3
+    assert metric(text, 'jewelai_extra{kind="a\\"b"}') == 2
+    assert not re.search(r'/items/\d', text)
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = RequestMetrics()
+    for seconds in (0.0004, 0.003, 0.003, 20.0):
+        metrics.observe("/r", "GET", 200, seconds, 0, RequestRecord())
+    text = metrics.render()
+    counts = [metric(text, f'jewelai_request_duration_seconds_bucket{{route="/r",method="GET",le="{bound:g}"}}')
+              for bound in LATENCY_BUCKETS]
+    assert counts == [sum(seconds <= bound for seconds in (0.0004, 0.003, 0.003, 20.0)) for bound in LATENCY_BUCKETS]
+    assert metric(text, 'jewelai_request_duration_seconds_sum{route="/r",method="GET"}') == 20.0064
+
+
+def test_helpers_report_only_inside_a_record():
+    with phase("load"):
+        add_rows(3)  # No request: nothing to report to
+    with recording(RequestRecord()) as record:
+        with phase("load"):
+            add_rows(3)
+    assert [name for name, _ in record.phases] == ["load"] and record.rows == [3]
+
+
+def test_slow_requests_are_profiled():
+    profiler = SlowRequestProfiler(threshold=0.05, interval=0.002)
+    app, _ = instrumented_app(profiler)
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/slow?x=1")
+    assert [(p["route"], p["query"]) for p in profiler.profiles] == [("/slow", "x=1")]
+    assert profiler.profiles[0]["seconds"] >= 0.1
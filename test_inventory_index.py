@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests: index selections match the pandas filter and sort over the catalogue
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from inventory_index import ITEM_FIELDS, InventoryIndex, SORT_COLUMNS, decode_cursor, encode_cursor, query_signature
+
+
+def catalogue(rows: int = 500, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    risk = np.round(rng.uniform(0, 100, rows), 0)  # Rounded, so sort ties and range edges both occur
+    risk[::37] = np.nan
+    return pd.DataFrame({
+        'label_no': [f"L{i}" for i in range(rows)],
+        'category': rng.choice(['RING', 'CHAIN', 'EARRING'], rows),
+        'predicted_potential_sales': rng.uniform(0, 1e5, rows),
+        'days_to_sell': np.round(rng.uniform(0, 60, rows), 1),
+        'inventory_risk_score': risk,
+        'turnover_category': rng.choice(['Fast', 'Slow'], rows),
+    })
+
+
+def baseline_filter(df: pd.DataFrame, category, risk_min, risk_max) -> pd.DataFrame:
+    """The copy-and-filter /api/inventory/items ran before the index"""
+    df = df.copy()
+    if category:
+        df = df[df['category'] == category.upper()]
+    return df[(df['inventory_risk_score'] >= risk_min) & (df['inventory_risk_score'] <= risk_max)]
+
+
+@pytest.mark.parametrize('category', [None, 'ring', 'CHAIN', 'BANGLE'])
+@pytest.mark.parametrize('risk_min, risk_max', [(0, 100), (20, 40), (50, 50), (70, 10), (-5, 500)])
+def test_unsorted_selection_matches_filter(category, risk_min, risk_max):
+    df = catalogue()
+    index = InventoryIndex(df)
+    expected = baseline_filter(df, category, risk_min, risk_max)
+    positions = index.select(category, risk_min, risk_max)
+    pd.testing.assert_frame_equal(index.rows(positions, ITEM_FIELDS), expected[ITEM_FIELDS])
+
+
+@pytest.mark.parametrize('sort', list(SORT_COLUMNS))
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('category, risk_min, risk_max', [(None, 0, 100), ('earring', 25, 75), ('RING', 33, 33)])
+def test_sorted_selection_matches_sort_values(sort, descending, category, risk_min, risk_max):
+    df = catalogue()
+    index = InventoryIndex(df)
+    column = SORT_COLUMNS[sort]
+    expected = baseline_filter(df, category, risk_min, risk_max)
+    rows = index.rows(index.select(category, risk_min, risk_max, sort, descending), ITEM_FIELDS)
+
+    assert sorted(rows['label_no']) == sorted(expected['label_no'])
+    values = expected[column].sort_values(ascending=not descending, kind='stable').to_numpy()
+    np.testing.assert_array_equal(rows[column].to_numpy(), values)
+    if not descending:
+        pd.testing.assert_frame_equal(rows, expected.sort_values(column, kind='stable')[ITEM_FIELDS])
+
+
+def test_cursor_round_trip():
+    signature = query_signature('RING', 0, 100, 'risk', 'desc', 1)
+    assert decode_cursor(encode_cursor(300, signature), signature) == 300
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(300, signature), query_signature('RING', 0, 100, 'risk', 'desc', 2))
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", signature)
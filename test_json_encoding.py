@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests: column-wise encoding gives the values of to_dict('records') + jsonable_encoder
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+import json_encoding
+from json_encoding import dumps, frame_columns, frame_payload, frame_records
+
+
+def mixed_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'label_no': ['L1', None, 'L3', 'L4'],
+        'category': pd.Categorical(['RING', None, 'CHAIN', 'RING']),
+        'voucher_date': pd.to_datetime(['2025-08-01', None, '2025-08-03 10:30', '2025-08-04'], format='ISO8601'),
+        'stamp': pd.to_datetime(['2025-08-01 00:00:00.250', '2025-08-02', '2025-08-03 00:00:00.000000001', None],
+                                format='ISO8601'),
+        'value': [1.5, np.nan, 3.0, 1e20],
+        'count': np.array([1, 2, 3, 4], dtype=np.int64),
+        'purity': pd.array([22, None, 18, 24], dtype='Int16'),
+        'flag': [True, False, True, False],
+        'net_weight': np.array([8.873, 1.1, 0.3, 12.0], dtype=np.float32),
+    })
+
+
+def baseline_records(df: pd.DataFrame):
+    """What the endpoints returned before: records with NaN/NaT as null, through FastAPI's encoder"""
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    return jsonable_encoder(records)
+
+
+def test_records_match_to_dict_and_jsonable_encoder():
+    df = mixed_frame()
+    expected = baseline_records(df.drop(columns='net_weight'))
+    records = frame_records(df)
+    assert [{k: v for k, v in r.items() if k != 'net_weight'} for r in records] == expected
+    # float32 values come out as their shortest repr rather than the widened binary value
+    assert [r['net_weight'] for r in records] == [8.873, 1.1, 0.3, 12.0]
+
+
+def test_columnar_holds_the_same_values():
+    df = mixed_frame()
+    columns = frame_payload(df, 'columnar')
+    records = frame_payload(df, 'records')
+    assert list(columns) == list(df.columns)
+    assert [dict(zip(columns, row)) for row in zip(*columns.values())] == records
+    assert frame_columns(df.iloc[:0]) == {name: [] for name in df.columns}
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_dumps_parses_back_to_the_same_values(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(json_encoding, 'orjson', None)
+    elif json_encoding.orjson is None:
+        pytest.skip("orjson is not installed")
+    content = {
+        'items': frame_records(mixed_frame()),
+        'total': np.int64(4),
+        'mean': np.float64(2.5),
+        'array': np.arange(3),
+        'when': pd.Timestamp('2025-08-01 12:00'),
+        'name': 'Ring – 22K',
+    }
+    expected = json.loads(json.dumps(jsonable_encoder({
+        **content, 'total': 4, 'mean': 2.5, 'array': [0, 1, 2], 'when': '2025-08-01T12:00:00',
+    })))
+    body = dumps(content)
+    assert json.loads(body) == expected
+    assert b'NaN' not in body and b', ' not in body
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests: an exported artifact scores like the pickled ensemble it came from
+"""
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from conftest import FEATURE_COLUMNS, random_requests
+from inference import FUSED_MAX_ROWS, FusedEnsemble
+from model_artifact import ModelLoader, artifact_path, export_artifact, is_current, load_artifact, mapped_bytes
+from prediction_features import build_feature_matrix, predict_matrix
+
+
+@pytest.fixture
+def exported(tmp_path, model_package):
+    source = tmp_path / "output" / "ensemble_model.pkl"
+    source.parent.mkdir()
+    source.write_bytes(pickle.dumps(model_package))
+    target = artifact_path(source, tmp_path / "cache")
+    export_artifact(FusedEnsemble(model_package), target, source)
+    return source, target
+
+
+def test_artifact_path_is_per_pickle_and_outside_its_directory(tmp_path):
+    cache = tmp_path / "cache"
+    first = artifact_path(tmp_path / "a" / "ensemble_model.pkl", cache)
+    second = artifact_path(tmp_path / "b" / "ensemble_model.pkl", cache)
+    assert first != second and first.parent == second.parent == cache
+    assert first == artifact_path(tmp_path / "a" / ".." / "a" / "ensemble_model.pkl", cache)
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_loaded_artifact_matches_predict_matrix(exported, model_package, mmap):
+    _, target = exported
+    engine = load_artifact(target, mmap=mmap)
+    assert engine.feature_columns == FEATURE_COLUMNS
+    assert (mapped_bytes(engine) > 0) == mmap
+    for rows in (1, FUSED_MAX_ROWS + 50):
+        X = build_feature_matrix(*random_requests(rows, seed=rows), FEATURE_COLUMNS)
+        expected, _ = predict_matrix(model_package, X)
+        np.testing.assert_allclose(engine.predict(X), expected, rtol=1e-6)
+
+
+def test_artifact_is_current_until_the_pickle_changes(exported, model_package):
+    source, target = exported
+    assert is_current(target, source)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not is_current(target, source)
+
+    # Re-exporting replaces the artifact in place
+    export_artifact(FusedEnsemble(model_package), target, source)
+    assert is_current(target, source)
+    assert [p.name for p in target.parent.iterdir() if not p.name.startswith('.')] == [target.name]
+
+    # Served as is when the pickle is gone; never when unreadable
+    source.unlink()
+    assert is_current(target, source)
+    (target / "manifest.json").write_text("{")
+    assert not is_current(target, source)
+    with pytest.raises(ValueError):
+        load_artifact(target)
+
+
+def test_subset_engines_are_not_exported(tmp_path, model_package):
+    with pytest.raises(ValueError):
+        export_artifact(FusedEnsemble(model_package, models=['XGBoost']), tmp_path / "x.model", tmp_path / "x.pkl")
+    assert not (tmp_path / "x.model").exists()
+
+
+def test_model_loader_reports_and_installs():
+    installed = []
+
+    def load(report):
+        report("loading", 0.5)
+        return {"model": 1}
+
+    loader = ModelLoader(load, lambda loader, state: installed.append(state))
+    assert loader.wait(5)
+    assert installed == [{"model": 1}] and loader.status()["phase"] == "ready"
+
+    failing = ModelLoader(lambda report: 1 / 0, lambda loader, state: None)
+    assert failing.wait(5)
+    assert failing.status()["phase"] == "failed" and failing.error
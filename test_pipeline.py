@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests: the chunked, parallel pipeline writes what pandas merges over whole files would
+"""
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+
+RAW = Path(__file__).parent / "Data" / "jewellery_multi_store_dataset"
+RAW_FILES = ["sales_data.csv", "store_1_sales.csv", "store_2_sales.csv",
+             "item_master.csv", "accounts.csv", "weight_slab.csv"]
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    for name in RAW_FILES:
+        shutil.copy(RAW / name, raw / name)
+    return raw
+
+
+def denormalize(raw_dir: Path, tmp_path: Path, **options) -> dict:
+    output = tmp_path / f"out-{len(list(tmp_path.iterdir()))}"
+    pipeline.run(["denormalize"], raw_dir=raw_dir, output_dir=output, **options)
+    return {name: pd.read_csv(output / name, low_memory=False)
+            for name in ("processed_main_store.csv", "processed_market_data.csv")}
+
+
+def test_chunked_and_parallel_runs_match_a_whole_file_run(raw_dir, tmp_path):
+    whole = denormalize(raw_dir, tmp_path, jobs=1, chunk_rows=1_000_000)
+    for options in ({"jobs": 1, "chunk_rows": 97}, {"jobs": 3, "chunk_rows": 250}):
+        chunked = denormalize(raw_dir, tmp_path, **options)
+        for name, frame in whole.items():
+            pd.testing.assert_frame_equal(chunked[name], frame, obj=f"{name} {options}")
+
+
+def test_joins_match_pandas_merge(raw_dir):
+    dims = pipeline._load_dimensions(raw_dir)
+    items, accounts, slabs = (pd.read_csv(raw_dir / f"{n}.csv") for n in ("item_master", "accounts", "weight_slab"))
+
+    sales = pd.read_csv(raw_dir / "sales_data.csv")
+    expected = (sales.merge(items, on="label_no", how="left", suffixes=("", "_item"))
+                .merge(accounts, on="account_id", how="left")
+                .merge(slabs[["slab_id", "slab_label", "product_category"]], on="slab_id", how="left"))
+    out = pipeline.denormalize_chunk(sales, "main", dims)
+    for column in expected.columns:
+        pd.testing.assert_series_equal(out[column], expected[column], check_dtype=False, obj=column)
+    assert (out["store"] == sales["location_to"]).all()
+
+    store = pd.read_csv(raw_dir / "store_1_sales.csv")
+    out = pipeline.denormalize_chunk(store, "store", dims)
+    slab_id = pd.cut(store["gross_weight"], [0, 5, 10, 15, 20, 30, 40, np.inf], right=False,
+                     labels=[1, 10, 19, 11, 20, 12, 9]).astype(np.int64)
+    assert out["slab_id"].tolist() == slab_id.tolist()
+    expected = store.merge(items.add_prefix("item_"), left_on="label_no", right_on="item_label_no", how="left")
+    for column in items.add_prefix("item_").columns:
+        pd.testing.assert_series_equal(out[column], expected[column], check_dtype=False, obj=column)
+    names = store.merge(accounts, on="account_id", how="left")["account_name"]
+    assert out["customer_name"].tolist() == names.tolist()
+
+
+def test_missing_values_are_filled_with_dataset_medians_and_modes(raw_dir, tmp_path):
+    market = denormalize(raw_dir, tmp_path, jobs=2, chunk_rows=200)["processed_market_data.csv"]
+    dims = pipeline._load_dimensions(raw_dir)
+    parts = [pipeline.add_row_features(pipeline.denormalize_chunk(pd.read_csv(path), kind, dims), dims["slabs"])
+             for _, path, kind in pipeline.sales_sources(raw_dir)]
+    combined = pd.concat(parts, ignore_index=True)
+    for column in combined.columns[combined.isna().any()]:
+        values = combined[column].dropna()
+        filled = market[column][combined[column].isna().to_numpy()]
+        if not len(values):
+            assert filled.isna().all(), column  # Nothing to take a median or mode of
+            continue
+        if pd.api.types.is_numeric_dtype(values):
+            np.testing.assert_allclose(filled.to_numpy(dtype=np.float64), values.median(), err_msg=column)
+        else:
+            counts = values.astype(object).value_counts()
+            mode = sorted(counts[counts == counts.max()].index)[0]
+            assert (filled.astype(str) == str(mode)).all(), column
+    gold = combined["gold_rate_used"]
+    np.testing.assert_allclose(market["relative_price"], gold / gold.mean())
+
+
+def test_unchanged_inputs_are_not_rebuilt(raw_dir, tmp_path):
+    output = tmp_path / "out"
+    assert pipeline.run(["denormalize"], raw_dir=raw_dir, output_dir=output, jobs=1) == {"denormalize": "rebuilt"}
+    assert pipeline.run(["denormalize"], raw_dir=raw_dir, output_dir=output, jobs=1) == {"denormalize": "up to date"}
+    with open(raw_dir / "store_2_sales.csv", "a") as f:
+        f.write("")  # Same content: still up to date
+    assert pipeline.run(["denormalize"], raw_dir=raw_dir, output_dir=output, jobs=1) == {"denormalize": "up to date"}
+    sales = pd.read_csv(raw_dir / "store_2_sales.csv")
+    sales.iloc[:-1].to_csv(raw_dir / "store_2_sales.csv", index=False)
+    assert pipeline.run(["denormalize"], raw_dir=raw_dir, output_dir=output, jobs=1) == {"denormalize": "rebuilt"}
+
+
+def test_fill_value_matches_pandas_median():
+    rng = np.random.default_rng(0)
+    for n in (1, 2, 7, 100):
+        values = pd.Series(rng.integers(0, 5, n).astype(np.float64))
+        assert pipeline._fill_value(values.value_counts(), numeric=True) == values.median()
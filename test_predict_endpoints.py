@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests: prediction endpoints reject unparseable voucher dates with a 422 naming the items
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+
+@pytest.fixture(autouse=True)
+def served(monkeypatch, model_package):
+    monkeypatch.setattr(main, "ensemble_model_package", model_package)
+    monkeypatch.setattr(main, "inference_engine", None)
+    monkeypatch.setattr(main, "prediction_grid", None)
+    monkeypatch.setattr(main, "market_features", None)
+
+
+def item(voucher_date: str) -> dict:
+    return {"category": "RING", "net_weight": 8.5, "voucher_date": voucher_date, "store_id": "STORE_1"}
+
+
+def test_batch_names_every_bad_date():
+    dates = ['2025-08-01', '2025-13-01', '2025-08-03', 'yesterday', '2025-08-05']
+    response = client.post("/api/predict/sales/batch", json={"items": [item(d) for d in dates]})
+    assert response.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [
+        ["body", "items", 1, "voucher_date"], ["body", "items", 3, "voucher_date"],
+    ]
+
+
+def test_batch_with_valid_dates_is_scored():
+    response = client.post("/api/predict/sales/batch", json={"items": [item('2025-08-01'), item('2025-09-15')]})
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+
+
+def test_single_prediction_rejects_a_bad_date():
+    response = client.post("/api/predict/sales", json=item('2025-02-30'))
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "voucher_date"]
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests: vectorized feature rows and scores match the per-request feature dict
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from conftest import FEATURE_COLUMNS, random_requests
+from prediction_features import build_feature_matrix, feature_key, predict_matrix
+
+
+def request_features(category: str, net_weight: float, voucher_date: str, purity: float, store_id: str) -> dict:
+    """The feature dict /api/predict/sales built for one request before vectorization"""
+    date_obj = datetime.strptime(voucher_date, '%Y-%m-%d')
+    price_per_gram = 6000 if purity == 22 else 5500 if purity == 18 else 6500
+    price = price_per_gram * net_weight
+    category = category.upper()
+    return {
+        'year': date_obj.year,
+        'month': date_obj.month,
+        'day': date_obj.day,
+        'day_of_week': date_obj.weekday(),
+        'week_of_year': date_obj.isocalendar()[1],
+        'is_weekend': 1 if date_obj.weekday() >= 5 else 0,
+        'is_festival': 0,
+        'net_weight': net_weight,
+        'price_per_gram': price_per_gram,
+        'market_share': 13.0,
+        'category_avg_market': 90000,
+        'store_avg_sales': 95000,
+        'sales_momentum': 92000,
+        'product_category_GOLD BRACELET': 1 if category in ['BRACELET', 'GOLD BRACELET'] else 0,
+        'product_category_GOLD CHAINS': 1 if category in ['CHAIN', 'GOLD CHAINS'] else 0,
+        'product_category_GOLD EARRING': 1 if category in ['EARRING', 'GOLD EARRING'] else 0,
+        'product_category_GOLD NECKLACE': 1 if category in ['NECKLACE', 'GOLD NECKLACE'] else 0,
+        'product_category_GOLD RINGS': 1 if category in ['RING', 'GOLD RINGS'] else 0,
+        'weight_category_Light': 1 if net_weight < 5 else 0,
+        'weight_category_Medium': 1 if 5 <= net_weight < 10 else 0,
+        'weight_category_Heavy': 1 if 10 <= net_weight < 20 else 0,
+        'weight_category_Very_Heavy': 1 if 20 <= net_weight < 50 else 0,
+        'weight_category_Ultra_Heavy': 1 if net_weight >= 50 else 0,
+        'price_bracket_Budget': 1 if price < 20000 else 0,
+        'price_bracket_Mid': 1 if 20000 <= price < 50000 else 0,
+        'price_bracket_Premium': 1 if 50000 <= price < 100000 else 0,
+        'price_bracket_Luxury': 1 if 100000 <= price < 200000 else 0,
+        'price_bracket_Ultra': 1 if price >= 200000 else 0,
+        **{f'store_id_{store}': 1 if store_id == store else 0
+           for store in ('MAIN_STORE', 'STORE_1', 'STORE_2', 'STORE_3', 'STORE_4', 'STORE_5', 'STORE_6')},
+    }
+
+
+def requests_with_edges():
+    categories, weights, dates, purities, stores = random_requests(200)
+    # Bucket boundaries: weight categories, and price brackets at 6000 per gram
+    edges = [0.0, 4.999, 5.0, 10.0, 20.0, 50.0, 20000 / 6000, 50000 / 6000, 100000 / 6000, 200000 / 6000]
+    n = len(edges)
+    return (categories[:n] + categories, np.concatenate([edges, weights]), dates[:n] + dates,
+            np.concatenate([np.full(n, 22.0), purities]), stores[:n] + stores)
+
+
+def test_feature_matrix_matches_per_request_features():
+    fields = requests_with_edges()
+    X = build_feature_matrix(*fields, FEATURE_COLUMNS)
+    expected = pd.DataFrame([request_features(*row) for row in zip(*fields)])[FEATURE_COLUMNS]
+    np.testing.assert_array_equal(X, expected.to_numpy(dtype=np.float64))
+
+
+def test_equal_feature_keys_build_equal_rows():
+    fields = requests_with_edges()
+    X = build_feature_matrix(*fields, FEATURE_COLUMNS)
+    rows = {}
+    for i, row in enumerate(zip(*fields)):
+        rows.setdefault(feature_key(*row), X[i])
+        np.testing.assert_array_equal(rows[feature_key(*row)], X[i])
+
+
+def test_predict_matrix_matches_per_request_scoring(model_package):
+    fields = random_requests(40, seed=3)
+    ensemble, base = predict_matrix(model_package, build_feature_matrix(*fields, FEATURE_COLUMNS))
+    for i, row in enumerate(zip(*fields)):
+        X = pd.DataFrame([request_features(*row)])[FEATURE_COLUMNS]
+        X_scaled = model_package['scaler'].transform(X)
+        predictions = [model.predict(X_scaled)[0] for model in model_package['base_models'].values()]
+        expected = sum(w * p for w, p in zip(model_package['weights'], predictions))
+        np.testing.assert_allclose(base[:, i], predictions, rtol=1e-6)
+        np.testing.assert_allclose(ensemble[i], expected, rtol=1e-9)
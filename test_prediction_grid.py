@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests: grid answers match the model within max_error wherever the grid answers, and fall back elsewhere
+"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from conftest import FEATURE_COLUMNS
+from inference import FusedEnsemble
+from prediction_features import build_feature_matrix, predict_matrix
+from prediction_grid import GRID_CATEGORIES, GRID_PURITIES, GRID_STORES, PredictionGrid
+
+START = date(2025, 8, 1)
+DAYS = ('2025-08-01', '2025-08-02', '2025-08-03')
+
+
+def build(model_package, **options):
+    engine = FusedEnsemble(model_package)
+    return PredictionGrid(model_package, engine.predict, START, days=3, max_weight=40.0, step=0.5, **options)
+
+
+@pytest.fixture(scope='module')
+def grid(model_package):
+    return build(model_package, split_weights=FusedEnsemble(model_package).split_values('net_weight'))
+
+
+def cells(weights):
+    """One request per (category, store, purity, day) cell for every weight"""
+    n = len(GRID_CATEGORIES) * len(GRID_STORES) * len(GRID_PURITIES) * len(DAYS)
+    categories, stores, purities, days = (np.array(a, dtype=object).ravel() for a in np.meshgrid(
+        GRID_CATEGORIES, GRID_STORES, GRID_PURITIES, DAYS, indexing='ij'))
+    repeat = lambda a: np.repeat(a, len(weights)).tolist()
+    return (repeat(categories), np.tile(weights, n), repeat(days),
+            np.repeat(purities.astype(float), len(weights)), repeat(stores))
+
+
+def errors(model_package, grid, fields):
+    out, hit = grid.lookup(*fields)
+    expected = predict_matrix(model_package, build_feature_matrix(*fields, FEATURE_COLUMNS))[0]
+    assert np.isnan(out[~hit]).all()
+    return np.abs(out[hit] - expected[hit]) / np.maximum(np.abs(expected[hit]), 1.0), hit
+
+
+def probe_weights(model_package, seed=0):
+    """Random weights plus weights on and just either side of every tree split on net_weight"""
+    splits = FusedEnsemble(model_package).split_values('net_weight')
+    splits = splits[(splits > 0) & (splits < 40)]
+    random = np.random.default_rng(seed).uniform(0, 40, 300)
+    return np.concatenate([random, splits, splits - 1e-3, splits + 1e-3])
+
+
+def test_answers_are_within_max_error_everywhere(model_package, grid):
+    error, hit = errors(model_package, grid, cells(probe_weights(model_package)))
+    assert grid.stats()['error_bound'] and hit.any()
+    assert error.max() <= grid.max_error
+
+
+def test_midpoint_checks_alone_are_only_a_heuristic(model_package, grid):
+    heuristic = build(model_package)
+    assert not heuristic.stats()['error_bound']
+    # It answers more requests, some of them past max_error, which the checked grid sends to the model
+    fields = cells(probe_weights(model_package))
+    loose, loose_hit = errors(model_package, heuristic, fields)
+    _, hit = errors(model_package, grid, fields)
+    assert loose.max() > heuristic.max_error and loose_hit.sum() > hit.sum()
+    assert not (hit & ~loose_hit).any()
+
+
+def test_knots_match_the_model(model_package, grid):
+    # Each purity has its own knots; the first axis is 22K's
+    categories, weights, days, purities, stores = cells(grid.axes[0].knots[::5])
+    keep = np.flatnonzero(purities == GRID_PURITIES[0])
+    fields = [[categories[i] for i in keep], weights[keep], [days[i] for i in keep], purities[keep],
+              [stores[i] for i in keep]]
+    error, hit = errors(model_package, grid, fields)
+    assert hit.any() and error.max() <= 1e-9
+
+
+def test_requests_outside_the_table_miss(grid):
+    misses = grid.misses
+    out, hit = grid.lookup(['RING'] * 5, [5.0, 5.0, 41.0, -1.0, 5.0],
+                           ['2025-07-31', '2025-08-04', '2025-08-01', '2025-08-01', '2025-8-01'],
+                           [22.0] * 5, ['MAIN_STORE'] * 5)
+    assert not hit.any() and np.isnan(out).all()
+    assert grid.misses == misses + 5
+    assert grid.stats()['start'] == START.isoformat()
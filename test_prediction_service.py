@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests: PredictionService answers match scoring each request directly
+"""
+import asyncio
+import gc
+from types import SimpleNamespace
+
+import numpy as np
+from fastapi import HTTPException
+
+from prediction_service import PredictionService
+
+PACKAGE = {'name': 'package'}
+
+
+def request(weight: float, category: str = 'RING', store_id: str = 'MAIN_STORE'):
+    return SimpleNamespace(category=category, net_weight=weight, voucher_date='2025-10-01', purity=22.0,
+                           store_id=store_id)
+
+
+def score(package, requests, features):
+    """Stand-in model: a prediction per request from its weight"""
+    return np.array([1000.0 * r.net_weight + (5.0 if r.store_id == 'MAIN_STORE' else 0.0) for r in requests])
+
+
+class Recorder:
+    """run() that records the batch sizes it scores and yields to the loop like the compute pool"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, fn, package, requests, features):
+        self.batches.append(len(requests))
+        await asyncio.sleep(0.01)
+        gc.collect()  # A batch task held only by the loop would be collected here
+        return fn(package, requests, features)
+
+
+def test_batched_predictions_match_direct_scoring():
+    run = Recorder()
+    service = PredictionService(score, run, window=0.005)
+    requests = [request(w) for w in (1.0, 2.5, 2.5, 7.25, 1.0)] + [request(3.0, store_id='STORE_9')]
+
+    async def main():
+        return await asyncio.gather(*(service.predict(PACKAGE, r) for r in requests))
+
+    results = asyncio.run(main())
+    assert results == score(PACKAGE, requests, None).tolist()
+    # One batch of the distinct keys; repeats waited for the first of them
+    assert run.batches == [4]
+    stats = service.stats()
+    assert stats['misses'] == 4 and stats['coalesced'] == 2 and stats['batches'] == 1
+    assert not service._tasks
+
+
+def test_cached_predictions_until_the_package_changes():
+    run = Recorder()
+    service = PredictionService(score, run, window=0.0)
+
+    async def main():
+        first = await service.predict(PACKAGE, request(4.0))
+        again = await service.predict(PACKAGE, request(4.0, category='ring'))
+        other = await service.predict({'name': 'other'}, request(4.0))
+        return first, again, other
+
+    first, again, other = asyncio.run(main())
+    assert first == again == other == 4005.0
+    assert service.stats()['hits'] == 1
+    assert run.batches == [1, 1]
+
+
+def test_a_failing_request_fails_only_itself():
+    def picky(package, requests, features):
+        if any(r.net_weight < 0 for r in requests):
+            raise ValueError("negative weight")
+        return score(package, requests, features)
+
+    service = PredictionService(picky, Recorder(), window=0.005)
+
+    async def main():
+        return await asyncio.gather(service.predict(PACKAGE, request(2.0)), service.predict(PACKAGE, request(-1.0)),
+                                    return_exceptions=True)
+
+    good, bad = asyncio.run(main())
+    assert good == 2005.0
+    assert isinstance(bad, ValueError)
+
+
+def test_a_shed_batch_is_not_retried_row_by_row():
+    busy = HTTPException(status_code=503, detail="Server busy (predict)")
+    recorder = Recorder()
+
+    def shed(package, requests, features):
+        raise busy
+
+    service = PredictionService(shed, recorder, window=0.005)
+
+    async def main():
+        return await asyncio.gather(*(service.predict(PACKAGE, request(w)) for w in (1.0, 2.0, 3.0)),
+                                    return_exceptions=True)
+
+    assert all(result is busy for result in asyncio.run(main()))
+    assert recorder.batches == [3]
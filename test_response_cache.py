@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests: cached responses never outlive the data they were computed from
+"""
+import pandas as pd
+
+import main
+from response_cache import ResponseCache, etag_matches
+
+
+def test_install_publishes_the_version_with_the_data(monkeypatch):
+    version, generation = main.data_version, main.response_cache.generation
+    frame = pd.DataFrame({'label_no': ['L1']})
+    seen = []
+
+    def footprint():
+        # Runs inside the install, right after the new state is published: what a request would see
+        seen.append((main.turnover_df is frame, main.data_version, main.response_cache.generation))
+        return {}
+
+    monkeypatch.setattr(main, "_memory_footprint", footprint)
+    main.install_artifacts({"turnover_df": frame})
+    try:
+        assert seen == [(True, version + 1, generation + 1)]
+        # A response computed from the previous data is not kept
+        key = main.response_cache.key("/api/dashboard/stats", [("start_date", "2025-08-01")], version)
+        main.response_cache.put(key, b'{"stale": true}', generation)
+        assert main.response_cache.get(key) is None
+    finally:
+        main.install_artifacts({"turnover_df": None})
+
+
+def test_equivalent_queries_share_a_key():
+    key = ResponseCache.key
+    assert key("/a", [("start_date", "2025-08-01"), ("store", "S1")], 1) == \
+        key("/a", [("store", "S1"), ("start_date", "2025-08-01T00:00:00"), ("end_date", "")], 1)
+    assert key("/a", [("start_date", "2025-08-01 12:00")], 1) != key("/a", [("start_date", "2025-08-01")], 1)
+    assert key("/a", [], 1) != key("/a", [], 2)
+
+
+def test_etag_matching():
+    cache = ResponseCache()
+    entry = cache.put(("/a", (), 1), b'{"x": 1}')
+    assert etag_matches(entry.etag, entry.etag)
+    assert etag_matches(f'"other", W/{entry.etag}', entry.etag)
+    assert etag_matches('*', entry.etag)
+    assert not etag_matches('"other"', entry.etag) and not etag_matches(None, entry.etag)
+    assert cache.put(("/b", (), 1), b'{"x": 1}').etag == entry.etag
+
+
+def test_bounded_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=3, max_bytes=10)
+    for i in range(4):
+        cache.put(("/a", (("i", str(i)),), 1), b'xx')
+    assert cache.get(("/a", (("i", "0"),), 1)) is None
+    assert cache.get(("/a", (("i", "1"),), 1)) is not None  # Now the most recently used
+    cache.put(("/big", (), 1), b'x' * 7)
+    stats = cache.stats()
+    assert stats['bytes'] <= 10 and stats['entries'] <= 3
+    assert cache.get(("/a", (("i", "1"),), 1)) is not None
+    assert cache.get(("/a", (("i", "2"),), 1)) is None
+    # Larger than the whole cache: served, not kept
+    assert cache.put(("/huge", (), 1), b'x' * 11).body == b'x' * 11
+    assert cache.get(("/huge", (), 1)) is None
+
+
+def test_expired_entries_are_dropped():
+    cache = ResponseCache(ttl_seconds=0)
+    cache.put(("/a", (), 1), b'x')
+    assert cache.get(("/a", (), 1)) is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_invalidate_drops_matching_entries_and_results_computed_before():
+    cache = ResponseCache()
+    cache.put(("/a", (("store", "S1"),), 1), b'1')
+    cache.put(("/a", (("store", "S2"),), 1), b'2')
+    generation = cache.generation
+    assert cache.invalidate(lambda path, params: params.get("store") == "S1") == 1
+    assert cache.get(("/a", (("store", "S1"),), 1)) is None
+    assert cache.get(("/a", (("store", "S2"),), 1)) is not None
+    cache.put(("/a", (("store", "S1"),), 1), b'stale', generation)
+    assert cache.get(("/a", (("store", "S1"),), 1)) is None
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests: vectorized risk metrics match the per-row expressions they replace
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_metrics import prediction_comparison, risk_counts, risk_score, velocity_trend
+
+DAYS = pd.Series([0, 0.5, 3, 6.99, 7, 9, 9.6, 10, 29.5, 30, 30.01, 45, 400])
+
+
+def test_risk_score_matches_apply():
+    expected = DAYS.apply(lambda x: min(x * 5, 50))
+    np.testing.assert_array_equal(risk_score(DAYS), expected.to_numpy(dtype=np.float64))
+
+
+def test_velocity_trend_matches_apply():
+    expected = DAYS.apply(lambda x: 'rising' if x < 7 else 'falling' if x > 30 else 'stable')
+    assert velocity_trend(DAYS).tolist() == expected.tolist()
+
+
+def test_risk_counts_match_boolean_filters():
+    scores = pd.Series(risk_score(DAYS))
+    assert risk_counts(scores) == {
+        'ageing': len(scores[scores > 45]),
+        'deadstock': len(scores[scores > 48]),
+        'fast_moving': len(scores[scores < 30]),
+    }
+
+
+@pytest.mark.parametrize('with_category', [True, False])
+def test_prediction_comparison_matches_iterrows(with_category):
+    df = pd.DataFrame({'actual_sales': [100.0, 250.5, 80.0], 'ensemble_prediction': [110.2, 240.0, 95.5]})
+    if with_category:
+        df['product_category'] = ['GOLD RING', 'GOLD CHAIN', 'GOLD RING']
+    expected = [
+        {
+            'actual': float(row['actual_sales']),
+            'predicted': float(row['ensemble_prediction']),
+            'category': row.get('product_category', 'Unknown') if 'product_category' in row else 'Unknown',
+        }
+        for _, row in df.head(2).iterrows()
+    ]
+    columns = prediction_comparison(df, 2)
+    actual = [dict(zip(('actual', 'predicted', 'category'), values))
+              for values in zip(columns['actual'].tolist(), columns['predicted'].tolist(), columns['category'])]
+    assert actual == expected
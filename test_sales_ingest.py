@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests: ingested rows aggregate and merge like pandas over the combined rows
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import sales_frame
+from sales_ingest import SalesDelta, StoreFileTailer, merge_aggregates
+from sales_rollup import SalesRollup
+from sales_store import SalesStore
+
+RAW_COLUMNS = ['voucher_date', 'label_no', 'category', 'store', 'purity', 'value']
+
+
+def raw_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows as read from a store file: string dates, no product_category"""
+    return df[RAW_COLUMNS].assign(voucher_date=df['voucher_date'].dt.strftime('%Y-%m-%d'))
+
+
+def groupby(df: pd.DataFrame, key: str, start: str, end: str, store: str = None) -> pd.DataFrame:
+    rows = df[(df['voucher_date'] >= start) & (df['voucher_date'] <= end)]
+    if store is not None:
+        rows = rows[rows['store'] == store]
+    return rows.groupby(key, sort=True).agg(
+        sum=('value', 'sum'), count=('value', 'size'), first_date=('voucher_date', 'min'),
+        last_date=('voucher_date', 'max'),
+    ).reset_index()
+
+
+def assert_aggregate(frame: pd.DataFrame, expected: pd.DataFrame, key: str) -> None:
+    assert frame[key].astype(str).tolist() == expected[key].astype(str).tolist()
+    np.testing.assert_allclose(frame['sum'].to_numpy(dtype=np.float64), expected['sum'].to_numpy())
+    assert frame['count'].tolist() == expected['count'].tolist()
+    assert pd.DatetimeIndex(frame['first_date']).normalize().tolist() == expected['first_date'].tolist()
+    assert pd.DatetimeIndex(frame['last_date']).normalize().tolist() == expected['last_date'].tolist()
+
+
+@pytest.mark.parametrize('start, end', [('2025-07-01', '2025-12-31'), ('2025-08-20', '2025-09-05')])
+@pytest.mark.parametrize('store', [None, 'MAIN_STORE', 'store_1'])
+def test_delta_aggregate_matches_groupby(start, end, store):
+    base = SalesStore(sales_frame(seed=0))
+    ingested = sales_frame(rows=150, seed=1)
+    delta = SalesDelta(base).append(raw_rows(ingested[:70])).append(raw_rows(ingested[70:]))
+    assert len(delta) == len(ingested)
+    for key in ('category', 'label_no'):
+        assert_aggregate(delta.aggregate(key, start, end, store),
+                         groupby(ingested, key, start, end, store.upper() if store else None), key)
+
+
+@pytest.mark.parametrize('store', [None, 'STORE_2'])
+def test_merged_aggregates_match_groupby_over_all_rows(store):
+    df, ingested = sales_frame(seed=0), sales_frame(rows=150, seed=1)
+    # Ingested rows reach past the base store's last day
+    ingested['voucher_date'] += pd.Timedelta(days=30)
+    rollup = SalesRollup(SalesStore(df))
+    delta = SalesDelta(rollup.store).append(raw_rows(ingested))
+    start, end = '2025-08-15', '2025-10-20'
+    combined = pd.concat([df, ingested], ignore_index=True)
+    merged = merge_aggregates(rollup.by_category(start, end, store), delta.aggregate('category', start, end, store),
+                              'category')
+    assert_aggregate(merged, groupby(combined, 'category', start, end, store), 'category')
+
+
+def test_delta_slice_matches_date_filter():
+    ingested = sales_frame(rows=150, seed=1)
+    delta = SalesDelta(SalesStore(sales_frame(seed=0))).append(raw_rows(ingested))
+    for start, end in [(None, None), ('2025-08-10', None), (None, '2025-08-10'), ('2025-09-01', '2025-08-01')]:
+        expected = ingested
+        if start:
+            expected = expected[expected['voucher_date'] >= start]
+        if end:
+            expected = expected[expected['voucher_date'] <= end]
+        rows = delta.slice(start, end)
+        assert sorted(rows['label_no']) == sorted(expected['label_no'])
+        assert rows['voucher_date'].is_monotonic_increasing
+
+
+def test_tailer_reads_only_complete_appended_lines(tmp_path):
+    path = tmp_path / "store_1_denorm.csv"
+    path.write_text("voucher_date,label_no,store,value\n2025-08-01,L0,STORE_1,1.0\n")
+    received = []
+    tailer = StoreFileTailer([path, tmp_path / "store_2_denorm.csv"], lambda rows, name: received.append((rows, name)))
+    assert tailer.poll() == 0
+
+    with open(path, 'a') as f:
+        f.write("2025-08-02,L1,STORE_1,2.0\n2025-08-03,L2,STO")
+    assert tailer.poll() == 1
+    with open(path, 'a') as f:
+        f.write("RE_1,3.5\n")
+    assert tailer.poll() == 1
+    rows = pd.concat([rows for rows, _ in received], ignore_index=True)
+    assert rows['label_no'].tolist() == ['L1', 'L2'] and rows['value'].tolist() == [2.0, 3.5]
+    assert {name for _, name in received} == {path.name}
+
+    # A file rewritten shorter is re-baselined, not re-read
+    path.write_text("voucher_date,label_no,store,value\n")
+    assert tailer.poll() == 0 and tailer.rows_read == 2
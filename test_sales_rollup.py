@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests: SalesRollup and DailySeries answers match pandas over the raw rows
+"""
+import numpy as np
+import pandas as pd
+
+from conftest import sales_frame
+from sales_ingest import SalesDelta
+from sales_rollup import SalesRollup
+from sales_store import SalesStore
+
+
+def baseline(df: pd.DataFrame, key: str, start: str, end: str, store: str = None) -> pd.DataFrame:
+    rows = df[(df['voucher_date'] >= start) & (df['voucher_date'] <= end)]
+    if store is not None:
+        rows = rows[rows['store'] == store]
+    return rows.groupby(key, sort=True)['value'].agg(['sum', 'count']).reset_index()
+
+
+def check(frame: pd.DataFrame, expected: pd.DataFrame, key: str) -> None:
+    frame = frame.astype({key: str}).sort_values(key, ignore_index=True)
+    assert frame[key].tolist() == expected[key].astype(str).tolist()
+    np.testing.assert_allclose(frame['sum'].to_numpy(), expected['sum'].to_numpy())
+    assert frame['count'].tolist() == expected['count'].tolist()
+
+
+def test_storeless_rows_count_towards_all_store_totals():
+    df = pd.DataFrame({
+        'voucher_date': pd.to_datetime(['2025-08-01', '2025-08-02', '2025-08-03']),
+        'label_no': ['A', 'B', 'C'],
+        'category': ['RING', 'RING', 'RING'],
+        'store': ['MAIN_STORE', np.nan, np.nan],
+        'value': [1.0, 1.0, 1.0],
+    })
+    rollup = SalesRollup(SalesStore(df))
+    assert rollup.by_category(None, None)['sum'].tolist() == [3.0]
+    assert rollup.by_category(None, None, store='MAIN_STORE')['sum'].tolist() == [1.0]
+    days, names, sums, _ = rollup.daily(None, None, 'total')
+    assert names == ['total'] and sums.sum() == 3.0
+    names, sums, _ = rollup.series.window(0, 2, 'store')[:3]
+    assert names == ['MAIN_STORE'] and sums.sum() == 1.0
+
+
+def test_range_aggregates_match_groupby():
+    df = sales_frame()
+    rollup = SalesRollup(SalesStore(df))
+    for start, end in [('2025-08-01', '2025-09-29'), ('2025-08-10', '2025-08-20'), ('2025-09-15', '2025-12-31')]:
+        for store in (None, 'MAIN_STORE', 'store_2'):
+            expected_store = store.upper() if store else None
+            check(rollup.by_category(start, end, store), baseline(df, 'category', start, end, expected_store),
+                  'category')
+            check(rollup.by_label(start, end, store), baseline(df, 'label_no', start, end, expected_store),
+                  'label_no')
+
+
+def test_daily_series_match_groupby():
+    df = sales_frame()
+    rollup = SalesRollup(SalesStore(df))
+    days, names, sums, counts = rollup.daily('2025-08-05', '2025-09-10', 'category')
+    rows = df[(df['voucher_date'] >= '2025-08-05') & (df['voucher_date'] <= '2025-09-10')]
+    expected = rows.pivot_table(index='category', columns='voucher_date', values='value', aggfunc='sum', fill_value=0)
+    expected = expected.reindex(columns=pd.DatetimeIndex(days), fill_value=0)
+    assert names == expected.index.tolist()
+    np.testing.assert_allclose(sums, expected.to_numpy())
+
+    _, names, sums, counts = rollup.daily('2025-08-05', '2025-09-10', 'total')
+    assert names == ['total']
+    np.testing.assert_allclose(sums.sum(), rows['value'].sum())
+    assert counts.sum() == len(rows)
+
+
+def test_ingested_rows_match_groupby():
+    df = sales_frame()
+    extra = sales_frame(rows=50, seed=1)
+    store = SalesStore(df)
+    rollup = SalesRollup(store).with_delta(SalesDelta(store).append(extra))
+    combined = pd.concat([df, extra], ignore_index=True)
+    for store_filter in (None, 'STORE_1'):
+        check(rollup.by_category('2025-08-01', '2025-09-29', store_filter),
+              baseline(combined, 'category', '2025-08-01', '2025-09-29', store_filter), 'category')
+    _, _, sums, counts = rollup.daily(None, None, 'total')
+    np.testing.assert_allclose(sums.sum(), combined['value'].sum())
+    assert counts.sum() == len(combined)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests: resampled, smoothed and downsampled sales series match pandas
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from sales_series import lttb, resample, rolling_mean, series_payload
+
+
+def daily(start: str, days: int, groups: int = 3, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64(start, 'D') + np.arange(days).astype('timedelta64[D]')
+    sums = rng.uniform(0, 1_000, (groups, days)).round(2)
+    counts = rng.integers(0, 20, (groups, days))
+    return dates, sums, counts
+
+
+@pytest.mark.parametrize('freq, period', [('week', 'W-SUN'), ('month', 'M')])
+def test_resample_matches_pandas_within_the_range(freq, period):
+    # 2025-08-01 is a Friday: the first week and month are partial
+    dates, sums, counts = daily('2025-08-01', 75)
+    periods, period_sums, period_counts = resample(dates, sums, counts, freq)
+
+    index = pd.DatetimeIndex(dates)
+    expected = pd.DataFrame(sums.T, index=index).groupby(index.to_period(period)).sum()
+    np.testing.assert_allclose(period_sums, expected.to_numpy().T)
+    assert period_counts.sum() == counts.sum()
+    assert periods[0] == dates[0]
+    assert (periods >= dates[0]).all() and (periods <= dates[-1]).all()
+    if freq == 'week':
+        # Every label after the first is a Monday
+        assert ((periods[1:].astype(np.int64) + 3) % 7 == 0).all()
+
+
+def test_rolling_mean_matches_pandas():
+    _, sums, _ = daily('2025-08-01', 30)
+    expected = pd.DataFrame(sums.T).rolling(7).mean().to_numpy().T
+    np.testing.assert_allclose(rolling_mean(sums, 7), expected)
+
+
+def test_downsampled_series_share_dates():
+    dates, sums, counts = daily('2025-08-01', 200, groups=4)
+    keep = lttb(sums.sum(axis=0), 25)
+    assert len(keep) == 25 and keep[0] == 0 and keep[-1] == 199
+    payload = series_payload(['a', 'b', 'c', 'd'], dates, sums, counts, rolling=7, keep=keep)
+    assert len({tuple(entry['dates']) for entry in payload}) == 1
+    full = series_payload(['a'], dates, sums, counts, rolling=7)[0]
+    # Points are picked after smoothing over every period
+    assert payload[0]['rolling'] == [full['rolling'][i] for i in keep]
+    assert payload[0]['sales'] == sums[0][keep].tolist()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests: the SalesStore frame and its date and store slices match pandas
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from column_cache import read_csv_cached
+from sales_ingest import typed_rows
+from sales_store import SALES_SCHEMA, SalesStore
+
+CSV = """voucher_date,label_no,category,product_category,store,purity,net_weight,gold_rate_used,value,extra
+2025-08-02,L2,CHAIN,GOLD CHAIN,STORE_1,,12.5,6100.0,76250.0,x
+2025-08-01,L1,RING,GOLD RING,MAIN_STORE,22,4.25,6250.5,26565.6,y
+2025-08-03,L3,RING,,,18,3.0,,18000.0,z
+"""
+
+
+def baseline_filter(df: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+    """The unindexed date filter SalesStore.slice replaces"""
+    if start_date:
+        df = df[df['voucher_date'] >= start_date]
+    if end_date:
+        df = df[df['voucher_date'] <= end_date]
+    return df
+
+
+def shuffled_sales(rows: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'voucher_date': pd.Timestamp('2025-08-01') + pd.to_timedelta(rng.integers(0, 40, rows), unit='D'),
+        'label_no': [f"L{i}" for i in range(rows)],
+        'store': rng.choice(['MAIN_STORE', 'STORE_1', 'STORE_2'], rows),
+        'value': rng.uniform(100, 1000, rows),
+    })
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    (None, None), ('2025-08-05', None), (None, '2025-08-20'), ('2025-08-05', '2025-08-05'),
+    ('2025-08-02 12:00', '2025-08-10 12:00'), ('2025-09-05', '2025-08-01'), ('2024-01-01', '2026-01-01'),
+])
+def test_slice_matches_date_filter(start_date, end_date):
+    df = shuffled_sales()
+    store = SalesStore(df)
+    expected = baseline_filter(df, start_date, end_date)
+    rows = store.slice(start_date, end_date)
+    assert sorted(rows['label_no']) == sorted(expected['label_no'])
+    assert rows['voucher_date'].is_monotonic_increasing
+
+    for name in ('MAIN_STORE', 'store_2', 'STORE_9'):
+        in_store = store.slice(start_date, end_date, name)
+        wanted = expected[expected['store'] == name.upper()]
+        assert sorted(in_store['label_no']) == sorted(wanted['label_no'])
+
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_empty_purity_loads_as_missing(tmp_path, mmap):
+    path = tmp_path / "sales.csv"
+    path.write_text(CSV)
+    df = read_csv_cached(path, tmp_path / "cache", schema=SALES_SCHEMA, sort_by='voucher_date', mmap=mmap)
+    expected = pd.read_csv(path, parse_dates=['voucher_date']).sort_values('voucher_date', ignore_index=True)
+
+    assert list(df.columns) == list(SALES_SCHEMA)
+    assert df['purity'].isna().tolist() == expected['purity'].isna().tolist()
+    assert df['purity'].dropna().tolist() == expected['purity'].dropna().astype(int).tolist()
+    assert df['value'].tolist() == expected['value'].tolist()
+    assert df['store'].isna().tolist() == expected['store'].isna().tolist()
+
+    # The cached copy reads back the same
+    again = read_csv_cached(path, tmp_path / "cache", schema=SALES_SCHEMA, sort_by='voucher_date', mmap=mmap)
+    pd.testing.assert_frame_equal(again, df)
+    assert len(SalesStore(df).slice('2025-08-02', None)) == 2
+
+
+def test_empty_purity_ingests_as_missing():
+    rows = pd.DataFrame({
+        'voucher_date': ['2025-08-04', '2025-08-05'],
+        'label_no': ['L4', 'L5'],
+        'category': ['RING', 'CHAIN'],
+        'store': ['STORE_2', 'STORE_2'],
+        'purity': [None, 22],
+        'net_weight': [2.0, 5.5],
+        'gold_rate_used': [6000.0, 6050.0],
+        'value': [12000.0, 33275.0],
+    })
+    typed = typed_rows(rows)
+    assert typed['purity'].isna().tolist() == [True, False]
+    assert typed['purity'].iloc[1] == 22
+    assert 'product_category' in typed and typed['product_category'].isna().all()